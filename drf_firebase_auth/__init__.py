@@ -13,3 +13,12 @@ __copyright__ = 'Copyright 2021 Gary Burgmann'
 
 # Version synonym
 VERSION = __version__
+
+# Django < 3.2 does not pick up CoreConfig automatically
+try:
+    import django
+    if django.VERSION < (3, 2):
+        default_app_config = 'drf_firebase_auth.apps.CoreConfig'
+except ImportError:
+    # setup.py imports this module before dependencies are installed
+    pass
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Lazy, thread-safe access to the firebase_admin app used for authentication
+"""
+from typing import Dict, Optional
+import functools
+import threading
+
+import firebase_admin
+from firebase_admin import auth as firebase_auth
+from firebase_admin import tenant_mgt
+
+from .certificates import install_certificate_store
+from .settings import api_settings
+from .transport import configure_session, get_timeout
+
+_apps = {}
+# reentrant, get_project_apps initializes apps while holding it
+_apps_lock = threading.RLock()
+_tenant_clients = {}
+# FIREBASE_PROJECTS and the apps by project ID built from it
+_project_apps = None
+
+
+def get_firebase_app(name: Optional[str] = None) -> firebase_admin.App:
+    """
+    Returns the firebase_admin app, initializing it from
+    FIREBASE_SERVICE_ACCOUNT_KEY on first use, or the already initialized
+    app named by name or FIREBASE_APP_NAME
+    """
+    name = name or api_settings.FIREBASE_APP_NAME
+    app = _apps.get(name)
+    if app is not None:
+        return app
+    with _apps_lock:
+        app = _apps.get(name)
+        if app is None:
+            if name:
+                app = firebase_admin.get_app(name)
+            else:
+                firebase_credentials = firebase_admin.credentials.Certificate(
+                    api_settings.FIREBASE_SERVICE_ACCOUNT_KEY
+                )
+                timeout = get_timeout(None)
+                app = firebase_admin.initialize_app(
+                    credential=firebase_credentials,
+                    options=(
+                        {} if timeout is None else {'httpTimeout': timeout}
+                    )
+                )
+            _configure_transport(app)
+            if api_settings.FIREBASE_CERTIFICATE_STORE:
+                install_certificate_store(app)
+            _apps[name] = app
+    return app
+
+
+def get_project_apps() -> Dict[str, firebase_admin.App]:
+    """
+    Returns the default app and the apps named by FIREBASE_PROJECTS, by
+    their project ID, built once for as long as the setting is unchanged
+    """
+    global _project_apps
+    names = api_settings.FIREBASE_PROJECTS or []
+    if isinstance(names, str):
+        names = names.split(',')
+    names = tuple(names)
+    project_apps = _project_apps
+    if project_apps is not None and project_apps[0] == names:
+        return project_apps[1]
+    with _apps_lock:
+        if _project_apps is None or _project_apps[0] != names:
+            apps = {}
+            for name in (None,) + names:
+                app = get_firebase_app(name)
+                apps.setdefault(app.project_id, app)
+            _project_apps = (names, apps)
+        return _project_apps[1]
+
+
+def get_tenant_client(
+    app: firebase_admin.App,
+    tenant_id: str
+) -> firebase_auth.Client:
+    """
+    Returns the auth client of app for an Identity Platform tenant, its
+    session configured once as the app's own is
+    """
+    key = (app, tenant_id)
+    client = _tenant_clients.get(key)
+    if client is not None:
+        return client
+    with _apps_lock:
+        client = _tenant_clients.get(key)
+        if client is None:
+            client = tenant_mgt.auth_for_tenant(tenant_id, app=app)
+            _configure_client(client)
+            _tenant_clients[key] = client
+    return client
+
+
+def _configure_transport(app: firebase_admin.App):
+    """
+    Apply FIREBASE_HTTP_POOL_SIZE to the session app makes Admin API calls
+    with, and FIREBASE_HTTP_TIMEOUT to its certificate fetches
+    """
+    # pylint: disable=protected-access
+    client = firebase_auth._get_client(app)
+    _configure_client(client)
+    timeout = get_timeout(None)
+    if timeout is not None:
+        verifier = client._token_verifier
+        verifier.request = functools.partial(verifier.request, timeout=timeout)
+
+
+def _configure_client(client: firebase_auth.Client):
+    """ Apply FIREBASE_HTTP_POOL_SIZE to the Admin API session of client """
+    # pylint: disable=protected-access
+    configure_session(client._user_manager.http_client.session)
@@ -1,6 +1,34 @@
 # -*- coding: utf-8 -*-
+import logging
+
 from django.apps import AppConfig
+from django.core.signals import request_finished
+
+from . import __title__
+
+log = logging.getLogger(__title__)
 
 
 class CoreConfig(AppConfig):
     name = 'drf_firebase_auth'
+
+    def ready(self):
+        from .last_login import flush_last_login
+        from .settings import api_settings
+        request_finished.connect(
+            flush_last_login,
+            dispatch_uid='drf_firebase_auth_flush_last_login'
+        )
+        if api_settings.FIREBASE_INITIALIZE_ON_READY:
+            from .app import get_firebase_app
+            get_firebase_app()
+        if (
+            api_settings.FIREBASE_CERTIFICATE_STORE
+            and api_settings.FIREBASE_WARM_CERTIFICATES
+        ):
+            from .certificates import get_certificate_store
+            try:
+                get_certificate_store().refresh()
+            except Exception as e:
+                # the first request will try again
+                log.warning('CoreConfig.ready - certificate warm up: %s', e)
@@ -3,12 +3,15 @@
 Authentication backend for handling firebase user.idToken from incoming
 Authorization header, verifying, and locally authenticating
 """
-from typing import Tuple, Dict
+from typing import Callable, Tuple, Dict, Optional
+import asyncio
 import logging
+import time
 
-import firebase_admin
+from asgiref.sync import sync_to_async
 from firebase_admin import auth as firebase_auth
-from django.utils.encoding import smart_text
+from django.core import signing
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
@@ -17,23 +20,74 @@ from rest_framework import (
     exceptions
 )
 
+from .breaker import UNAVAILABLE_ERRORS, get_breaker
 from .settings import api_settings
 from .models import (
     FirebaseUser,
     FirebaseUserProvider
 )
-from .utils import get_firebase_user_email
+from .cache import (
+    get_user_data,
+    get_valid_after,
+    hash_token,
+    local_user_cache,
+    rejected_token_cache,
+    revocation_cache,
+    set_user_data,
+    set_valid_after,
+    token_cache,
+    uid_key,
+    user_cache
+)
+from .instrumentation import measure, record_cache
+from .last_login import update_last_login
+from .logs import LoggedClaims, LoggedUserRecord, log_auth, redact_email
+from .lazy_user import LazyUser
+from .routing import (
+    Route,
+    get_default_route,
+    get_route,
+    get_token_route,
+    get_user
+)
+from .session_token import verify_session_token
+from .singleflight import SingleFlight
+from .certificates import SESSION_COOKIE_CERT_URI, get_certificate_store
+from .verifier import (
+    get_session_cookie_verifier,
+    get_token_verifier,
+    is_transient_rejection
+)
+from .utils import (
+    get_firebase_user_email,
+    get_provider_fingerprint,
+    get_firebase_user_from_claims
+)
 from . import __title__
 
 log = logging.getLogger(__title__)
 User = get_user_model()
-
-firebase_credentials = firebase_admin.credentials.Certificate(
-    api_settings.FIREBASE_SERVICE_ACCOUNT_KEY
-)
-firebase = firebase_admin.initialize_app(
-    credential=firebase_credentials,
+# verification errors that will recur for as long as the token is retried,
+# which includes the rejections of TokenVerifier.precheck
+REJECTED_TOKEN_ERRORS = (
+    firebase_auth.InvalidIdTokenError,
+    firebase_auth.InvalidSessionCookieError
 )
+# types the rejected token cache raises its entries as again, by name, so
+# expired tokens and session cookies keep their types
+_REJECTION_TYPES = {
+    x.__name__: x for x in (
+        firebase_auth.InvalidIdTokenError,
+        firebase_auth.ExpiredIdTokenError,
+        firebase_auth.InvalidSessionCookieError,
+        firebase_auth.ExpiredSessionCookieError
+    )
+}
+# concurrent requests within a process share one verification per token,
+# one firebase user fetch per uid and one provisioning per uid
+_verifications = SingleFlight()
+_user_fetches = SingleFlight()
+_provisioning = SingleFlight()
 
 
 class FirebaseAuthentication(authentication.TokenAuthentication):
@@ -48,29 +102,246 @@ class FirebaseAuthentication(authentication.TokenAuthentication):
     ) -> Tuple[AnonymousUser, Dict]:
         try:
             decoded_token = self._decode_token(token)
+            lazy_user = self._get_lazy_user(decoded_token)
+            if lazy_user is not None:
+                return (lazy_user, decoded_token)
             firebase_user = self._authenticate_token(decoded_token)
-            local_user = self._get_or_create_local_user(firebase_user)
-            self._create_local_firebase_user(local_user, firebase_user)
+            local_user = self._get_local_user(
+                firebase_user,
+                get_route(decoded_token)
+            )
             return (local_user, decoded_token)
         except Exception as e:
             raise exceptions.AuthenticationFailed(e)
 
+    def _get_local_user(
+        self,
+        firebase_user: firebase_auth.UserRecord,
+        route: Optional[Route] = None
+    ) -> User:
+        """
+        Resolves, or provisions, the local user for an authenticated
+        firebase user of the project and tenant of route, the default app's
+        when None, and syncs its providers
+        """
+        route = route or get_default_route()
+        with measure('local_user'):
+            local_firebase_user = self._get_local_firebase_user(
+                firebase_user,
+                route
+            )
+            if local_firebase_user is None:
+                local_user, local_firebase_user = \
+                    self._provision_local_user(firebase_user, route)
+            else:
+                local_user = self._get_or_create_local_user(
+                    firebase_user,
+                    local_firebase_user,
+                    route
+                )
+        with measure('provider_sync'):
+            self._create_local_firebase_user(
+                local_user,
+                firebase_user,
+                local_firebase_user,
+                route
+            )
+        self._cache_local_user(firebase_user, local_user, route)
+        return local_user
+
+    def _cache_local_user(
+        self,
+        firebase_user: firebase_auth.UserRecord,
+        local_user: User,
+        route: Optional[Route] = None
+    ):
+        """ Remember the pk and is_active of a uid's user for lazy users """
+        local_users = local_user_cache()
+        if local_users is not None:
+            local_users.set(
+                uid_key(firebase_user.uid, route),
+                (local_user.pk, local_user.is_active),
+                float(api_settings.FIREBASE_LOCAL_USER_CACHE_TIMEOUT)
+            )
+
+    @measure('decode')
     def _decode_token(self, token: str) -> Dict:
         """
         Attempt to verify JWT from Authorization header with Firebase and
         return the decoded token
         """
         try:
-            decoded_token = firebase_auth.verify_id_token(
-                token,
-                check_revoked=api_settings.FIREBASE_CHECK_JWT_REVOKED
+            cache_key = self._get_cache_key(token)
+            tokens = token_cache()
+            if tokens is not None:
+                decoded_token = tokens.get(cache_key)
+                record_cache('token', decoded_token is not None)
+                if decoded_token is not None:
+                    log_auth('_decode_token - token cache hit')
+                    decoded_token = dict(decoded_token)
+                    self._check_token_revoked(decoded_token)
+                    return decoded_token
+            decoded_token, shared = self._verify_token_once(cache_key, token)
+            if shared:
+                decoded_token = dict(decoded_token)
+            log_auth(
+                '_decode_token - decoded_token: %s',
+                LoggedClaims(decoded_token)
             )
-            log.info(f'_decode_token - decoded_token: {decoded_token}')
+            if tokens is not None:
+                # a copy, views may change the claims returned as request.auth
+                tokens.set(
+                    cache_key,
+                    dict(decoded_token),
+                    decoded_token.get('exp', 0) - time.time()
+                )
+            self._check_token_revoked(decoded_token)
             return decoded_token
+        except REJECTED_TOKEN_ERRORS as e:
+            # expected of bad tokens, and raised again on every retry
+            log_auth('_decode_token - rejected token: %s', e)
+            raise
         except Exception as e:
-            log.error(f'_decode_token - Exception: {e}')
+            log.error('_decode_token - Exception: %s', e)
             raise Exception(e)
 
+    def _get_cache_key(self, token: str) -> str:
+        """ Key of token in the token caches and in-flight verifications """
+        return hash_token(token)
+
+    def _verify_token_once(
+        self,
+        cache_key: str,
+        token: str
+    ) -> Tuple[Dict, bool]:
+        """
+        Verify token, sharing the verification with concurrent requests for
+        the same token, and remember it for a while if it is rejected for
+        good rather than only until its iat or the next certificates
+        """
+        rejected_tokens = rejected_token_cache()
+        if rejected_tokens is not None:
+            rejection = rejected_tokens.get(cache_key)
+            record_cache('rejected_token', rejection is not None)
+            if rejection is not None:
+                log_auth('_verify_token_once - rejected token cache hit')
+                error_type, reason = rejection
+                raise _REJECTION_TYPES[error_type](reason, None)
+        try:
+            return _verifications.do(cache_key, self._verify_token, token)
+        except REJECTED_TOKEN_ERRORS as e:
+            if rejected_tokens is not None and not is_transient_rejection(e):
+                error_type = next(
+                    x.__name__ for x in type(e).__mro__
+                    if x.__name__ in _REJECTION_TYPES
+                )
+                rejected_tokens.set(
+                    cache_key,
+                    (error_type, str(e)),
+                    float(api_settings.FIREBASE_REJECTED_TOKEN_CACHE_TIMEOUT)
+                )
+            raise
+
+    def _verify_token(self, token: str) -> Dict:
+        """
+        Verify the token signature and claims, revocation is checked
+        separately by _check_token_revoked
+        """
+        app = get_token_route(token).app
+        if api_settings.FIREBASE_VERIFY_TOKENS_LOCALLY:
+            return get_token_verifier(app.project_id).verify(token)
+        if api_settings.FIREBASE_TOKEN_PRECHECK:
+            get_token_verifier(app.project_id).precheck(token)
+        # tenant tokens are signed with the keys of their project, and
+        # their tenant has been checked by get_token_route
+        return firebase_auth.verify_id_token(
+            token,
+            app=app,
+            check_revoked=False
+        )
+
+    def _get_lazy_user(self, decoded_token: Dict) -> Optional[LazyUser]:
+        """
+        Returns a LazyUser built from the token claims when the local user
+        for its uid is already known, so no Firebase or database lookup is
+        made until the view touches model fields
+        """
+        local_users = local_user_cache()
+        if local_users is None:
+            return None
+        uid = decoded_token.get('uid')
+        local_user = local_users.get(uid_key(uid, get_route(decoded_token)))
+        record_cache('local_user', local_user is not None)
+        if local_user is None:
+            return None
+        pk, is_active = local_user
+        if (
+            api_settings.FIREBASE_AUTH_EMAIL_VERIFICATION
+            and not decoded_token.get('email_verified')
+        ):
+            raise Exception(
+                'Email address of this user has not been verified.'
+            )
+        if not is_active:
+            raise Exception('User account is not currently active.')
+        log_auth('_get_lazy_user - local user cache hit')
+        return LazyUser(uid, pk)
+
+    def _check_token_revoked(self, decoded_token: Dict):
+        """
+        Compare the token with the tokens_valid_after_timestamp of its user,
+        from the revocation cache when one is configured
+        """
+        if not api_settings.FIREBASE_CHECK_JWT_REVOKED:
+            return
+        uid = decoded_token.get('uid')
+        route = get_route(decoded_token)
+        valid_after = get_valid_after(uid, route)
+        if revocation_cache() is not None:
+            record_cache('revocation', valid_after is not None)
+        if valid_after is None:
+            try:
+                firebase_user = self._fetch_firebase_user(uid, route)
+            except UNAVAILABLE_ERRORS as e:
+                valid_after = self._get_fallback_valid_after(uid, e, route)
+            else:
+                valid_after = firebase_user.tokens_valid_after_timestamp or 0
+                set_valid_after(uid, valid_after, route)
+        auth_time = decoded_token.get('auth_time', decoded_token.get('iat'))
+        if auth_time * 1000 < valid_after:
+            raise firebase_auth.RevokedIdTokenError(
+                'The Firebase ID token has been revoked.'
+            )
+
+    def _get_fallback_valid_after(
+        self,
+        uid: str,
+        error: Exception,
+        route: Optional[Route] = None
+    ) -> int:
+        """
+        The last known tokens_valid_after_timestamp of uid while firebase is
+        unavailable, or 0 if there is none and
+        FIREBASE_CIRCUIT_BREAKER_FALLBACK_TO_CLAIMS is set
+        """
+        valid_after = get_valid_after(uid, route, stale=True)
+        if valid_after is not None:
+            log.warning(
+                '_check_token_revoked - firebase is unavailable, using the'
+                ' last known revocation time: %s',
+                error
+            )
+            return valid_after
+        if not api_settings.FIREBASE_CIRCUIT_BREAKER_FALLBACK_TO_CLAIMS:
+            raise error
+        log.warning(
+            '_check_token_revoked - firebase is unavailable, skipping the'
+            ' revocation check: %s',
+            error
+        )
+        return 0
+
+    @measure('firebase_user')
     def _authenticate_token(
         self,
         decoded_token: Dict
@@ -78,9 +349,24 @@ class FirebaseAuthentication(authentication.TokenAuthentication):
         """ Returns firebase user if token is authenticated """
         try:
             uid = decoded_token.get('uid')
-            log.info(f'_authenticate_token - uid: {uid}')
-            firebase_user = firebase_auth.get_user(uid)
-            log.info(f'_authenticate_token - firebase_user: {firebase_user}')
+            log_auth('_authenticate_token - uid: %s', uid)
+            if api_settings.FIREBASE_AUTH_FROM_CLAIMS:
+                firebase_user = get_firebase_user_from_claims(decoded_token)
+            else:
+                try:
+                    firebase_user = self._get_firebase_user(
+                        uid,
+                        get_route(decoded_token)
+                    )
+                except UNAVAILABLE_ERRORS as e:
+                    firebase_user = self._get_fallback_firebase_user(
+                        decoded_token,
+                        e
+                    )
+            log_auth(
+                '_authenticate_token - firebase_user: %s',
+                LoggedUserRecord(firebase_user)
+            )
             if api_settings.FIREBASE_AUTH_EMAIL_VERIFICATION:
                 if not firebase_user.email_verified:
                     raise Exception(
@@ -88,56 +374,232 @@ class FirebaseAuthentication(authentication.TokenAuthentication):
                     )
             return firebase_user
         except Exception as e:
-            log.error(f'_authenticate_token - Exception: {e}')
+            log.error('_authenticate_token - Exception: %s', e)
             raise Exception(e)
 
+    def _get_firebase_user(
+        self,
+        uid: str,
+        route: Optional[Route] = None
+    ) -> firebase_auth.UserRecord:
+        """
+        Return the firebase user for uid, from the user cache when one is
+        configured
+        """
+        route = route or get_default_route()
+        if user_cache() is not None:
+            data = get_user_data(uid, route)
+            record_cache('user', data is not None)
+            if data is not None:
+                log_auth('_get_firebase_user - user cache hit')
+                return firebase_auth.UserRecord(data)
+        return self._fetch_firebase_user(uid, route)
+
+    def _get_fallback_firebase_user(
+        self,
+        decoded_token: Dict,
+        error: Exception
+    ) -> firebase_auth.UserRecord:
+        """
+        The last known firebase user while firebase is unavailable, or one
+        built from the token claims if there is none and
+        FIREBASE_CIRCUIT_BREAKER_FALLBACK_TO_CLAIMS is set
+        """
+        data = get_user_data(
+            decoded_token.get('uid'),
+            get_route(decoded_token),
+            stale=True
+        )
+        if data is not None:
+            log.warning(
+                '_get_fallback_firebase_user - firebase is unavailable,'
+                ' using the last known firebase user: %s',
+                error
+            )
+            return firebase_auth.UserRecord(data)
+        if not api_settings.FIREBASE_CIRCUIT_BREAKER_FALLBACK_TO_CLAIMS:
+            raise error
+        log.warning(
+            '_get_fallback_firebase_user - firebase is unavailable: %s',
+            error
+        )
+        return get_firebase_user_from_claims(decoded_token)
+
+    def _fetch_firebase_user(
+        self,
+        uid: str,
+        route: Optional[Route] = None
+    ) -> firebase_auth.UserRecord:
+        """
+        Fetch the firebase user for uid from the project and tenant of route
+        and cache it, concurrent fetches of the same uid sharing one call
+        """
+        route = route or get_default_route()
+        firebase_user, shared = _user_fetches.do(
+            route.key(uid),
+            get_breaker('firebase').call,
+            get_user,
+            uid,
+            route
+        )
+        if not shared:
+            set_user_data(firebase_user, route)
+        return firebase_user
+
+    def _get_local_firebase_user(
+        self,
+        firebase_user: firebase_auth.UserRecord,
+        route: Optional[Route] = None
+    ) -> Optional[FirebaseUser]:
+        """
+        Returns the local FirebaseUser and its User for the firebase uid of
+        the project and tenant of route in a single query, or None if the
+        uid has not been seen before
+        """
+        # pylint: disable=no-member
+        return FirebaseUser.objects.select_related('user').filter(
+            uid=firebase_user.uid,
+            **(route or get_default_route()).namespace
+        ).first()
+
+    def _provision_local_user(
+        self,
+        firebase_user: firebase_auth.UserRecord,
+        route: Optional[Route] = None
+    ) -> Tuple[User, FirebaseUser]:
+        """
+        Returns the local User and FirebaseUser for a uid without a
+        FirebaseUser, creating them once however many requests for the uid
+        arrive together
+        """
+        route = route or get_default_route()
+        try:
+            provisioned, shared = _provisioning.do(
+                route.key(firebase_user.uid),
+                self._create_local_user,
+                firebase_user,
+                route
+            )
+            if not shared:
+                return provisioned
+            # provisioned by a concurrent request, load instances of our own
+            local_firebase_user = self._get_local_firebase_user(
+                firebase_user,
+                route
+            )
+            if local_firebase_user is None:
+                # its transaction is not visible to ours, e.g. not committed
+                # yet under ATOMIC_REQUESTS, so wait on the uid's unique
+                # constraint rather than assume it exists
+                return self._create_local_user(firebase_user, route)
+        except IntegrityError as e:
+            # the uid was provisioned by another process in the meantime
+            local_firebase_user = self._get_local_firebase_user(
+                firebase_user,
+                route
+            )
+            if local_firebase_user is None:
+                raise Exception(e)
+        return (
+            self._get_or_create_local_user(
+                firebase_user,
+                local_firebase_user,
+                route
+            ),
+            local_firebase_user
+        )
+
+    def _create_local_user(
+        self,
+        firebase_user: firebase_auth.UserRecord,
+        route: Optional[Route] = None
+    ) -> Tuple[User, FirebaseUser]:
+        """
+        Atomically get or create the local User and link it to the uid,
+        raising IntegrityError if the uid has been linked meanwhile
+        """
+        namespace = (route or get_default_route()).namespace
+        # pylint: disable=no-member
+        with transaction.atomic():
+            user = self._get_or_create_local_user(firebase_user)
+            # users can be linked to one uid of each project and tenant
+            local_firebase_user = FirebaseUser.objects.filter(
+                user=user,
+                **namespace
+            ).first()
+            if local_firebase_user is None:
+                local_firebase_user = FirebaseUser.objects.create(
+                    uid=firebase_user.uid,
+                    user=user,
+                    **namespace
+                )
+        return user, local_firebase_user
+
     def _get_or_create_local_user(
         self,
-        firebase_user: firebase_auth.UserRecord
+        firebase_user: firebase_auth.UserRecord,
+        local_firebase_user: Optional[FirebaseUser] = None,
+        route: Optional[Route] = None
     ) -> User:
         """
         Attempts to return or create a local User from Firebase user data
         """
         email = get_firebase_user_email(firebase_user)
-        log.info(f'_get_or_create_local_user - email: {email}')
+        log_auth(
+            '_get_or_create_local_user - email: %s',
+            redact_email(email)
+        )
         user = None
         try:
-            user = User.objects.get(email=email)
-            log.info(
-                f'_get_or_create_local_user - user.is_active: {user.is_active}'
+            if local_firebase_user is not None:
+                user = local_firebase_user.user
+            else:
+                # first sign in with this uid, match an existing account
+                user = User.objects.get(email=email)
+            log_auth(
+                '_get_or_create_local_user - user.is_active: %s',
+                user.is_active
             )
             if not user.is_active:
+                if local_firebase_user is not None:
+                    # refused without any lookup until the entry expires
+                    self._cache_local_user(firebase_user, user, route)
                 raise Exception(
                     'User account is not currently active.'
                 )
-            user.last_login = timezone.now()
-            user.save()
+            update_last_login(user)
         except User.DoesNotExist as e:
-            log.error(
-                f'_get_or_create_local_user - User.DoesNotExist: {email}'
+            log_auth(
+                '_get_or_create_local_user - User.DoesNotExist: %s',
+                redact_email(email)
             )
             if not api_settings.FIREBASE_CREATE_LOCAL_USER:
                 raise Exception('User is not registered to the application.')
             username = \
                 api_settings.FIREBASE_USERNAME_MAPPING_FUNC(firebase_user)
-            log.info(
-                f'_get_or_create_local_user - username: {username}'
+            # usernames are often derived from the email address
+            log_auth(
+                '_get_or_create_local_user - creating user for uid: %s',
+                firebase_user.uid
             )
             try:
-                user = User.objects.create_user(
-                    username=username,
-                    email=email
-                )
-                user.last_login = timezone.now()
+                extra_fields = {'last_login': timezone.now()}
                 if (
                     api_settings.FIREBASE_ATTEMPT_CREATE_WITH_DISPLAY_NAME
                     and firebase_user.display_name is not None
                 ):
                     display_name = firebase_user.display_name.split(' ')
                     if len(display_name) == 2:
-                        user.first_name = display_name[0]
-                        user.last_name = display_name[1]
-                user.save()
+                        extra_fields['first_name'] = display_name[0]
+                        extra_fields['last_name'] = display_name[1]
+                # a single insert, rather than an insert and an update
+                user = User.objects.create_user(
+                    username=username,
+                    email=email,
+                    **extra_fields
+                )
+            except IntegrityError:
+                raise
             except Exception as e:
                 raise Exception(e)
         return user
@@ -145,49 +607,216 @@ class FirebaseAuthentication(authentication.TokenAuthentication):
     def _create_local_firebase_user(
         self,
         user: User,
-        firebase_user: firebase_auth.UserRecord
+        firebase_user: firebase_auth.UserRecord,
+        local_firebase_user: Optional[FirebaseUser] = None,
+        route: Optional[Route] = None
     ):
         """ Create a local FireBase model if one does not already exist """
+        namespace = (route or get_default_route()).namespace
         # pylint: disable=no-member
-        local_firebase_user = FirebaseUser.objects.filter(
-            user=user
-        ).first()
+        if local_firebase_user is None:
+            local_firebase_user = FirebaseUser.objects.filter(
+                user=user,
+                **namespace
+            ).first()
 
         if not local_firebase_user:
             new_firebase_user = FirebaseUser(
                 uid=firebase_user.uid,
-                user=user
+                user=user,
+                **namespace
             )
             new_firebase_user.save()
             local_firebase_user = new_firebase_user
 
+        update_fields = []
         if local_firebase_user.uid != firebase_user.uid:
             local_firebase_user.uid = firebase_user.uid
-            local_firebase_user.save()
+            update_fields.append('uid')
 
-        # store FirebaseUserProvider data
-        for provider in firebase_user.provider_data:
-            local_provider = FirebaseUserProvider.objects.filter(
-                provider_id=provider.provider_id,
-                firebase_user=local_firebase_user
-            ).first()
-            if not local_provider:
-                new_local_provider = FirebaseUserProvider.objects.create(
-                    provider_id=provider.provider_id,
-                    uid=provider.uid,
-                    firebase_user=local_firebase_user,
-                )
-                new_local_provider.save()
+        fingerprint = get_provider_fingerprint(firebase_user.provider_data)
+        if local_firebase_user.provider_fingerprint != fingerprint:
+            # the fingerprint is only saved along with the providers it
+            # stands for, or a failed sync would never be retried
+            with transaction.atomic():
+                self._sync_local_providers(local_firebase_user, firebase_user)
+                local_firebase_user.provider_fingerprint = fingerprint
+                update_fields.append('provider_fingerprint')
+                local_firebase_user.save(update_fields=update_fields)
+        elif update_fields:
+            local_firebase_user.save(update_fields=update_fields)
 
+    def _sync_local_providers(
+        self,
+        local_firebase_user: FirebaseUser,
+        firebase_user: firebase_auth.UserRecord
+    ):
+        """
+        Bring the stored FirebaseUserProvider rows in line with the
+        providers currently associated at Firebase, within the caller's
+        transaction
+        """
+        # pylint: disable=no-member
+        local_providers = {
+            (provider_id, uid): pk
+            for pk, provider_id, uid in FirebaseUserProvider.objects
+            .filter(firebase_user=local_firebase_user)
+            .values_list('pk', 'provider_id', 'uid')
+        }
+        current_providers = {
+            (x.provider_id, x.uid) for x in firebase_user.provider_data
+        }
         # catch locally stored providers no longer associated at Firebase
-        local_providers = FirebaseUserProvider.objects.filter(
-            firebase_user=local_firebase_user
+        stale_providers = [
+            pk for key, pk in local_providers.items()
+            if key not in current_providers
+        ]
+        if stale_providers:
+            FirebaseUserProvider.objects.filter(
+                pk__in=stale_providers
+            ).delete()
+        FirebaseUserProvider.objects.bulk_create([
+            FirebaseUserProvider(
+                provider_id=provider_id,
+                uid=uid,
+                firebase_user=local_firebase_user
+            )
+            for provider_id, uid in current_providers
+            if (provider_id, uid) not in local_providers
+        ], ignore_conflicts=True)
+
+
+class FirebaseSessionCookieAuthentication(FirebaseAuthentication):
+    """
+    Authentication using a firebase session cookie, verified and cached as
+    ID tokens are by FirebaseAuthentication, with the same local user
+    resolution and provider sync.
+    """
+
+    def authenticate(self, request):
+        cookie = request._request.COOKIES.get(
+            api_settings.FIREBASE_SESSION_COOKIE_NAME
+        )
+        if not cookie:
+            return None
+        if api_settings.FIREBASE_SESSION_COOKIE_ENFORCE_CSRF:
+            # the browser sends the cookie along with any request, refuse
+            # forged requests before paying for the cookie's verification
+            authentication.SessionAuthentication().enforce_csrf(request)
+        return self.authenticate_credentials(cookie)
+
+    def authenticate_header(self, request):
+        return None
+
+    def _get_cache_key(self, token: str) -> str:
+        # never shared with ID tokens, which have another issuer
+        return hash_token(f'session_cookie:{token}')
+
+    def _verify_token(self, token: str) -> Dict:
+        """
+        Verify the session cookie signature and claims, revocation is
+        checked separately by _check_token_revoked
+        """
+        app = get_token_route(token).app
+        if api_settings.FIREBASE_VERIFY_TOKENS_LOCALLY:
+            return get_session_cookie_verifier(app.project_id).verify(token)
+        if api_settings.FIREBASE_TOKEN_PRECHECK:
+            get_session_cookie_verifier(app.project_id).precheck(token)
+        if api_settings.FIREBASE_CERTIFICATE_STORE:
+            # served to firebase_admin by the installed CertificateRequest
+            get_certificate_store(SESSION_COOKIE_CERT_URI)
+        return firebase_auth.verify_session_cookie(
+            token,
+            app=app,
+            check_revoked=False
         )
-        if len(local_providers) != len(firebase_user.provider_data):
-            current_providers = \
-                [x.provider_id for x in firebase_user.provider_data]
-            for provider in local_providers:
-                if provider.provider_id not in current_providers:
-                    FirebaseUserProvider.objects.filter(
-                        id=provider.id
-                    ).delete()
+
+
+class SessionTokenAuthentication(authentication.TokenAuthentication):
+    """
+    Token based authentication using the session tokens returned by
+    SessionTokenExchangeView, verified with a local key and without any
+    Firebase or database lookup.
+    """
+    keyword = api_settings.FIREBASE_SESSION_TOKEN_HEADER_PREFIX
+
+    def authenticate_credentials(
+        self,
+        token: str
+    ) -> Tuple[LazyUser, Dict]:
+        try:
+            payload = verify_session_token(token)
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed('Session token expired.')
+        except Exception as e:
+            log.error('SessionTokenAuthentication - Exception: %s', e)
+            raise exceptions.AuthenticationFailed('Invalid session token.')
+        log_auth('SessionTokenAuthentication - uid: %s', payload['uid'])
+        return (LazyUser(payload['uid'], payload['pk']), payload)
+
+
+class AsyncFirebaseAuthentication(FirebaseAuthentication):
+    """
+    FirebaseAuthentication for async request handling under ASGI, such as
+    async DRF views or websocket consumers. Blocking Firebase calls run in
+    worker threads and ORM work in Django's thread sensitive executor, so
+    the event loop is never blocked, and concurrent authentications of the
+    same token or uid share one in-flight call.
+    """
+
+    async def authenticate(self, request):
+        credentials = super().authenticate(request)
+        if credentials is None:
+            return None
+        return await credentials
+
+    async def authenticate_credentials(
+        self,
+        token: str
+    ) -> Tuple[AnonymousUser, Dict]:
+        try:
+            decoded_token = dict(await _single_flight(
+                f'token:{hash_token(token)}',
+                sync_to_async(self._decode_token, thread_sensitive=False),
+                token
+            ))
+            lazy_user = await sync_to_async(
+                self._get_lazy_user,
+                thread_sensitive=False
+            )(decoded_token)
+            if lazy_user is not None:
+                return (lazy_user, decoded_token)
+            route = get_route(decoded_token)
+            firebase_user = await _single_flight(
+                f'user:{route.key(decoded_token.get("uid"))}',
+                sync_to_async(
+                    self._authenticate_token,
+                    thread_sensitive=False
+                ),
+                decoded_token
+            )
+            local_user = await sync_to_async(self._get_local_user)(
+                firebase_user,
+                route
+            )
+            return (local_user, decoded_token)
+        except Exception as e:
+            raise exceptions.AuthenticationFailed(e)
+
+
+_in_flight = {}
+
+
+async def _single_flight(key: str, func: Callable, *args):
+    """
+    Await func(*args), sharing the call with any other coroutine on this
+    event loop already awaiting the same key
+    """
+    key = (asyncio.get_running_loop(), key)
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(func(*args))
+        _in_flight[key] = task
+        task.add_done_callback(lambda _: _in_flight.pop(key, None))
+    # shield the shared call from cancellation of any one waiter
+    return await asyncio.shield(task)
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Circuit breakers for the network calls made while authenticating, so that
+requests fail fast rather than wait on Firebase while it is unavailable
+"""
+from typing import Callable
+import logging
+import threading
+import time
+
+import requests
+from firebase_admin import exceptions as firebase_exceptions
+from google.auth import exceptions as google_exceptions
+
+from .settings import api_settings
+from . import __title__
+
+log = logging.getLogger(__title__)
+
+# errors meaning the remote end could not be reached or did not answer in
+# time, rather than that it answered with an error
+UNAVAILABLE_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    google_exceptions.TransportError,
+    firebase_exceptions.DeadlineExceededError,
+    firebase_exceptions.UnavailableError,
+)
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+class CircuitOpenError(firebase_exceptions.UnavailableError):
+    """ Raised instead of making a call while its breaker is open """
+
+    def __init__(self, name: str):
+        super().__init__(f'Circuit breaker {name} is open.')
+
+
+class CircuitBreaker:
+    """
+    Opens after FIREBASE_CIRCUIT_BREAKER_THRESHOLD consecutive calls fail
+    with an UNAVAILABLE_ERRORS error, then fails calls fast for
+    FIREBASE_CIRCUIT_BREAKER_RESET_TIMEOUT seconds before letting a single
+    trial call through, which closes it again if it succeeds
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def call(self, fn: Callable, *args, **kwargs):
+        threshold = int(api_settings.FIREBASE_CIRCUIT_BREAKER_THRESHOLD or 0)
+        if threshold <= 0:
+            return fn(*args, **kwargs)
+        trial = False
+        with self._lock:
+            if self._opened_at is not None:
+                reset_timeout = float(
+                    api_settings.FIREBASE_CIRCUIT_BREAKER_RESET_TIMEOUT
+                )
+                if (
+                    self._trial
+                    or time.monotonic() - self._opened_at < reset_timeout
+                ):
+                    raise CircuitOpenError(self.name)
+                trial = self._trial = True
+        try:
+            result = fn(*args, **kwargs)
+        except UNAVAILABLE_ERRORS:
+            self._record_failure(threshold)
+            raise
+        except Exception:
+            # the call was answered, if unfavourably
+            self._record_success()
+            raise
+        finally:
+            if trial:
+                # a trial ended by anything else, such as cancellation,
+                # must not keep the breaker open for good
+                with self._lock:
+                    self._trial = False
+        self._record_success()
+        return result
+
+    def _record_failure(self, threshold: int):
+        with self._lock:
+            self._failures += 1
+            self._trial = False
+            if self._opened_at is not None or self._failures >= threshold:
+                if self._opened_at is None:
+                    log.warning(
+                        'CircuitBreaker - %s opened after %s failures',
+                        self.name,
+                        self._failures
+                    )
+                self._opened_at = time.monotonic()
+
+    def _record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                log.warning('CircuitBreaker - %s closed', self.name)
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """ Returns the process-wide breaker for name """
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(name)
+                _breakers[name] = breaker
+    return breaker
+
+
+def reset_breakers():
+    """ Drop all breakers, mainly for use in tests """
+    with _breakers_lock:
+        _breakers.clear()
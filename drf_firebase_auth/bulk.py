@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk counterparts of the request path's provider sync, for management
+commands working through many users at once
+"""
+from typing import List, Tuple
+
+from firebase_admin import auth as firebase_auth
+
+from .models import FirebaseUser, FirebaseUserProvider
+from .utils import get_provider_fingerprint
+
+
+def bulk_sync_providers(
+    pairs: List[Tuple[FirebaseUser, firebase_auth.UserRecord]]
+) -> List[FirebaseUser]:
+    """
+    Replace the FirebaseUserProvider rows of each local FirebaseUser whose
+    provider fingerprint differs from its firebase user, returning those
+    that changed
+    """
+    # pylint: disable=no-member
+    changed = []
+    for local_firebase_user, firebase_user in pairs:
+        fingerprint = get_provider_fingerprint(firebase_user.provider_data)
+        if local_firebase_user.provider_fingerprint != fingerprint:
+            local_firebase_user.provider_fingerprint = fingerprint
+            changed.append((local_firebase_user, firebase_user))
+    if not changed:
+        return []
+    FirebaseUserProvider.objects.filter(
+        firebase_user__in=[x for x, _ in changed]
+    ).delete()
+    FirebaseUserProvider.objects.bulk_create([
+        FirebaseUserProvider(
+            provider_id=provider.provider_id,
+            uid=provider.uid,
+            firebase_user=local_firebase_user
+        )
+        for local_firebase_user, firebase_user in changed
+        for provider in firebase_user.provider_data
+    ])
+    FirebaseUser.objects.bulk_update(
+        [x for x, _ in changed],
+        ['provider_fingerprint']
+    )
+    return [x for x, _ in changed]
@@ -0,0 +1,493 @@
+# -*- coding: utf-8 -*-
+"""
+Cache backends used to avoid repeating expensive Firebase work, such as
+verifying the same ID token on every request
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+
+from django.core.cache import caches
+from firebase_admin import auth as firebase_auth
+
+from .routing import Route, get_default_route
+from .settings import api_settings
+
+KEY_PREFIX = 'drf_firebase_auth'
+# keeps TieredCache payloads apart from the raw values DjangoCache stores
+# under the same prefix, bumped whenever the payload format changes
+TIERED_KEY_VERSION = 'tiered1'
+
+# invalidations older than this are not replayed, nodes that fall further
+# behind clear their in-process tier instead
+INVALIDATION_LOG_TIMEOUT = 3600
+MAX_INVALIDATION_BACKLOG = 1000
+
+_caches = {}
+_caches_lock = threading.Lock()
+_invalidation_logs = {}
+_invalidation_logs_lock = threading.Lock()
+
+
+class MemoryCache:
+    """
+    In-process cache with per-entry expiry and LRU eviction once
+    max_size entries are held
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, timeout: float):
+        if timeout <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.time() + timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class DjangoCache:
+    """ Cache stored in one of the project's configured Django caches """
+
+    def __init__(self, alias: str = 'default', prefix: str = KEY_PREFIX):
+        self.alias = alias
+        self.prefix = prefix
+
+    @property
+    def _cache(self):
+        return caches[self.alias]
+
+    def _make_key(self, key: str) -> str:
+        return f'{self.prefix}:{key}'
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._cache.get(self._make_key(key))
+
+    def set(self, key: str, value: Any, timeout: float):
+        self._store(key, value, jitter(timeout))
+
+    def _store(self, key: str, value: Any, timeout: float):
+        if timeout <= 0:
+            return
+        self._cache.set(self._make_key(key), value, math.ceil(timeout))
+
+    def delete(self, key: str):
+        self._cache.delete(self._make_key(key))
+
+
+class TieredCache:
+    """
+    A small in-process MemoryCache in front of a DjangoCache shared by every
+    process. Entries are held in process for at most FIREBASE_CACHE_L1_TIMEOUT
+    seconds and stored in the shared tier as compact JSON, under keys of
+    their own so the 'django' backend never reads them. Deleting a key
+    drops it from the in-process tier of every process within
+    FIREBASE_CACHE_INVALIDATION_INTERVAL seconds.
+    """
+
+    def __init__(
+        self,
+        alias: str = 'default',
+        prefix: str = KEY_PREFIX,
+        max_size: int = 10000
+    ):
+        self.l1 = MemoryCache(max_size=max_size)
+        self.l2 = DjangoCache(
+            alias=alias,
+            prefix=f'{prefix}:{TIERED_KEY_VERSION}'
+        )
+        self._invalidations = get_invalidation_log(alias)
+        self._invalidations.subscribe(self.l1)
+
+    def get(self, key: str) -> Optional[Any]:
+        self._invalidations.sync()
+        value = self.l1.get(key)
+        if value is not None:
+            return value
+        payload = self.l2.get(key)
+        if payload is None:
+            return None
+        try:
+            expires_at, value = json.loads(payload)
+            timeout = expires_at - time.time()
+        except (TypeError, ValueError):
+            # not written by this version of TieredCache
+            return None
+        self.l1.set(key, value, self._l1_timeout(timeout))
+        return value
+
+    def set(self, key: str, value: Any, timeout: float):
+        timeout = jitter(timeout)
+        if timeout <= 0:
+            return
+        # the expiry travels with the value, so the in-process tier never
+        # outlives the shared one
+        self.l2._store(
+            key,
+            json.dumps(
+                [time.time() + timeout, value],
+                separators=(',', ':'),
+                default=str
+            ),
+            timeout
+        )
+        self.l1.set(key, value, self._l1_timeout(timeout))
+
+    def delete(self, key: str):
+        self.l1.delete(key)
+        self.l2.delete(key)
+        self._invalidations.publish(key)
+
+    def _l1_timeout(self, timeout: float) -> float:
+        return min(timeout, float(api_settings.FIREBASE_CACHE_L1_TIMEOUT))
+
+
+class InvalidationLog:
+    """
+    Log of deleted keys kept in a Django cache, numbered by a counter
+    that each process polls to replay deletions on its in-process tiers
+    """
+
+    def __init__(self, alias: str = 'default'):
+        self.alias = alias
+        self._epoch_key = f'{KEY_PREFIX}:invalidation:epoch'
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._next_sync = 0
+        self._epoch = self._get_epoch()
+
+    @property
+    def _cache(self):
+        return caches[self.alias]
+
+    def _get_epoch(self) -> int:
+        return self._cache.get(self._epoch_key) or 0
+
+    def _entry_key(self, epoch: int) -> str:
+        return f'{KEY_PREFIX}:invalidation:{epoch}'
+
+    def subscribe(self, cache: MemoryCache):
+        with self._lock:
+            self._subscribers.append(cache)
+
+    def publish(self, key: str):
+        """ Record a deleted key for every process to replay """
+        self._cache.add(self._epoch_key, 0, None)
+        epoch = self._cache.incr(self._epoch_key)
+        self._cache.set(
+            self._entry_key(epoch),
+            key,
+            INVALIDATION_LOG_TIMEOUT
+        )
+
+    def sync(self):
+        """
+        Replay deletions published since the last sync, at most once per
+        FIREBASE_CACHE_INVALIDATION_INTERVAL seconds
+        """
+        now = time.monotonic()
+        if now < self._next_sync:
+            return
+        with self._lock:
+            if now < self._next_sync:
+                return
+            self._next_sync = now + float(
+                api_settings.FIREBASE_CACHE_INVALIDATION_INTERVAL
+            )
+            epoch = self._get_epoch()
+            if epoch == self._epoch:
+                return
+            entries = {}
+            if 0 < epoch - self._epoch <= MAX_INVALIDATION_BACKLOG:
+                entries = self._cache.get_many([
+                    self._entry_key(x)
+                    for x in range(self._epoch + 1, epoch + 1)
+                ])
+            for cache in self._subscribers:
+                if len(entries) == epoch - self._epoch:
+                    for key in entries.values():
+                        cache.delete(key)
+                else:
+                    # too far behind, or the shared cache was flushed
+                    cache.clear()
+            self._epoch = epoch
+
+
+def get_invalidation_log(alias: str) -> InvalidationLog:
+    """ Returns the process-wide invalidation log kept in cache alias """
+    log = _invalidation_logs.get(alias)
+    if log is None:
+        with _invalidation_logs_lock:
+            log = _invalidation_logs.get(alias)
+            if log is None:
+                log = InvalidationLog(alias)
+                _invalidation_logs[alias] = log
+    return log
+
+
+def jitter(timeout: float) -> float:
+    """
+    Shorten timeout by up to FIREBASE_CACHE_TTL_JITTER of itself, so that
+    entries written together do not expire together
+    """
+    spread = float(api_settings.FIREBASE_CACHE_TTL_JITTER or 0)
+    return timeout * (1 - random.uniform(0, spread))
+
+
+def get_cache(
+    name: str,
+    backend: Optional[str],
+    alias: str = 'default',
+    max_size: int = 10000
+):
+    """
+    Return the shared cache instance for name, or None when backend is not
+    set. Supported backends are 'memory', 'django' and 'tiered'.
+    """
+    if not backend:
+        return None
+    key = (name, backend, alias, max_size)
+    cache = _caches.get(key)
+    if cache is not None:
+        return cache
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            if backend == 'memory':
+                cache = MemoryCache(max_size=int(max_size))
+            elif backend == 'django':
+                cache = DjangoCache(
+                    alias=alias,
+                    prefix=f'{KEY_PREFIX}:{name}'
+                )
+            elif backend == 'tiered':
+                cache = TieredCache(
+                    alias=alias,
+                    prefix=f'{KEY_PREFIX}:{name}',
+                    max_size=int(max_size)
+                )
+            else:
+                raise ValueError(f'Unknown cache backend: {backend}')
+            _caches[key] = cache
+    return cache
+
+
+def clear_caches():
+    """ Drop all cache instances, mainly for use in tests """
+    with _caches_lock:
+        _caches.clear()
+    with _invalidation_logs_lock:
+        _invalidation_logs.clear()
+
+
+def token_cache():
+    """ Cache of verified tokens, keyed by hash_token """
+    return get_cache(
+        'token',
+        api_settings.FIREBASE_TOKEN_CACHE_BACKEND,
+        api_settings.FIREBASE_TOKEN_CACHE_ALIAS,
+        api_settings.FIREBASE_TOKEN_CACHE_MAX_SIZE
+    )
+
+
+def rejected_token_cache():
+    """ Cache of the reasons recently rejected tokens were rejected """
+    return get_cache(
+        'rejected_token',
+        api_settings.FIREBASE_REJECTED_TOKEN_CACHE_BACKEND,
+        api_settings.FIREBASE_REJECTED_TOKEN_CACHE_ALIAS,
+        api_settings.FIREBASE_REJECTED_TOKEN_CACHE_MAX_SIZE
+    )
+
+
+def user_cache():
+    """ Cache of firebase UserRecord data, keyed by uid_key """
+    return get_cache(
+        'user',
+        api_settings.FIREBASE_USER_CACHE_BACKEND,
+        api_settings.FIREBASE_USER_CACHE_ALIAS,
+        api_settings.FIREBASE_USER_CACHE_MAX_SIZE
+    )
+
+
+def get_user_data(
+    uid: str,
+    route: Optional[Route] = None,
+    stale: bool = False
+) -> Optional[Dict]:
+    """
+    The cached UserRecord data of uid, or with stale the last data fetched
+    within FIREBASE_USER_CACHE_STALE_TIMEOUT seconds
+    """
+    users = user_cache()
+    if users is None:
+        return None
+    key = uid_key(uid, route)
+    return users.get(_stale_key(key) if stale else key)
+
+
+def set_user_data(
+    firebase_user: firebase_auth.UserRecord,
+    route: Optional[Route] = None
+):
+    """
+    Cache the raw API response of a firebase user, which is compact and
+    serializable, keeping a stale copy to serve while firebase is
+    unavailable
+    """
+    users = user_cache()
+    if users is None:
+        return
+    key = uid_key(firebase_user.uid, route)
+    users.set(
+        key,
+        firebase_user._data,
+        float(api_settings.FIREBASE_USER_CACHE_TIMEOUT)
+    )
+    users.set(
+        _stale_key(key),
+        firebase_user._data,
+        float(api_settings.FIREBASE_USER_CACHE_STALE_TIMEOUT)
+    )
+
+
+def revocation_cache():
+    """ Cache of tokens_valid_after_timestamp values, keyed by uid_key """
+    return get_cache(
+        'revocation',
+        api_settings.FIREBASE_REVOCATION_CACHE_BACKEND,
+        api_settings.FIREBASE_REVOCATION_CACHE_ALIAS,
+        api_settings.FIREBASE_REVOCATION_CACHE_MAX_SIZE
+    )
+
+
+def get_valid_after(
+    uid: str,
+    route: Optional[Route] = None,
+    stale: bool = False
+) -> Optional[int]:
+    """
+    The cached tokens_valid_after_timestamp of uid, or with stale the last
+    one fetched within FIREBASE_REVOCATION_CACHE_STALE_TIMEOUT seconds
+    """
+    revocations = revocation_cache()
+    if revocations is None:
+        return None
+    key = uid_key(uid, route)
+    return revocations.get(_stale_key(key) if stale else key)
+
+
+def set_valid_after(
+    uid: str,
+    valid_after: int,
+    route: Optional[Route] = None
+):
+    """
+    Cache the tokens_valid_after_timestamp of uid, keeping a stale copy to
+    check tokens against while firebase is unavailable
+    """
+    revocations = revocation_cache()
+    if revocations is None:
+        return
+    key = uid_key(uid, route)
+    revocations.set(
+        key,
+        valid_after,
+        float(api_settings.FIREBASE_REVOCATION_CACHE_TIMEOUT)
+    )
+    revocations.set(
+        _stale_key(key),
+        valid_after,
+        float(api_settings.FIREBASE_REVOCATION_CACHE_STALE_TIMEOUT)
+    )
+
+
+def uid_key(uid: str, route: Optional[Route] = None) -> str:
+    """
+    Key of uid in the user, revocation and local user caches, qualified by
+    the project and tenant of route, the default app's when None
+    """
+    return (route or get_default_route()).key(uid)
+
+
+def _stale_key(key: str) -> str:
+    # uid keys start with a project ID or '/', never with this prefix
+    return f'stale:{key}'
+
+
+def local_user_cache():
+    """ Cache of local user primary keys and is_active, keyed by uid_key """
+    if not api_settings.FIREBASE_AUTH_LAZY_USER:
+        return None
+    return get_cache(
+        'local_user',
+        api_settings.FIREBASE_LOCAL_USER_CACHE_BACKEND,
+        api_settings.FIREBASE_LOCAL_USER_CACHE_ALIAS,
+        api_settings.FIREBASE_LOCAL_USER_CACHE_MAX_SIZE
+    )
+
+
+def evict_uid(uid: str, route: Optional[Route] = None):
+    """
+    Remove everything cached for uid of the project and tenant of route,
+    the default app's when None, so that the next request for that user
+    checks with firebase again. Call this after revoking a user's
+    sessions; memory backends are only evicted in the current process.
+    """
+    key = uid_key(uid, route)
+    for cache in (user_cache(), revocation_cache(), local_user_cache()):
+        if cache is not None:
+            cache.delete(key)
+    for cache in (user_cache(), revocation_cache()):
+        if cache is not None:
+            cache.delete(_stale_key(key))
+
+
+def refresh_uid(
+    firebase_user: firebase_auth.UserRecord,
+    route: Optional[Route] = None
+):
+    """
+    Replace the cached record and revocation timestamp of a firebase user
+    with freshly fetched ones
+    """
+    set_user_data(firebase_user, route)
+    set_valid_after(
+        firebase_user.uid,
+        firebase_user.tokens_valid_after_timestamp or 0,
+        route
+    )
+
+
+def hash_token(token: str) -> str:
+    """ Cache key for a raw token, so tokens are never stored as keys """
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Process-wide store of the Google public certificates used to sign Firebase
+tokens, refreshed in the background before they expire
+"""
+from typing import Dict, Optional
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+import requests
+from firebase_admin import auth as firebase_auth
+
+from .breaker import get_breaker
+from .transport import DEFAULT_TIMEOUT, configure_session, get_timeout
+from . import __title__
+
+log = logging.getLogger(__title__)
+
+ID_TOKEN_CERT_URI = (
+    'https://www.googleapis.com/robot/v1/metadata/x509/'
+    'securetoken@system.gserviceaccount.com'
+)
+SESSION_COOKIE_CERT_URI = (
+    'https://www.googleapis.com/identitytoolkit/v3/relyingparty/publicKeys'
+)
+# fraction of the Cache-Control max-age after which certificates are
+# refreshed in the background
+REFRESH_AT = 0.9
+# seconds between attempts while certificate fetches are failing
+RETRY_INTERVAL = 30
+DEFAULT_MAX_AGE = 3600
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class CertificateStore:
+    """
+    Holds the certificates served at url. The last good certificates keep
+    being served while fetching fails or the certificates circuit breaker
+    is open, and a daemon timer refreshes them before their Cache-Control
+    max-age runs out.
+    """
+
+    def __init__(
+        self,
+        url: str = ID_TOKEN_CERT_URI,
+        session: Optional[requests.Session] = None,
+        timeout: float = DEFAULT_TIMEOUT
+    ):
+        self.url = url
+        self.timeout = timeout
+        self._session = session or requests.Session()
+        self._certificates = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+        self._timer = None
+        self._timer_pid = None
+
+    def get_certificates(self) -> Dict[str, str]:
+        """ Returns certificates by kid, fetching them if none are fresh """
+        if self._certificates is None or self._expires_at <= time.time():
+            with self._lock:
+                if (
+                    self._certificates is None
+                    or self._expires_at <= time.time()
+                ):
+                    try:
+                        self._refresh()
+                    except Exception as e:
+                        if self._certificates is None:
+                            raise
+                        # keep serving these until the next attempt, rather
+                        # than have every request fetch behind the lock
+                        self._expires_at = time.time() + RETRY_INTERVAL
+                        log.warning(
+                            'CertificateStore - serving stale certificates:'
+                            ' %s',
+                            e
+                        )
+        self._ensure_scheduled()
+        return self._certificates
+
+    def refresh(self):
+        """ Fetch the certificates now, for example to warm the store """
+        with self._lock:
+            self._refresh()
+        self._ensure_scheduled()
+
+    def _refresh(self):
+        response = get_breaker('certificates').call(self._fetch)
+        certificates = response.json()
+        max_age = _parse_max_age(response.headers.get('Cache-Control'))
+        self._certificates = certificates
+        self._expires_at = time.time() + max_age
+        log.info(
+            'CertificateStore - fetched %s, max-age %s',
+            self.url,
+            max_age
+        )
+
+    def _fetch(self) -> requests.Response:
+        response = self._session.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    def _ensure_scheduled(self):
+        # timers do not survive a fork, so each process schedules its own
+        if self._is_scheduled():
+            return
+        with self._lock:
+            if not self._is_scheduled():
+                self._schedule(os.getpid())
+
+    def _is_scheduled(self) -> bool:
+        return (
+            self._timer_pid == os.getpid()
+            and self._timer is not None
+            and self._timer.is_alive()
+        )
+
+    def _schedule(self, pid: int, delay: Optional[float] = None):
+        if delay is None:
+            delay = max(self._expires_at - time.time(), 0) * REFRESH_AT
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer_pid = pid
+        self._timer.start()
+
+    def _background_refresh(self):
+        try:
+            with self._lock:
+                self._refresh()
+            delay = None
+        except Exception as e:
+            log.warning('CertificateStore - background refresh failed: %s', e)
+            delay = RETRY_INTERVAL
+        with self._lock:
+            self._schedule(os.getpid(), delay)
+
+    def cancel(self):
+        """ Stop background refreshes """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = None
+
+
+class CertificateResponse:
+    """ google.auth.transport.Response for certificates from the store """
+    status = 200
+    headers = {'Content-Type': 'application/json'}
+
+    def __init__(self, certificates: Dict[str, str]):
+        self.data = json.dumps(certificates).encode('utf-8')
+
+
+class CertificateRequest:
+    """
+    google.auth.transport.Request which answers certificate requests from
+    the stores and passes anything else on to request
+    """
+
+    def __init__(self, request):
+        self._request = request
+
+    def __call__(self, url, method='GET', **kwargs):
+        if method == 'GET' and url in _stores:
+            return CertificateResponse(_stores[url].get_certificates())
+        return self._request(url, method=method, **kwargs)
+
+
+def get_certificate_store(url: str = ID_TOKEN_CERT_URI) -> CertificateStore:
+    """ Returns the process-wide store for url """
+    store = _stores.get(url)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(url)
+            if store is None:
+                store = CertificateStore(
+                    url,
+                    session=configure_session(requests.Session()),
+                    timeout=get_timeout()
+                )
+                _stores[url] = store
+    return store
+
+
+def install_certificate_store(app):
+    """
+    Have firebase_admin verify tokens for app with certificates from the
+    store rather than fetching them lazily during requests
+    """
+    get_certificate_store(ID_TOKEN_CERT_URI)
+    # pylint: disable=protected-access
+    verifier = firebase_auth._get_client(app)._token_verifier
+    if not isinstance(verifier.request, CertificateRequest):
+        verifier.request = CertificateRequest(verifier.request)
+
+
+def _parse_max_age(cache_control: Optional[str]) -> int:
+    match = re.search(r'max-age=(\d+)', cache_control or '')
+    return int(match.group(1)) if match else DEFAULT_MAX_AGE
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Timings, query counts and cache hit rates for each authentication stage,
+reported through the hook configured by FIREBASE_AUTH_METRICS_HOOK
+"""
+from contextlib import ExitStack, contextmanager
+import threading
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.dispatch import Signal
+
+from .settings import api_settings
+
+# sent with stage, duration (seconds) and queries
+stage_measured = Signal()
+# sent with cache and hit (bool)
+cache_accessed = Signal()
+
+_hooks = {}
+_hooks_lock = threading.Lock()
+
+
+class SignalHook:
+    """ Sends the stage_measured and cache_accessed signals """
+
+    def stage(self, stage: str, duration: float, queries: int):
+        stage_measured.send(
+            sender=self.__class__,
+            stage=stage,
+            duration=duration,
+            queries=queries
+        )
+
+    def cache(self, cache: str, hit: bool):
+        cache_accessed.send(sender=self.__class__, cache=cache, hit=hit)
+
+
+class PrometheusHook:
+    """ Records stages and cache accesses with prometheus_client """
+
+    def __init__(self):
+        try:
+            import prometheus_client
+        except ImportError:
+            raise ImproperlyConfigured(
+                'PrometheusHook requires the prometheus_client package.'
+            )
+        self._durations = prometheus_client.Histogram(
+            'drf_firebase_auth_stage_seconds',
+            'Time spent in each authentication stage',
+            ['stage']
+        )
+        self._queries = prometheus_client.Counter(
+            'drf_firebase_auth_stage_queries',
+            'Database queries made in each authentication stage',
+            ['stage']
+        )
+        self._cache = prometheus_client.Counter(
+            'drf_firebase_auth_cache',
+            'Cache lookups made during authentication',
+            ['cache', 'result']
+        )
+
+    def stage(self, stage: str, duration: float, queries: int):
+        self._durations.labels(stage).observe(duration)
+        self._queries.labels(stage).inc(queries)
+
+    def cache(self, cache: str, hit: bool):
+        self._cache.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+class QueryCounter:
+    """ Database execute wrapper counting the queries run through it """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def get_metrics_hook():
+    """ Returns the configured hook instance, or None """
+    hook_class = api_settings.FIREBASE_AUTH_METRICS_HOOK
+    if hook_class is None:
+        return None
+    hook = _hooks.get(hook_class)
+    if hook is None:
+        with _hooks_lock:
+            hook = _hooks.get(hook_class)
+            if hook is None:
+                hook = hook_class()
+                _hooks[hook_class] = hook
+    return hook
+
+
+@contextmanager
+def measure(stage: str):
+    """
+    Report the duration and database queries of the wrapped block, or
+    decorated function, as stage
+    """
+    hook = get_metrics_hook()
+    if hook is None:
+        yield
+        return
+    counter = QueryCounter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            hook.stage(stage, time.perf_counter() - start, counter.count)
+
+
+def record_cache(cache: str, hit: bool):
+    """ Report a lookup in one of the drf_firebase_auth caches """
+    hook = get_metrics_hook()
+    if hook is not None:
+        hook.cache(cache, hit)
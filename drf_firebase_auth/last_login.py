@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Throttled and optionally deferred updates of the local user's last_login
+"""
+import threading
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from .settings import api_settings
+
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def update_last_login(user):
+    """
+    Set user.last_login to now, unless it was set less than
+    FIREBASE_LAST_LOGIN_UPDATE_INTERVAL seconds ago. Only the last_login
+    column is written, or the write is queued for flush_last_login when
+    FIREBASE_LAST_LOGIN_DEFERRED is set.
+    """
+    now = timezone.now()
+    interval = float(api_settings.FIREBASE_LAST_LOGIN_UPDATE_INTERVAL)
+    if (
+        interval > 0
+        and user.last_login is not None
+        and (now - user.last_login).total_seconds() < interval
+    ):
+        return
+    user.last_login = now
+    if api_settings.FIREBASE_LAST_LOGIN_DEFERRED:
+        with _pending_lock:
+            _pending[user.pk] = now
+    else:
+        user.save(update_fields=['last_login'])
+
+
+def flush_last_login(**kwargs):
+    """
+    Write all queued last_login updates in a single statement. Connected to
+    the request_finished signal, so it runs once the response has been sent.
+    """
+    global _pending
+    with _pending_lock:
+        if not _pending:
+            return
+        pending, _pending = _pending, {}
+    User = get_user_model()
+    User.objects.bulk_update(
+        [User(pk=pk, last_login=last_login)
+         for pk, last_login in pending.items()],
+        ['last_login'],
+        batch_size=500
+    )
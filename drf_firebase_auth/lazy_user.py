@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Lightweight stand-in for the local user, built from token claims alone
+"""
+from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject
+from rest_framework import exceptions
+
+
+class LazyUser(SimpleLazyObject):
+    """
+    Proxy for the local User which only loads it from the database when an
+    attribute other than pk, uid, is_authenticated or is_anonymous is used,
+    raising AuthenticationFailed if the user has been deleted by then
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, uid: str, pk):
+        User = get_user_model()
+
+        def load_user():
+            try:
+                return User._default_manager.get(pk=pk)
+            except User.DoesNotExist:
+                raise exceptions.AuthenticationFailed(
+                    'User account no longer exists.'
+                )
+
+        super().__init__(load_user)
+        # set directly, LazyObject.__setattr__ would load the user
+        self.__dict__['uid'] = uid
+        self.__dict__['pk'] = pk
+        self.__dict__[User._meta.pk.attname] = pk
+
+    def __repr__(self):
+        return f'<LazyUser: {self.uid}>'
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Lazily formatted, redacted logging for the authentication request path
+"""
+from typing import Dict
+import logging
+
+from firebase_admin import auth as firebase_auth
+
+from .settings import api_settings
+from . import __title__
+
+log = logging.getLogger(__title__)
+
+
+def log_auth(message: str, *args):
+    """
+    Log message at FIREBASE_AUTH_LOG_LEVEL, formatting args only when the
+    record will actually be emitted
+    """
+    level = api_settings.FIREBASE_AUTH_LOG_LEVEL
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+    if isinstance(level, int) and log.isEnabledFor(level):
+        log.log(level, message, *args)
+
+
+def redact_email(email: str) -> str:
+    if not email or api_settings.FIREBASE_AUTH_LOG_CLAIMS == 'full':
+        return email
+    name, _, domain = email.partition('@')
+    return f'{name[:1]}***@{domain}'
+
+
+class LoggedClaims:
+    """ Log argument for decoded token claims, see FIREBASE_AUTH_LOG_CLAIMS """
+
+    def __init__(self, decoded_token: Dict):
+        self._decoded_token = decoded_token
+
+    def __str__(self):
+        mode = api_settings.FIREBASE_AUTH_LOG_CLAIMS
+        if mode == 'full':
+            return str(self._decoded_token)
+        summary = {'uid': self._decoded_token.get('uid')}
+        if mode == 'summary':
+            summary.update({
+                'sign_in_provider': self._decoded_token.get(
+                    'firebase', {}
+                ).get('sign_in_provider'),
+                'exp': self._decoded_token.get('exp'),
+                'email_verified': self._decoded_token.get('email_verified'),
+            })
+        return str(summary)
+
+
+class LoggedUserRecord:
+    """ Log argument for a UserRecord, see FIREBASE_AUTH_LOG_CLAIMS """
+
+    def __init__(self, firebase_user: firebase_auth.UserRecord):
+        self._firebase_user = firebase_user
+
+    def __str__(self):
+        mode = api_settings.FIREBASE_AUTH_LOG_CLAIMS
+        if mode == 'full':
+            return str(self._firebase_user._data)
+        summary = {'uid': self._firebase_user.uid}
+        if mode == 'summary':
+            summary.update({
+                'email_verified': self._firebase_user.email_verified,
+                'providers': [
+                    x.provider_id for x in self._firebase_user.provider_data
+                ],
+            })
+        return str(summary)
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Evict firebase users from the drf_firebase_auth caches, optionally revoking
+their refresh tokens first
+"""
+from django.core.management.base import BaseCommand, CommandError
+from firebase_admin import auth as firebase_auth
+
+from drf_firebase_auth.app import get_firebase_app
+from drf_firebase_auth.cache import evict_uid
+
+
+class Command(BaseCommand):
+    help = (
+        'Evict firebase users from the drf_firebase_auth caches so that '
+        'revoked sessions are rejected on their next request.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('uids', nargs='+', help='firebase user uids')
+        parser.add_argument(
+            '--revoke',
+            action='store_true',
+            help='revoke the refresh tokens of each user at firebase first',
+        )
+
+    def handle(self, *args, **options):
+        for uid in options['uids']:
+            try:
+                if options['revoke']:
+                    firebase_auth.revoke_refresh_tokens(
+                        uid,
+                        app=get_firebase_app()
+                    )
+                evict_uid(uid)
+            except Exception as e:
+                raise CommandError(f'{uid}: {e}')
+            self.stdout.write(f'Evicted {uid}')
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+Provision local users for every Firebase user ahead of their first request,
+a page of users per transaction
+"""
+from typing import Dict, List, Set
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from firebase_admin import auth as firebase_auth
+
+from drf_firebase_auth.app import get_firebase_app
+from drf_firebase_auth.bulk import bulk_sync_providers
+from drf_firebase_auth.models import FirebaseUser
+from drf_firebase_auth.routing import get_default_route
+from drf_firebase_auth.settings import api_settings
+from drf_firebase_auth.utils import get_firebase_user_email
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Import users from firebase_auth.list_users a page at a time, '
+        'creating or linking their local User, FirebaseUser and '
+        'FirebaseUserProvider rows as on first sign in. Each page is '
+        'written in one transaction and the next page token is printed, '
+        'so an interrupted import can be resumed with --page-token.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=1000,
+            help='users per page and transaction, at most 1000',
+        )
+        parser.add_argument(
+            '--page-token',
+            help='resume from the page token printed by a previous run',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            page = firebase_auth.list_users(
+                page_token=options['page_token'],
+                max_results=options['page_size'],
+                app=get_firebase_app()
+            )
+            while page is not None:
+                firebase_users = page.users
+                with transaction.atomic():
+                    counts = self._import_page(firebase_users)
+                self.stdout.write(
+                    f'{len(firebase_users)} users: '
+                    f'{counts["created"]} created, '
+                    f'{counts["linked"]} linked, {counts["updated"]} updated, '
+                    f'{counts["skipped"]} skipped'
+                    + (
+                        f', next page token: {page.next_page_token}'
+                        if page.has_next_page else ''
+                    )
+                )
+                page = page.get_next_page()
+        except Exception as e:
+            raise CommandError(e)
+
+    def _import_page(
+        self,
+        firebase_users: List[firebase_auth.UserRecord]
+    ) -> Dict[str, int]:
+        # pylint: disable=no-member
+        counts = {'created': 0, 'linked': 0, 'updated': 0, 'skipped': 0}
+        local_firebase_users = {
+            x.uid: x for x in FirebaseUser.objects.filter(
+                uid__in=[x.uid for x in firebase_users],
+                **get_default_route().namespace
+            )
+        }
+        new_users = [
+            x for x in firebase_users if x.uid not in local_firebase_users
+        ]
+        new_uids = {x.uid for x in new_users}
+        if new_users:
+            local_firebase_users.update(
+                self._provision_users(new_users, counts)
+            )
+
+        changed = bulk_sync_providers([
+            (local_firebase_users[x.uid], x)
+            for x in firebase_users if x.uid in local_firebase_users
+        ])
+        counts['updated'] = len([
+            x for x in changed if x.uid not in new_uids
+        ])
+        return counts
+
+    def _provision_users(
+        self,
+        new_users: List[firebase_auth.UserRecord],
+        counts: Dict[str, int]
+    ) -> Dict[str, FirebaseUser]:
+        """
+        Links or creates local users for firebase users without a
+        FirebaseUser, returning their new FirebaseUsers by uid
+        """
+        # pylint: disable=no-member
+        namespace = get_default_route().namespace
+        # link existing users by email, as on first sign in, unless that
+        # would give a local user more than one firebase user of the app
+        emails = {x.uid: self._get_email(x) for x in new_users}
+        shared = self._get_shared_emails(emails)
+        users_by_email = {}
+        for user in User.objects.filter(
+            email__in=[x for x in emails.values() if x]
+        ).order_by('-pk'):
+            users_by_email[user.email] = user
+        linked_users = set(FirebaseUser.objects.filter(
+            user__in=users_by_email.values(),
+            **namespace
+        ).values_list('user_id', flat=True))
+        linked, ambiguous = {}, {}
+        for firebase_user in new_users:
+            email = emails[firebase_user.uid]
+            user = users_by_email.get(email)
+            if email in shared:
+                ambiguous[firebase_user.uid] = \
+                    f'email {email} is shared with other firebase users'
+            elif user is not None and user.pk in linked_users:
+                ambiguous[firebase_user.uid] = (
+                    f'user {user.pk} with email {email} is linked to '
+                    'another firebase user'
+                )
+            elif user is not None:
+                linked[firebase_user.uid] = user
+        for uid, reason in ambiguous.items():
+            self.stderr.write(f'{uid}: {reason}')
+        users = dict(linked)
+        counts['linked'] = len(linked)
+
+        if api_settings.FIREBASE_CREATE_LOCAL_USER:
+            to_create = self._build_users(
+                [
+                    x for x in new_users
+                    if x.uid not in linked and x.uid not in ambiguous
+                ],
+                emails
+            )
+            User.objects.bulk_create(to_create.values())
+            # not every backend sets primary keys on bulk_create, and the
+            # usernames of new users are not taken while their emails are
+            # not linked to any local user
+            created = {
+                (x.username, x.email): x
+                for x in User.objects.filter(username__in=[
+                    x.username for x in to_create.values()
+                ])
+            }
+            for uid, user in to_create.items():
+                users[uid] = created[(user.username, user.email)]
+            counts['created'] = len(to_create)
+        counts['skipped'] = len(new_users) - len(users)
+
+        FirebaseUser.objects.bulk_create([
+            FirebaseUser(uid=uid, user=user, **namespace)
+            for uid, user in users.items()
+        ])
+        return {
+            x.uid: x for x in FirebaseUser.objects.filter(
+                uid__in=users,
+                **namespace
+            )
+        }
+
+    def _get_shared_emails(self, emails: Dict[str, str]) -> Set[str]:
+        """ Emails of more than one of the firebase users in emails """
+        seen, shared = set(), set()
+        for email in emails.values():
+            if email in seen:
+                shared.add(email)
+            seen.add(email)
+        shared.discard(None)
+        return shared
+
+    def _get_email(self, firebase_user: firebase_auth.UserRecord) -> str:
+        try:
+            return get_firebase_user_email(firebase_user)
+        except Exception:
+            return None
+
+    def _build_users(
+        self,
+        firebase_users: List[firebase_auth.UserRecord],
+        emails: Dict[str, str]
+    ) -> Dict[str, User]:
+        """
+        Unsaved users by uid, with the username and email create_user is
+        given on first sign in, skipping usernames already taken
+        """
+        usernames = {
+            x.uid: User.normalize_username(
+                api_settings.FIREBASE_USERNAME_MAPPING_FUNC(x)
+            )
+            for x in firebase_users
+        }
+        taken = set(User.objects.filter(
+            username__in=usernames.values()
+        ).values_list('username', flat=True))
+        users = {}
+        for firebase_user in firebase_users:
+            username = usernames[firebase_user.uid]
+            if username in taken:
+                self.stderr.write(
+                    f'{firebase_user.uid}: username {username} is taken'
+                )
+                continue
+            taken.add(username)
+            user = User(
+                username=username,
+                email=User.objects.normalize_email(emails[firebase_user.uid])
+            )
+            user.set_unusable_password()
+            if (
+                api_settings.FIREBASE_ATTEMPT_CREATE_WITH_DISPLAY_NAME
+                and firebase_user.display_name is not None
+            ):
+                display_name = firebase_user.display_name.split(' ')
+                if len(display_name) == 2:
+                    user.first_name = display_name[0]
+                    user.last_name = display_name[1]
+            users[firebase_user.uid] = user
+        return users
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Bring local users in line with Firebase, deactivating those deleted or
+disabled upstream and refreshing providers and caches for the rest
+"""
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, List
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from firebase_admin import auth as firebase_auth
+
+from drf_firebase_auth.app import get_firebase_app
+from drf_firebase_auth.bulk import bulk_sync_providers
+from drf_firebase_auth.cache import evict_uid, refresh_uid
+from drf_firebase_auth.models import FirebaseUser
+from drf_firebase_auth.routing import get_default_route
+
+User = get_user_model()
+
+# most identifiers firebase_auth.get_users accepts
+MAX_BATCH_SIZE = 100
+
+
+class Command(BaseCommand):
+    help = (
+        'Look up every local FirebaseUser of the default app, outside of '
+        'any tenant, at Firebase, in batches of up to '
+        '100 uids spread over a pool of threads. Local users whose Firebase '
+        'user is disabled or deleted are deactivated, or deleted with '
+        '--delete, and evicted from the caches; providers and caches of the '
+        'rest are refreshed, and with --reactivate inactive local users '
+        'whose Firebase user is enabled are reactivated.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=MAX_BATCH_SIZE)
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='threads looking up batches at Firebase',
+        )
+        parser.add_argument(
+            '--delete',
+            action='store_true',
+            help='delete, rather than deactivate, users deleted at firebase',
+        )
+        parser.add_argument(
+            '--reactivate',
+            action='store_true',
+            help='reactivate inactive users whose firebase user is enabled',
+        )
+
+    def handle(self, *args, **options):
+        if not 0 < options['batch_size'] <= MAX_BATCH_SIZE:
+            raise CommandError(
+                f'--batch-size must be between 1 and {MAX_BATCH_SIZE}'
+            )
+        if options['workers'] < 1:
+            raise CommandError('--workers must be >= 1')
+        counts = {
+            'checked': 0,
+            'deactivated': 0,
+            'deleted': 0,
+            'updated': 0,
+            'reactivated': 0
+        }
+        app = get_firebase_app()
+        try:
+            with ThreadPoolExecutor(options['workers']) as executor:
+                # bound the batches in flight, so memory stays flat however
+                # many users there are
+                pending = deque()
+                for batch in self._batches(options['batch_size']):
+                    pending.append((batch, executor.submit(
+                        firebase_auth.get_users,
+                        [firebase_auth.UidIdentifier(x.uid) for x in batch],
+                        app=app
+                    )))
+                    if len(pending) >= options['workers'] * 2:
+                        self._reconcile(*pending.popleft(), counts, options)
+                while pending:
+                    self._reconcile(*pending.popleft(), counts, options)
+        except Exception as e:
+            raise CommandError(e)
+        self.stdout.write(
+            f'{counts["checked"]} users checked: '
+            f'{counts["deactivated"]} deactivated, '
+            f'{counts["deleted"]} deleted, {counts["updated"]} updated, '
+            f'{counts["reactivated"]} reactivated'
+        )
+
+    def _batches(self, batch_size: int) -> Iterator[List[FirebaseUser]]:
+        """
+        Local firebase users of the default app with their user, batch_size
+        at a time
+        """
+        # pylint: disable=no-member
+        namespace = get_default_route().namespace
+        last_pk = 0
+        while True:
+            batch = list(
+                FirebaseUser.objects.select_related('user')
+                .filter(pk__gt=last_pk, **namespace)
+                .order_by('pk')[:batch_size]
+            )
+            if not batch:
+                return
+            yield batch
+            last_pk = batch[-1].pk
+
+    def _reconcile(
+        self,
+        batch: List[FirebaseUser],
+        lookup: Future,
+        counts: Dict[str, int],
+        options: Dict
+    ):
+        """ Apply the firebase_auth.get_users result of lookup to batch """
+        firebase_users = {x.uid: x for x in lookup.result().users}
+        deleted = [x for x in batch if x.uid not in firebase_users]
+        disabled = [
+            x for x in batch
+            if x.uid in firebase_users and firebase_users[x.uid].disabled
+        ]
+        active = [
+            (x, firebase_users[x.uid]) for x in batch
+            if x.uid in firebase_users and not firebase_users[x.uid].disabled
+        ]
+        to_deactivate = [
+            x.user for x in disabled + ([] if options['delete'] else deleted)
+            if x.user.is_active
+        ]
+        # users can be deactivated locally for other reasons, so they are
+        # only reactivated when asked to
+        reactivated = [
+            x for x, _ in active
+            if options['reactivate'] and not x.user.is_active
+        ]
+        to_reactivate = [x.user for x in reactivated]
+        with transaction.atomic():
+            if options['delete'] and deleted:
+                User.objects.filter(
+                    pk__in=[x.user_id for x in deleted]
+                ).delete()
+                counts['deleted'] += len(deleted)
+            if to_deactivate:
+                User.objects.filter(
+                    pk__in=[x.pk for x in to_deactivate]
+                ).update(is_active=False)
+                counts['deactivated'] += len(to_deactivate)
+            if to_reactivate:
+                User.objects.filter(
+                    pk__in=[x.pk for x in to_reactivate]
+                ).update(is_active=True)
+                counts['reactivated'] += len(to_reactivate)
+            counts['updated'] += len(bulk_sync_providers(active))
+        counts['checked'] += len(batch)
+        # reactivated users may be cached as inactive for lazy users
+        for local_firebase_user in deleted + disabled + reactivated:
+            evict_uid(local_firebase_user.uid)
+        for _, firebase_user in active:
+            refresh_uid(firebase_user)
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+ASGI middleware authenticating websocket connections once per connection,
+for use with Django Channels or any other ASGI websocket application
+"""
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs
+import asyncio
+import json
+import logging
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.utils.functional import LazyObject
+from rest_framework import exceptions
+
+from .authentication import AsyncFirebaseAuthentication
+from .logs import log_auth
+from .settings import api_settings
+from . import __title__
+
+log = logging.getLogger(__title__)
+
+# type of the in-band messages carrying a refreshed token
+REFRESH_MESSAGE_TYPE = 'firebase.token'
+# websocket close code sent when a connection's token expires or is refused
+CLOSE_CODE = 4401
+
+
+class FirebaseAuthMiddleware:
+    """
+    Authenticates a websocket connection with a Firebase ID token when it
+    connects, through AsyncFirebaseAuthentication, and sets scope['user']
+    and scope['auth'] for the rest of the connection. Both are updated in
+    place when the token is replaced or expires, so routers passing on a
+    copy of the scope, such as Channels' URLRouter, see the changes too.
+    The token is read from the FIREBASE_WEBSOCKET_TOKEN_PARAM query string
+    parameter or the Authorization header. Clients replace it by sending a
+    text message {"type": "firebase.token", "token": ...}, which is not
+    passed on to the application. The connection is closed when its token
+    expires without being replaced, or when a replacement is refused,
+    including replacements for another user.
+    """
+
+    def __init__(self, inner, authentication=None):
+        self.inner = inner
+        self.authentication = authentication or AsyncFirebaseAuthentication()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'websocket':
+            return await self.inner(scope, receive, send)
+        connection = _Connection(self.authentication, dict(scope), send)
+        await connection.authenticate(self._get_token(scope))
+        try:
+            return await self.inner(
+                connection.scope,
+                connection.wrap_receive(receive),
+                send
+            )
+        finally:
+            connection.cancel_expiry()
+
+    def _get_token(self, scope: Dict) -> Optional[str]:
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        token = query.get(api_settings.FIREBASE_WEBSOCKET_TOKEN_PARAM)
+        if token:
+            return token[0]
+        headers = dict(scope.get('headers', []))
+        authorization = headers.get(b'authorization', b'').decode('latin-1')
+        keyword, _, token = authorization.partition(' ')
+        # case insensitive, as TokenAuthentication compares it over http
+        if keyword.lower() == self.authentication.keyword.lower() and token:
+            return token
+        return None
+
+
+class _ConnectionUser(LazyObject):
+    """
+    scope['user'] of a connection, wrapping the user of its current token.
+    Copies of the scope share it, so replacing the wrapped user reaches
+    applications behind routers
+    """
+
+    def _setup(self):
+        raise ValueError(
+            'The connection user is only available once it is authenticated.'
+        )
+
+
+class _Connection:
+    """ Authentication state of one websocket connection """
+
+    def __init__(
+        self,
+        authentication: AsyncFirebaseAuthentication,
+        scope: Dict,
+        send: Callable
+    ):
+        self.authentication = authentication
+        self.scope = scope
+        # shared by every copy of the scope made further down the stack
+        self.scope['user'] = _ConnectionUser()
+        self.scope['auth'] = {}
+        self._send = send
+        self._expiry = None
+        # uid of the first accepted token, which replacements must match
+        self._uid = None
+
+    async def authenticate(self, token: Optional[str]) -> bool:
+        """
+        Set the scope user and auth from token, or an anonymous user if it
+        is missing or refused, returning whether it was accepted. Tokens for
+        another uid than the first accepted one are refused.
+        """
+        user, decoded_token = AnonymousUser(), None
+        if token:
+            try:
+                user, decoded_token = \
+                    await self.authentication.authenticate_credentials(token)
+            except exceptions.AuthenticationFailed as e:
+                log_auth('FirebaseAuthMiddleware - refused token: %s', e)
+        if decoded_token is not None:
+            uid = decoded_token.get('uid')
+            if self._uid is None:
+                self._uid = uid
+            elif uid != self._uid:
+                log_auth(
+                    'FirebaseAuthMiddleware - refused token for uid %s on'
+                    ' a connection of uid %s',
+                    uid,
+                    self._uid
+                )
+                user, decoded_token = AnonymousUser(), None
+        self._set_user(user, decoded_token)
+        self._schedule_expiry(decoded_token)
+        return decoded_token is not None
+
+    def wrap_receive(self, receive: Callable) -> Callable:
+        """ receive, consuming the messages carrying refreshed tokens """
+        async def wrapped_receive():
+            while True:
+                message = await receive()
+                token = _get_refreshed_token(message)
+                if token is None:
+                    return message
+                if not await self.authenticate(token):
+                    await self._close()
+        return wrapped_receive
+
+    def cancel_expiry(self):
+        if self._expiry is not None:
+            self._expiry.cancel()
+            self._expiry = None
+
+    def _set_user(self, user, decoded_token: Optional[Dict]):
+        """
+        Update the shared user and claims rather than the scope's keys,
+        applications may hold a copy of the scope
+        """
+        self.scope['user']._wrapped = user
+        self.scope['auth'].clear()
+        self.scope['auth'].update(decoded_token or {})
+
+    def _schedule_expiry(self, decoded_token: Optional[Dict]):
+        self.cancel_expiry()
+        if decoded_token is None or 'exp' not in decoded_token:
+            return
+        self._expiry = asyncio.get_running_loop().call_later(
+            max(0, decoded_token['exp'] - time.time()),
+            self._expire
+        )
+
+    def _expire(self):
+        log_auth('FirebaseAuthMiddleware - token expired')
+        self._expiry = None
+        self._set_user(AnonymousUser(), None)
+        asyncio.ensure_future(self._close())
+
+    async def _close(self):
+        try:
+            await self._send({'type': 'websocket.close', 'code': CLOSE_CODE})
+        except Exception as e:
+            # the connection is already closing
+            log.warning('FirebaseAuthMiddleware - close: %s', e)
+
+
+def _get_refreshed_token(message: Dict) -> Optional[str]:
+    """ The token of an in-band refresh message, None for other messages """
+    if message.get('type') != 'websocket.receive':
+        return None
+    text = message.get('text')
+    # cheap test first, every message of the connection passes through here
+    if not text or REFRESH_MESSAGE_TYPE not in text:
+        return None
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        return None
+    if (
+        not isinstance(payload, dict)
+        or payload.get('type') != REFRESH_MESSAGE_TYPE
+        or not isinstance(payload.get('token'), str)
+    ):
+        return None
+    return payload['token']
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drf_firebase_auth', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='firebaseuser',
+            name='provider_fingerprint',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
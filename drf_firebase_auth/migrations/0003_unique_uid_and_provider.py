@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+from django.db import migrations, models
+
+
+def remove_duplicates(apps, schema_editor):
+    """
+    Earlier versions could store the same uid or provider more than once,
+    keep the first row of each so the unique constraints can be added
+    """
+    FirebaseUser = apps.get_model('drf_firebase_auth', 'FirebaseUser')
+    FirebaseUserProvider = apps.get_model(
+        'drf_firebase_auth', 'FirebaseUserProvider'
+    )
+    duplicate_uids = (
+        FirebaseUser.objects.values('uid')
+        .annotate(count=models.Count('id'), keep=models.Min('id'))
+        .filter(count__gt=1)
+    )
+    for row in duplicate_uids:
+        FirebaseUser.objects.filter(uid=row['uid']).exclude(
+            id=row['keep']
+        ).delete()
+    duplicate_providers = (
+        FirebaseUserProvider.objects.values('firebase_user', 'provider_id')
+        .annotate(count=models.Count('id'), keep=models.Min('id'))
+        .filter(count__gt=1)
+    )
+    for row in duplicate_providers:
+        FirebaseUserProvider.objects.filter(
+            firebase_user=row['firebase_user'],
+            provider_id=row['provider_id']
+        ).exclude(id=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drf_firebase_auth', '0002_firebaseuser_provider_fingerprint'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='firebaseuser',
+            name='uid',
+            field=models.CharField(max_length=191, unique=True),
+        ),
+        migrations.AlterUniqueTogether(
+            name='firebaseuserprovider',
+            unique_together={('firebase_user', 'provider_id')},
+        ),
+    ]
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drf_firebase_auth', '0003_unique_uid_and_provider'),
+    ]
+
+    # existing uids keep blank project and tenant IDs, those of the default
+    # app's project outside of any tenant
+    operations = [
+        migrations.AddField(
+            model_name='firebaseuser',
+            name='project_id',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='firebaseuser',
+            name='tenant_id',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='firebaseuser',
+            name='uid',
+            field=models.CharField(max_length=191),
+        ),
+        migrations.AlterUniqueTogether(
+            name='firebaseuser',
+            unique_together={('project_id', 'tenant_id', 'uid')},
+        ),
+    ]
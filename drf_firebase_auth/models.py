@@ -19,7 +19,32 @@ class FirebaseUser(models.Model):
         related_name='firebase_user',
         related_query_name='firebase_user',
     )
+    # project and Identity Platform tenant of the uid, blank for the default
+    # app's project and for users outside of any tenant, see routing.Route
+    project_id = models.CharField(
+        max_length=100,
+        null=False,
+        blank=True,
+        default='',
+    )
+    tenant_id = models.CharField(
+        max_length=100,
+        null=False,
+        blank=True,
+        default='',
+    )
     uid = models.CharField(max_length=191, null=False,)
+    # hash of the providers last synced, see utils.get_provider_fingerprint
+    provider_fingerprint = models.CharField(
+        max_length=64,
+        null=False,
+        blank=True,
+        default='',
+    )
+
+    class Meta:
+        # uids are only unique within one tenant of one project
+        unique_together = ('project_id', 'tenant_id', 'uid')
 
 
 class FirebaseUserProvider(models.Model):
@@ -32,3 +57,6 @@ class FirebaseUserProvider(models.Model):
     )
     uid = models.CharField(max_length=191, null=False,)
     provider_id = models.CharField(max_length=50, null=False,)
+
+    class Meta:
+        unique_together = ('firebase_user', 'provider_id')
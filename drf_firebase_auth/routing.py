@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Routing of tokens to the firebase_admin app of the project they were issued
+by, and the Identity Platform tenant they were issued for
+"""
+from typing import Dict, NamedTuple, Optional
+
+import firebase_admin
+from firebase_admin import auth as firebase_auth
+
+from .app import get_firebase_app, get_project_apps, get_tenant_client
+from .settings import api_settings
+from .verifier import peek_claims
+
+
+class Route(NamedTuple):
+    app: firebase_admin.App
+    tenant_id: Optional[str] = None
+
+    @property
+    def project_id(self) -> str:
+        """
+        Project ID stored with the local users of the route, blank for the
+        default app's project, which users linked before routing belong to
+        """
+        if self.app is get_firebase_app():
+            return ''
+        return self.app.project_id
+
+    @property
+    def namespace(self) -> Dict[str, str]:
+        """ FirebaseUser fields qualifying the uids of the route """
+        return {
+            'project_id': self.project_id,
+            'tenant_id': self.tenant_id or ''
+        }
+
+    def key(self, uid: str) -> str:
+        """
+        Cache and in-flight call key of uid, uids are only unique within one
+        tenant of one project. Neither contains a '/'.
+        """
+        return f'{self.project_id}/{self.tenant_id or ""}/{uid}'
+
+
+def get_default_route() -> Route:
+    """ Route of the default app, without a tenant """
+    return Route(get_firebase_app())
+
+
+def is_routing_enabled() -> bool:
+    return bool(
+        api_settings.FIREBASE_PROJECTS
+        or api_settings.FIREBASE_TENANTS is not None
+    )
+
+
+def get_route(claims: Dict) -> Route:
+    """
+    Returns the app and tenant for the aud and firebase.tenant claims of a
+    token, raising InvalidIdTokenError if they are not configured
+    """
+    if not is_routing_enabled():
+        return get_default_route()
+    app = get_project_apps().get(claims.get('aud'))
+    if app is None:
+        raise firebase_auth.InvalidIdTokenError(
+            f'Token has incorrect "aud" claim "{claims.get("aud")}".'
+        )
+    firebase_claims = claims.get('firebase')
+    tenant_id = (
+        firebase_claims.get('tenant')
+        if isinstance(firebase_claims, dict) else None
+    )
+    tenants = api_settings.FIREBASE_TENANTS
+    if isinstance(tenants, str):
+        tenants = tenants.split(',')
+    if tenant_id is not None and tenants is not None and (
+        tenant_id not in tenants
+    ):
+        raise firebase_auth.InvalidIdTokenError(
+            f'Token has unexpected tenant "{tenant_id}".'
+        )
+    return Route(app, tenant_id)
+
+
+def get_token_route(token: str) -> Route:
+    """ Returns the route of a token that has not been verified yet """
+    if not is_routing_enabled():
+        return get_default_route()
+    return get_route(peek_claims(token))
+
+
+def get_user(uid: str, route: Route) -> firebase_auth.UserRecord:
+    """ Fetch the firebase user for uid from the project and tenant """
+    if route.tenant_id is None:
+        return firebase_auth.get_user(uid, app=route.app)
+    return get_tenant_client(route.app, route.tenant_id).get_user(uid)
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Short-lived session tokens signed locally, which a client exchanges a
+Firebase ID token for once and then uses without Firebase being involved
+"""
+from typing import Any, Dict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+
+from .settings import api_settings
+
+SALT = 'drf_firebase_auth.session_token'
+
+
+def _get_key() -> str:
+    return api_settings.FIREBASE_SESSION_TOKEN_KEY or settings.SECRET_KEY
+
+
+def create_session_token(user: Any, uid: str) -> str:
+    """ Returns a session token for the local user and its firebase uid """
+    # primary keys are carried as strings, so that e.g. UUIDs survive JSON
+    pk = get_user_model()._meta.pk.value_to_string(user)
+    return signing.dumps(
+        {'pk': pk, 'uid': uid},
+        key=_get_key(),
+        salt=SALT,
+        compress=True
+    )
+
+
+def verify_session_token(token: str) -> Dict:
+    """
+    Returns the pk and uid a session token was issued for, raising
+    django.core.signing.BadSignature if it is invalid or older than
+    FIREBASE_SESSION_TOKEN_TIMEOUT seconds
+    """
+    payload = signing.loads(
+        token,
+        key=_get_key(),
+        salt=SALT,
+        max_age=float(api_settings.FIREBASE_SESSION_TOKEN_TIMEOUT)
+    )
+    return {
+        'pk': get_user_model()._meta.pk.to_python(payload['pk']),
+        'uid': payload['uid']
+    }
@@ -15,9 +15,35 @@ DEFAULTS = {
     # path to JSON file with firebase secrets
     'FIREBASE_SERVICE_ACCOUNT_KEY':
         os.getenv('FIREBASE_SERVICE_ACCOUNT_KEY', ''),
+    # name of an already initialized firebase_admin app to use, instead of
+    # initializing one from FIREBASE_SERVICE_ACCOUNT_KEY on first use
+    'FIREBASE_APP_NAME':
+        os.getenv('FIREBASE_APP_NAME', None),
+    # names of further initialized firebase_admin apps whose projects' tokens
+    # are accepted, each token is verified by the app whose project ID
+    # matches its aud claim
+    'FIREBASE_PROJECTS':
+        os.getenv('FIREBASE_PROJECTS', None),
+    # Identity Platform tenant IDs whose tokens are accepted, None accepts
+    # tokens of any tenant, tokens issued outside a tenant are always
+    # accepted
+    'FIREBASE_TENANTS':
+        os.getenv('FIREBASE_TENANTS', None),
+    # initialize the firebase_admin app when django starts, rather than on
+    # the first authenticated request
+    'FIREBASE_INITIALIZE_ON_READY':
+        os.getenv('FIREBASE_INITIALIZE_ON_READY', False),
     # allow creation of new local user in db
     'FIREBASE_CREATE_LOCAL_USER':
         os.getenv('FIREBASE_CREATE_LOCAL_USER', True),
+    # minimum seconds between last_login updates of a local user, 0 updates
+    # it on every request
+    'FIREBASE_LAST_LOGIN_UPDATE_INTERVAL':
+        os.getenv('FIREBASE_LAST_LOGIN_UPDATE_INTERVAL', 0),
+    # queue last_login updates and write them in one batch after the
+    # response has been sent
+    'FIREBASE_LAST_LOGIN_DEFERRED':
+        os.getenv('FIREBASE_LAST_LOGIN_DEFERRED', False),
     # attempt to split firebase user.display_name and set local user
     # first_name and last_name
     'FIREBASE_ATTEMPT_CREATE_WITH_DISPLAY_NAME':
@@ -25,12 +51,182 @@ DEFAULTS = {
     # commonly JWT or Bearer (e.g. JWT <token>)
     'FIREBASE_AUTH_HEADER_PREFIX':
         os.getenv('FIREBASE_AUTH_HEADER_PREFIX', 'JWT'),
+    # cookie read by FirebaseSessionCookieAuthentication
+    'FIREBASE_SESSION_COOKIE_NAME':
+        os.getenv('FIREBASE_SESSION_COOKIE_NAME', 'session'),
+    # require a CSRF token on unsafe requests authenticated by session cookie
+    'FIREBASE_SESSION_COOKIE_ENFORCE_CSRF':
+        os.getenv('FIREBASE_SESSION_COOKIE_ENFORCE_CSRF', True),
+    # query string parameter FirebaseAuthMiddleware reads websocket tokens
+    # from, before falling back to the Authorization header
+    'FIREBASE_WEBSOCKET_TOKEN_PARAM':
+        os.getenv('FIREBASE_WEBSOCKET_TOKEN_PARAM', 'token'),
     # verify that JWT has not been revoked
     'FIREBASE_CHECK_JWT_REVOKED':
         os.getenv('FIREBASE_CHECK_JWT_REVOKED', True),
+    # check revocation against a per uid cache of tokens_valid_after_time
+    # rather than calling firebase on every request, one of None, 'memory'
+    # (in-process LRU), 'django' (uses FIREBASE_REVOCATION_CACHE_ALIAS) or
+    # 'tiered' (an in-process LRU in front of the 'django' backend)
+    'FIREBASE_REVOCATION_CACHE_BACKEND':
+        os.getenv('FIREBASE_REVOCATION_CACHE_BACKEND', None),
+    # django cache alias used by the 'django' revocation cache backend
+    'FIREBASE_REVOCATION_CACHE_ALIAS':
+        os.getenv('FIREBASE_REVOCATION_CACHE_ALIAS', 'default'),
+    # maximum number of users held by the 'memory' revocation cache backend
+    'FIREBASE_REVOCATION_CACHE_MAX_SIZE':
+        os.getenv('FIREBASE_REVOCATION_CACHE_MAX_SIZE', 10000),
+    # seconds before a cached revocation time is fetched from firebase again
+    'FIREBASE_REVOCATION_CACHE_TIMEOUT':
+        os.getenv('FIREBASE_REVOCATION_CACHE_TIMEOUT', 60),
+    # seconds a revocation time is kept to check tokens against while
+    # firebase is unavailable
+    'FIREBASE_REVOCATION_CACHE_STALE_TIMEOUT':
+        os.getenv('FIREBASE_REVOCATION_CACHE_STALE_TIMEOUT', 3600),
     # require that firebase user.email_verified is True
     'FIREBASE_AUTH_EMAIL_VERIFICATION':
         os.getenv('FIREBASE_AUTH_EMAIL_VERIFICATION', False),
+    # keep google's signing certificates in a process-wide store that is
+    # refreshed in the background, instead of fetching them during requests
+    'FIREBASE_CERTIFICATE_STORE':
+        os.getenv('FIREBASE_CERTIFICATE_STORE', False),
+    # fetch certificates when django starts, with FIREBASE_CERTIFICATE_STORE
+    'FIREBASE_WARM_CERTIFICATES':
+        os.getenv('FIREBASE_WARM_CERTIFICATES', False),
+    # verify tokens with keys parsed once from the certificate store rather
+    # than through firebase_admin.auth.verify_id_token
+    'FIREBASE_VERIFY_TOKENS_LOCALLY':
+        os.getenv('FIREBASE_VERIFY_TOKENS_LOCALLY', False),
+    # reject malformed tokens and tokens with the wrong algorithm, claims or
+    # kid before passing them to firebase_admin.auth.verify_id_token, which
+    # FIREBASE_VERIFY_TOKENS_LOCALLY always does
+    'FIREBASE_TOKEN_PRECHECK':
+        os.getenv('FIREBASE_TOKEN_PRECHECK', False),
+    # seconds before each attempt at a call to firebase or google times out,
+    # None leaves the firebase_admin default of 120 seconds; firebase_admin
+    # retries failed attempts, so a call can take several times as long
+    'FIREBASE_HTTP_TIMEOUT':
+        os.getenv('FIREBASE_HTTP_TIMEOUT', None),
+    # connections kept open per host for calls to firebase, None leaves the
+    # requests default of 10
+    'FIREBASE_HTTP_POOL_SIZE':
+        os.getenv('FIREBASE_HTTP_POOL_SIZE', None),
+    # consecutive failed calls to firebase after which further calls fail
+    # fast, 0 disables the circuit breakers
+    'FIREBASE_CIRCUIT_BREAKER_THRESHOLD':
+        os.getenv('FIREBASE_CIRCUIT_BREAKER_THRESHOLD', 0),
+    # seconds an open breaker fails calls fast before letting one through
+    'FIREBASE_CIRCUIT_BREAKER_RESET_TIMEOUT':
+        os.getenv('FIREBASE_CIRCUIT_BREAKER_RESET_TIMEOUT', 30),
+    # build the firebase user from the token claims while firebase cannot
+    # be reached, rather than failing authentication
+    'FIREBASE_CIRCUIT_BREAKER_FALLBACK_TO_CLAIMS':
+        os.getenv('FIREBASE_CIRCUIT_BREAKER_FALLBACK_TO_CLAIMS', False),
+    # cache verified tokens until their exp claim, one of None, 'memory'
+    # (in-process LRU), 'django' (uses FIREBASE_TOKEN_CACHE_ALIAS) or
+    # 'tiered' (an in-process LRU in front of the 'django' backend)
+    'FIREBASE_TOKEN_CACHE_BACKEND':
+        os.getenv('FIREBASE_TOKEN_CACHE_BACKEND', None),
+    # django cache alias used by the 'django' token cache backend
+    'FIREBASE_TOKEN_CACHE_ALIAS':
+        os.getenv('FIREBASE_TOKEN_CACHE_ALIAS', 'default'),
+    # maximum number of tokens held by the 'memory' token cache backend
+    'FIREBASE_TOKEN_CACHE_MAX_SIZE':
+        os.getenv('FIREBASE_TOKEN_CACHE_MAX_SIZE', 10000),
+    # remember tokens that failed verification, so that retries of the same
+    # token are rejected without verifying it again, one of None, 'memory'
+    # (in-process LRU), 'django' (uses FIREBASE_REJECTED_TOKEN_CACHE_ALIAS)
+    # or 'tiered' (an in-process LRU in front of the 'django' backend)
+    'FIREBASE_REJECTED_TOKEN_CACHE_BACKEND':
+        os.getenv('FIREBASE_REJECTED_TOKEN_CACHE_BACKEND', None),
+    # django cache alias used by the 'django' rejected token cache backend
+    'FIREBASE_REJECTED_TOKEN_CACHE_ALIAS':
+        os.getenv('FIREBASE_REJECTED_TOKEN_CACHE_ALIAS', 'default'),
+    # maximum number of tokens held by the 'memory' rejected token cache
+    'FIREBASE_REJECTED_TOKEN_CACHE_MAX_SIZE':
+        os.getenv('FIREBASE_REJECTED_TOKEN_CACHE_MAX_SIZE', 10000),
+    # seconds a rejected token is remembered for
+    'FIREBASE_REJECTED_TOKEN_CACHE_TIMEOUT':
+        os.getenv('FIREBASE_REJECTED_TOKEN_CACHE_TIMEOUT', 300),
+    # cache firebase user records by uid, one of None, 'memory' (in-process
+    # LRU), 'django' (uses FIREBASE_USER_CACHE_ALIAS) or 'tiered' (an
+    # in-process LRU in front of the 'django' backend)
+    'FIREBASE_USER_CACHE_BACKEND':
+        os.getenv('FIREBASE_USER_CACHE_BACKEND', None),
+    # django cache alias used by the 'django' user cache backend
+    'FIREBASE_USER_CACHE_ALIAS':
+        os.getenv('FIREBASE_USER_CACHE_ALIAS', 'default'),
+    # maximum number of users held by the 'memory' user cache backend
+    'FIREBASE_USER_CACHE_MAX_SIZE':
+        os.getenv('FIREBASE_USER_CACHE_MAX_SIZE', 10000),
+    # seconds a cached firebase user record is considered fresh
+    'FIREBASE_USER_CACHE_TIMEOUT':
+        os.getenv('FIREBASE_USER_CACHE_TIMEOUT', 300),
+    # seconds a firebase user record is kept to serve while firebase is
+    # unavailable
+    'FIREBASE_USER_CACHE_STALE_TIMEOUT':
+        os.getenv('FIREBASE_USER_CACHE_STALE_TIMEOUT', 3600),
+    # build the firebase user from the verified token claims instead of
+    # fetching it from firebase on every request
+    'FIREBASE_AUTH_FROM_CLAIMS':
+        os.getenv('FIREBASE_AUTH_FROM_CLAIMS', False),
+    # return a LazyUser built from the token claims for users seen before,
+    # loading the local user from the database only when it is accessed
+    'FIREBASE_AUTH_LAZY_USER':
+        os.getenv('FIREBASE_AUTH_LAZY_USER', False),
+    # cache of local user pks and is_active by uid used by
+    # FIREBASE_AUTH_LAZY_USER, one of 'memory' (in-process LRU), 'django'
+    # (uses FIREBASE_LOCAL_USER_CACHE_ALIAS) or 'tiered' (an in-process LRU
+    # in front of the 'django' backend). evict_uid only reaches the 'memory'
+    # backend of the process calling it, use a shared backend when running
+    # several processes
+    'FIREBASE_LOCAL_USER_CACHE_BACKEND':
+        os.getenv('FIREBASE_LOCAL_USER_CACHE_BACKEND', 'memory'),
+    # django cache alias used by the 'django' local user cache backend
+    'FIREBASE_LOCAL_USER_CACHE_ALIAS':
+        os.getenv('FIREBASE_LOCAL_USER_CACHE_ALIAS', 'default'),
+    # maximum number of users held by the 'memory' local user cache backend
+    'FIREBASE_LOCAL_USER_CACHE_MAX_SIZE':
+        os.getenv('FIREBASE_LOCAL_USER_CACHE_MAX_SIZE', 10000),
+    # seconds before a user is checked against firebase and the database
+    # again, which is how long deactivating a user can take to apply
+    'FIREBASE_LOCAL_USER_CACHE_TIMEOUT':
+        os.getenv('FIREBASE_LOCAL_USER_CACHE_TIMEOUT', 300),
+    # seconds entries of 'tiered' caches are kept in process before being
+    # read from the shared cache again
+    'FIREBASE_CACHE_L1_TIMEOUT':
+        os.getenv('FIREBASE_CACHE_L1_TIMEOUT', 10),
+    # seconds between checks of 'tiered' caches for entries evicted by
+    # other processes
+    'FIREBASE_CACHE_INVALIDATION_INTERVAL':
+        os.getenv('FIREBASE_CACHE_INVALIDATION_INTERVAL', 1),
+    # fraction by which timeouts of shared cache entries are randomly
+    # shortened, so that entries cached together do not expire together
+    'FIREBASE_CACHE_TTL_JITTER':
+        os.getenv('FIREBASE_CACHE_TTL_JITTER', 0.1),
+    # key signing the session tokens of SessionTokenExchangeView, defaults
+    # to the django SECRET_KEY
+    'FIREBASE_SESSION_TOKEN_KEY':
+        os.getenv('FIREBASE_SESSION_TOKEN_KEY', None),
+    # seconds a session token is accepted by SessionTokenAuthentication
+    'FIREBASE_SESSION_TOKEN_TIMEOUT':
+        os.getenv('FIREBASE_SESSION_TOKEN_TIMEOUT', 900),
+    # Authorization header prefix of session tokens
+    'FIREBASE_SESSION_TOKEN_HEADER_PREFIX':
+        os.getenv('FIREBASE_SESSION_TOKEN_HEADER_PREFIX', 'Session'),
+    # class receiving per stage timings and cache hits, e.g.
+    # 'drf_firebase_auth.instrumentation.SignalHook' or
+    # 'drf_firebase_auth.instrumentation.PrometheusHook'
+    'FIREBASE_AUTH_METRICS_HOOK':
+        os.getenv('FIREBASE_AUTH_METRICS_HOOK', None),
+    # level of the per request log messages, e.g. 'DEBUG' or 'INFO'
+    'FIREBASE_AUTH_LOG_LEVEL':
+        os.getenv('FIREBASE_AUTH_LOG_LEVEL', 'DEBUG'),
+    # how much of the token claims and firebase user to log, one of 'none'
+    # (uid only), 'summary' (uid, provider, exp, email_verified) or 'full',
+    # emails are redacted unless 'full'
+    'FIREBASE_AUTH_LOG_CLAIMS':
+        os.getenv('FIREBASE_AUTH_LOG_CLAIMS', 'summary'),
     # function should accept firebase_admin.auth.UserRecord as argument
     # and return str
     'FIREBASE_USERNAME_MAPPING_FUNC': map_firebase_uid_to_username
@@ -38,6 +234,7 @@ DEFAULTS = {
 
 # List of settings that may be in string import notation.
 IMPORT_STRINGS = (
+    'FIREBASE_AUTH_METRICS_HOOK',
 )
 
 api_settings = APISettings(USER_SETTINGS, DEFAULTS, IMPORT_STRINGS)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Collapse concurrent calls for the same key, across threads of a process,
+into a single call whose result is shared
+"""
+from typing import Any, Callable, Hashable, Tuple
+import threading
+
+
+class _Call:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    The first thread to call do() for a key runs fn, threads calling do()
+    for the same key meanwhile wait for and share its result or exception
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(
+        self,
+        key: Hashable,
+        fn: Callable,
+        *args,
+        **kwargs
+    ) -> Tuple[Any, bool]:
+        """ Returns the result of fn and whether it was shared """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+Timeouts and connection pooling for the HTTP sessions used to reach
+Firebase and Google
+"""
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .settings import api_settings
+
+DEFAULT_TIMEOUT = 10
+
+
+def get_timeout(default: Optional[float] = DEFAULT_TIMEOUT) -> Optional[float]:
+    """ FIREBASE_HTTP_TIMEOUT in seconds, or default when unset """
+    timeout = api_settings.FIREBASE_HTTP_TIMEOUT
+    return float(timeout) if timeout else default
+
+
+def configure_session(session: requests.Session) -> requests.Session:
+    """
+    Size the connection pools of session to FIREBASE_HTTP_POOL_SIZE, so
+    that concurrent requests reuse connections rather than open new ones,
+    keeping the retry policy of each mounted adapter
+    """
+    pool_size = api_settings.FIREBASE_HTTP_POOL_SIZE
+    if pool_size:
+        for prefix, adapter in list(session.adapters.items()):
+            session.mount(prefix, HTTPAdapter(
+                pool_maxsize=int(pool_size),
+                max_retries=adapter.max_retries
+            ))
+    return session
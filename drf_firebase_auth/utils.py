@@ -1,5 +1,6 @@
 """ helper functions """
-from typing import Any
+from typing import Any, Dict, List
+import hashlib
 import uuid
 
 from firebase_admin import auth
@@ -16,6 +17,54 @@ def get_firebase_user_email(firebase_user: auth.UserRecord) -> str:
         raise Exception(e)
 
 
+def get_firebase_user_from_claims(decoded_token: Dict) -> auth.UserRecord:
+    """
+    Build a UserRecord from the claims of a verified ID token, for use in
+    place of a firebase_admin.auth.get_user lookup
+    """
+    try:
+        firebase_claims = decoded_token.get('firebase', {})
+        email = decoded_token.get('email')
+        provider_data = []
+        for provider_id, uids in firebase_claims.get('identities', {}).items():
+            if not uids:
+                continue
+            if provider_id == 'email':
+                # email identities are listed for most providers, the claims
+                # do not tell whether a password is linked, and deriving one
+                # from sign_in_provider would flip with each sign in method
+                continue
+            provider_data.append({
+                'providerId': provider_id,
+                'rawId': uids[0],
+                'email': email,
+            })
+        return auth.UserRecord({
+            'localId': decoded_token.get('uid', decoded_token.get('sub')),
+            'email': email,
+            'emailVerified': decoded_token.get('email_verified', False),
+            'displayName': decoded_token.get('name'),
+            'photoUrl': decoded_token.get('picture'),
+            'phoneNumber': decoded_token.get('phone_number'),
+            'providerUserInfo': provider_data,
+        })
+    except Exception as e:
+        raise Exception(e)
+
+
+def get_provider_fingerprint(
+    provider_data: List[auth.UserInfo]
+) -> str:
+    """ Hash identifying a set of providers, for cheap change detection """
+    try:
+        providers = sorted(f'{x.provider_id}:{x.uid}' for x in provider_data)
+        return hashlib.sha256(
+            '\n'.join(providers).encode('utf-8')
+        ).hexdigest()
+    except Exception as e:
+        raise Exception(e)
+
+
 def map_firebase_to_username_legacy(firebase_user: auth.UserRecord) -> str:
     try:
         username = '_'.join(
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Local verification of Firebase ID tokens against public keys parsed once
+from the certificate store
+"""
+from typing import Dict, Optional, Tuple
+import base64
+import json
+import threading
+import time
+
+from firebase_admin import auth as firebase_auth
+from google.auth import crypt
+
+from .certificates import (
+    ID_TOKEN_CERT_URI,
+    SESSION_COOKIE_CERT_URI,
+    CertificateStore,
+    get_certificate_store
+)
+
+ID_TOKEN_ISSUER_PREFIX = 'https://securetoken.google.com/'
+SESSION_COOKIE_ISSUER_PREFIX = 'https://session.firebase.google.com/'
+
+# reasons set on the rejections of this module that may not hold for long:
+# tokens used before their iat, and tokens signed with a key missing from
+# certificates that may be stale
+REASON_TOO_EARLY = 'too_early'
+REASON_UNKNOWN_KID = 'unknown_kid'
+TRANSIENT_REASONS = (REASON_TOO_EARLY, REASON_UNKNOWN_KID)
+
+_verifiers = {}
+_session_cookie_verifiers = {}
+_verifiers_lock = threading.Lock()
+
+
+class TokenVerifier:
+    """
+    Verifies RS256 Firebase tokens for one project. Certificates are parsed
+    into verifiers by kid only when the store hands out a new set, and the
+    expected claims are computed once up front.
+    """
+
+    def __init__(
+        self,
+        project_id: str,
+        store: Optional[CertificateStore] = None,
+        issuer_prefix: str = ID_TOKEN_ISSUER_PREFIX,
+        invalid_token_error=firebase_auth.InvalidIdTokenError,
+        expired_token_error=firebase_auth.ExpiredIdTokenError
+    ):
+        if not project_id:
+            raise ValueError('A project ID is required to verify tokens.')
+        self.project_id = project_id
+        self.issuer = issuer_prefix + project_id
+        self._store = store or get_certificate_store(ID_TOKEN_CERT_URI)
+        self._invalid_token_error = invalid_token_error
+        self._expired_token_error = expired_token_error
+        self._certificates = None
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def verify(self, token: str) -> Dict:
+        """ Returns the claims of token, raising if it is not valid """
+        signing_input, signature, claims, key = self._precheck(token)
+        if not key.verify(signing_input, signature):
+            raise self._invalid_token_error('Token has an invalid signature.')
+        claims['uid'] = claims['sub']
+        return claims
+
+    def precheck(self, token: str):
+        """
+        Raise if token is malformed, has the wrong algorithm, claims or
+        kid, without checking its signature
+        """
+        self._precheck(token)
+
+    def _precheck(self, token: str) -> Tuple:
+        """
+        Returns the signing input, signature, claims and key of token, every
+        check short of verifying the signature done
+        """
+        try:
+            signing_input, signature = token.encode('ascii').rsplit(b'.', 1)
+            header_segment, payload_segment = signing_input.split(b'.')
+            header = json.loads(_b64decode(header_segment))
+            claims = json.loads(_b64decode(payload_segment))
+            signature = _b64decode(signature)
+        except Exception:
+            raise self._invalid_token_error('Token is not a well formed JWT.')
+        if not isinstance(header, dict) or not isinstance(claims, dict):
+            raise self._invalid_token_error('Token is not a well formed JWT.')
+        if header.get('alg') != 'RS256':
+            raise self._invalid_token_error(
+                f'Token has incorrect algorithm "{header.get("alg")}".'
+            )
+        # claims first, they cost nothing while the key may need fetching
+        self._verify_claims(claims)
+        key = self._get_key(header.get('kid'))
+        if key is None:
+            raise self._reject(
+                'Token has an unknown "kid".',
+                REASON_UNKNOWN_KID
+            )
+        return signing_input, signature, claims, key
+
+    def _verify_claims(self, claims: Dict):
+        if claims.get('aud') != self.project_id:
+            raise self._invalid_token_error(
+                f'Token has incorrect "aud" claim "{claims.get("aud")}".'
+            )
+        if claims.get('iss') != self.issuer:
+            raise self._invalid_token_error(
+                f'Token has incorrect "iss" claim "{claims.get("iss")}".'
+            )
+        subject = claims.get('sub')
+        if not isinstance(subject, str) or not subject or len(subject) > 128:
+            raise self._invalid_token_error(
+                'Token has an invalid "sub" claim.'
+            )
+        now = time.time()
+        if not isinstance(claims.get('iat'), (int, float)):
+            raise self._invalid_token_error('Token has no "iat" claim.')
+        if claims['iat'] > now:
+            raise self._reject('Token used too early.', REASON_TOO_EARLY)
+        if not isinstance(claims.get('exp'), (int, float)):
+            raise self._invalid_token_error('Token has no "exp" claim.')
+        if claims['exp'] < now:
+            raise self._expired_token_error('Token expired.', None)
+
+    def _reject(self, message: str, reason: str) -> Exception:
+        """ The invalid token error for message, marked with reason """
+        error = self._invalid_token_error(message)
+        error.reason = reason
+        return error
+
+    def _get_key(self, kid: Optional[str]) -> Optional[crypt.RSAVerifier]:
+        certificates = self._store.get_certificates()
+        if certificates is not self._certificates:
+            with self._lock:
+                if certificates is not self._certificates:
+                    self._keys = {
+                        key_id: crypt.RSAVerifier.from_string(certificate)
+                        for key_id, certificate in certificates.items()
+                    }
+                    self._certificates = certificates
+        return self._keys.get(kid)
+
+
+def get_token_verifier(project_id: str) -> TokenVerifier:
+    """ Returns the shared verifier for project_id """
+    verifier = _verifiers.get(project_id)
+    if verifier is None:
+        with _verifiers_lock:
+            verifier = _verifiers.get(project_id)
+            if verifier is None:
+                verifier = TokenVerifier(project_id)
+                _verifiers[project_id] = verifier
+    return verifier
+
+
+def get_session_cookie_verifier(project_id: str) -> TokenVerifier:
+    """ Returns the shared session cookie verifier for project_id """
+    verifier = _session_cookie_verifiers.get(project_id)
+    if verifier is None:
+        with _verifiers_lock:
+            verifier = _session_cookie_verifiers.get(project_id)
+            if verifier is None:
+                verifier = TokenVerifier(
+                    project_id,
+                    store=get_certificate_store(SESSION_COOKIE_CERT_URI),
+                    issuer_prefix=SESSION_COOKIE_ISSUER_PREFIX,
+                    invalid_token_error=(
+                        firebase_auth.InvalidSessionCookieError
+                    ),
+                    expired_token_error=(
+                        firebase_auth.ExpiredSessionCookieError
+                    )
+                )
+                _session_cookie_verifiers[project_id] = verifier
+    return verifier
+
+
+def is_transient_rejection(error: Exception) -> bool:
+    """ Whether the token rejected with error may be accepted later """
+    if isinstance(error, (
+        firebase_auth.ExpiredIdTokenError,
+        firebase_auth.ExpiredSessionCookieError
+    )):
+        return False
+    reason = getattr(error, 'reason', None)
+    if reason is not None:
+        return reason in TRANSIENT_REASONS
+    # firebase_admin raises its own header and claim checks without a
+    # cause, and passes on those of google-auth as the cause, which cannot
+    # tell a bad signature from a token used too early or a key id missing
+    # from stale certificates
+    return getattr(error, 'cause', None) is not None
+
+
+def peek_claims(token: str) -> Dict:
+    """
+    Returns the claims of token without verifying them, for routing it to
+    the verifier that will
+    """
+    try:
+        claims = json.loads(_b64decode(token.encode('ascii').split(b'.')[1]))
+    except Exception:
+        raise firebase_auth.InvalidIdTokenError(
+            'Token is not a well formed JWT.'
+        )
+    if not isinstance(claims, dict):
+        raise firebase_auth.InvalidIdTokenError(
+            'Token is not a well formed JWT.'
+        )
+    return claims
+
+
+def _b64decode(segment: bytes) -> bytes:
+    return base64.urlsafe_b64decode(segment + b'=' * (-len(segment) % 4))
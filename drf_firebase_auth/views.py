@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+""" Views for exchanging Firebase ID tokens for local session tokens """
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .authentication import FirebaseAuthentication
+from .session_token import create_session_token
+from .settings import api_settings
+
+
+class SessionTokenExchangeView(APIView):
+    """
+    Authenticates a Firebase ID token through FirebaseAuthentication and
+    returns a session token for use with SessionTokenAuthentication
+    """
+    authentication_classes = [FirebaseAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, format=None):
+        return Response({
+            'token': create_session_token(
+                request.user,
+                request.auth['uid']
+            ),
+            'expires_in': int(api_settings.FIREBASE_SESSION_TOKEN_TIMEOUT)
+        })
@@ -0,0 +1,234 @@
+""" Local stand-in for Firebase, for tests and benchmarks run offline """
+from contextlib import ExitStack, contextmanager
+from unittest import mock
+import base64
+import datetime
+import json
+import time
+import uuid
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.x509.oid import NameOID
+
+from firebase_admin import auth as firebase_auth
+
+from drf_firebase_auth import certificates, verifier
+from drf_firebase_auth.certificates import (
+    CertificateResponse,
+    CertificateStore
+)
+
+
+class LocalFirebase:
+    """
+    Mints RS256 ID tokens signed with a local key, and answers certificate
+    and user lookup requests for the users it has minted tokens for
+    """
+
+    def __init__(self, project_id: str, kid: str = 'local-key'):
+        self.project_id = project_id
+        self.kid = kid
+        # user records by uid, as returned by accounts:lookup
+        self.users = {}
+        self.valid_since = int(time.time()) - 60
+        self._key = rsa.generate_private_key(
+            public_exponent=65537,
+            key_size=2048
+        )
+        name = x509.Name([
+            x509.NameAttribute(NameOID.COMMON_NAME, 'securetoken')
+        ])
+        now = datetime.datetime.utcnow()
+        certificate = (
+            x509.CertificateBuilder()
+            .subject_name(name)
+            .issuer_name(name)
+            .public_key(self._key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now)
+            .not_valid_after(now + datetime.timedelta(days=1))
+            .sign(self._key, hashes.SHA256())
+        )
+        self.certificates = {
+            kid: certificate.public_bytes(
+                serialization.Encoding.PEM
+            ).decode('utf-8')
+        }
+
+    def certificate_store(self) -> CertificateStore:
+        """ A CertificateStore serving this instance's certificates """
+        return CertificateStore(session=LocalCertificateSession(self))
+
+    @contextmanager
+    def patch(self, app, latency: float = 0):
+        """
+        Serve certificates and user lookups for app from this instance
+        rather than Google, adding latency seconds to each user lookup
+        """
+        # pylint: disable=protected-access
+        client = firebase_auth._get_client(app)
+        with ExitStack() as stack:
+            stack.enter_context(mock.patch.object(
+                client._user_manager.http_client,
+                '_session',
+                LocalUserSession(self, latency)
+            ))
+            stack.enter_context(mock.patch.object(
+                client._token_verifier,
+                'request',
+                lambda url, method='GET', **kwargs:
+                CertificateResponse(self.certificates)
+            ))
+            stack.enter_context(mock.patch.dict(
+                certificates._stores,
+                {certificates.ID_TOKEN_CERT_URI: self.certificate_store()}
+            ))
+            stack.enter_context(mock.patch.dict(
+                verifier._verifiers,
+                clear=True
+            ))
+            yield self
+
+    def user_record(self, uid: str, **fields) -> dict:
+        """ Returns the accounts:lookup record for uid """
+        return {
+            'localId': uid,
+            'email': f'{uid}@example.com',
+            'emailVerified': True,
+            'providerUserInfo': [{
+                'providerId': 'password',
+                'rawId': f'{uid}@example.com',
+                'email': f'{uid}@example.com'
+            }],
+            'validSince': str(self.valid_since),
+            **fields
+        }
+
+    def claims(self, uid: str = None, **claims) -> dict:
+        now = int(time.time())
+        uid = uid or str(uuid.uuid4())
+        return {
+            'iss': f'https://securetoken.google.com/{self.project_id}',
+            'aud': self.project_id,
+            'auth_time': now,
+            'user_id': uid,
+            'sub': uid,
+            'iat': now,
+            'exp': now + 3600,
+            'email': f'{uid}@example.com',
+            'email_verified': True,
+            'firebase': {
+                'identities': {'email': [f'{uid}@example.com']},
+                'sign_in_provider': 'password'
+            },
+            **claims
+        }
+
+    def mint_token(self, uid: str = None, header: dict = None, **claims):
+        """ Returns a signed ID token for uid, a new user if None """
+        uid = uid or str(uuid.uuid4())
+        if uid not in self.users:
+            self.users[uid] = self.user_record(uid)
+        header = {
+            'alg': 'RS256',
+            'kid': self.kid,
+            'typ': 'JWT',
+            **(header or {})
+        }
+        signing_input = b'.'.join([
+            _b64encode(json.dumps(header).encode('utf-8')),
+            _b64encode(json.dumps(self.claims(uid, **claims)).encode('utf-8'))
+        ])
+        signature = self._key.sign(
+            signing_input,
+            padding.PKCS1v15(),
+            hashes.SHA256()
+        )
+        return b'.'.join([signing_input, _b64encode(signature)]).decode()
+
+
+class LocalCertificateSession:
+    """ Stands in for the requests.Session used by CertificateStore """
+
+    def __init__(self, local_firebase: LocalFirebase):
+        self._local_firebase = local_firebase
+
+    def get(self, url, timeout=None):
+        return LocalCertificateResponse(self._local_firebase.certificates)
+
+
+class LocalUserSession:
+    """
+    Stands in for the requests.Session used by firebase_admin to call
+    identitytoolkit, answering accounts:lookup from LocalFirebase.users
+    """
+
+    def __init__(self, local_firebase: LocalFirebase, latency: float = 0):
+        self._local_firebase = local_firebase
+        self._latency = latency
+
+    def request(self, method, url, json=None, params=None, **kwargs):
+        if self._latency:
+            time.sleep(self._latency)
+        if url.endswith('/accounts:lookup'):
+            return self._lookup(json or {})
+        if url.endswith('/accounts:batchGet'):
+            return self._batch_get(params or {})
+        raise NotImplementedError(f'{method} {url}')
+
+    def _lookup(self, payload):
+        users = [
+            self._local_firebase.users[uid]
+            for uid in payload.get('localId', [])
+            if uid in self._local_firebase.users
+        ]
+        return LocalUserResponse({'users': users} if users else {})
+
+    def _batch_get(self, params):
+        # pages are ordered by uid, the page token being the last uid
+        uids = sorted(
+            uid for uid in self._local_firebase.users
+            if uid > params.get('nextPageToken', '')
+        )
+        page = uids[:params['maxResults']]
+        body = {'users': [self._local_firebase.users[uid] for uid in page]}
+        if len(uids) > len(page):
+            body['nextPageToken'] = page[-1]
+        return LocalUserResponse(body)
+
+    def close(self):
+        pass
+
+
+class LocalUserResponse:
+    status_code = 200
+    ok = True
+    headers = {'Content-Type': 'application/json'}
+
+    def __init__(self, body):
+        self._body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._body
+
+
+class LocalCertificateResponse:
+    headers = {'Cache-Control': 'public, max-age=21600'}
+
+    def __init__(self, certificates):
+        self._certificates = certificates
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._certificates
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
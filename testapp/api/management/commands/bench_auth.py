@@ -0,0 +1,212 @@
+""" Benchmark FirebaseAuthentication end to end against a local Firebase """
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import math
+import os
+import tempfile
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment
+)
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from drf_firebase_auth.app import get_firebase_app
+from drf_firebase_auth.cache import (
+    clear_caches,
+    evict_uid,
+    hash_token,
+    token_cache
+)
+from drf_firebase_auth.instrumentation import QueryCounter
+from drf_firebase_auth.settings import api_settings
+
+from ...local_firebase import LocalFirebase
+
+SCENARIOS = ('cold', 'warm', 'new_user')
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive FirebaseAuthentication through the DRF test client, offline, '
+        'and report throughput, latency and queries per request. cold sends '
+        'a token per existing user with empty caches, warm repeats one '
+        'token per worker and new_user provisions a local user per request. '
+        'Runs against a throwaway test database, and exits with an error '
+        'if any request fails. With sqlite, --concurrency above 1 requires '
+        'Django 5.1 or later, for transactions that wait for the write lock.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=1)
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=0,
+            help='milliseconds added to each firebase user lookup',
+        )
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=SCENARIOS,
+            help='scenario to run, may be repeated, defaults to all',
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be >= 1')
+        tempdir = tempfile.TemporaryDirectory()
+        if connection.vendor == 'sqlite':
+            self._configure_sqlite(tempdir.name, options['concurrency'])
+        self._failures = 0
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            app = get_firebase_app()
+            local_firebase = LocalFirebase(app.project_id)
+            with local_firebase.patch(app, options['latency'] / 1000):
+                self.stdout.write(
+                    f'{"scenario":<10}{"requests":>10}{"errors":>8}'
+                    f'{"req/s":>10}{"p50 ms":>10}{"p99 ms":>10}'
+                    f'{"queries":>10}'
+                )
+                for scenario in options['scenario'] or SCENARIOS:
+                    tokens = getattr(self, f'_prepare_{scenario}')(
+                        local_firebase,
+                        options['requests'],
+                        options['concurrency']
+                    )
+                    self._report(
+                        scenario,
+                        *self._run(tokens, options['concurrency'])
+                    )
+            if self._failures:
+                raise CommandError(
+                    f'{self._failures} requests failed, the results are not '
+                    'comparable'
+                )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+            tempdir.cleanup()
+
+    def _configure_sqlite(self, tempdir, concurrency):
+        """
+        Use a database file with writers that wait for each other, rather
+        than failing with "database is locked"
+        """
+        settings_dict = connection.settings_dict
+        # concurrent writes to the shared in-memory test database fail
+        # with "table is locked" rather than waiting for the lock
+        settings_dict['TEST']['NAME'] = os.path.join(
+            tempdir,
+            'bench_auth.sqlite3'
+        )
+        if concurrency == 1:
+            return
+        if django.VERSION < (5, 1):
+            raise CommandError(
+                'sqlite needs Django 5.1 or later for --concurrency above 1'
+            )
+        settings_dict['OPTIONS'] = {
+            **settings_dict.get('OPTIONS', {}),
+            'timeout': 60,
+            # take the write lock when a transaction starts, a deferred
+            # transaction reading before it writes fails at once instead
+            # of waiting for it
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': 'PRAGMA journal_mode=WAL;',
+        }
+
+    def _prepare_cold(self, local_firebase, requests, concurrency):
+        tokens = [local_firebase.mint_token() for _ in range(requests)]
+        self._run(tokens, concurrency)
+        self._clear(local_firebase, tokens)
+        return tokens
+
+    def _prepare_warm(self, local_firebase, requests, concurrency):
+        tokens = [local_firebase.mint_token() for _ in range(concurrency)]
+        self._clear(local_firebase, tokens)
+        self._run(tokens, concurrency)
+        return [tokens[i % concurrency] for i in range(requests)]
+
+    def _prepare_new_user(self, local_firebase, requests, concurrency):
+        return [local_firebase.mint_token() for _ in range(requests)]
+
+    def _clear(self, local_firebase, tokens):
+        clear_caches()
+        # entries in django cache backends outlive clear_caches
+        for uid in local_firebase.users:
+            evict_uid(uid)
+        cache = token_cache()
+        if cache is not None:
+            for token in tokens:
+                cache.delete(hash_token(token))
+
+    def _run(self, tokens, concurrency):
+        """
+        Returns wall time, latencies of successful requests, queries and
+        errors, counting failures of warm up runs too
+        """
+        chunks = [tokens[i::concurrency] for i in range(concurrency)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(self._worker, chunks))
+        elapsed = time.perf_counter() - start
+        latencies = [x for result in results for x in result[0]]
+        queries = sum(result[1] for result in results)
+        errors = sum((result[2] for result in results), Counter())
+        self._failures += sum(errors.values())
+        return elapsed, latencies, queries, errors
+
+    def _worker(self, tokens):
+        client = APIClient()
+        url = reverse('whoami')
+        prefix = api_settings.FIREBASE_AUTH_HEADER_PREFIX
+        counter = QueryCounter()
+        latencies = []
+        errors = Counter()
+        try:
+            with connection.execute_wrapper(counter):
+                for token in tokens:
+                    start = time.perf_counter()
+                    response = client.get(
+                        url,
+                        HTTP_AUTHORIZATION=f'{prefix} {token}'
+                    )
+                    if response.status_code == 200:
+                        latencies.append(time.perf_counter() - start)
+                    else:
+                        errors[response.data.get('detail')] += 1
+        finally:
+            connection.close()
+        return latencies, counter.count, errors
+
+    def _report(self, scenario, elapsed, latencies, queries, errors):
+        """ Rates and latencies are of successful requests only """
+        latencies = sorted(latencies)
+        failed = sum(errors.values())
+        requests = len(latencies) + failed
+        self.stdout.write(
+            f'{scenario:<10}{requests:>10}{failed:>8}'
+            f'{len(latencies) / elapsed:>10.0f}'
+            f'{_percentile(latencies, 0.5) * 1000:>10.2f}'
+            f'{_percentile(latencies, 0.99) * 1000:>10.2f}'
+            f'{queries / requests:>10.1f}'
+        )
+        for detail, count in errors.most_common():
+            self.stderr.write(f'  {count} x {detail}')
+
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return math.nan
+    return values[int(round(q * (len(values) - 1)))]
@@ -0,0 +1,69 @@
+""" Compare local token verification with firebase_admin.verify_id_token """
+import time
+
+import firebase_admin
+from django.core.management.base import BaseCommand
+from firebase_admin import auth as firebase_auth
+
+from drf_firebase_auth.app import get_firebase_app
+from drf_firebase_auth.certificates import CertificateResponse
+from drf_firebase_auth.verifier import TokenVerifier
+
+from ...local_firebase import LocalFirebase
+
+
+class Command(BaseCommand):
+    help = (
+        'Report single core verifications per second for '
+        'drf_firebase_auth.verifier and firebase_admin, offline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=3)
+
+    def handle(self, *args, **options):
+        firebase = get_firebase_app()
+        local_firebase = LocalFirebase(firebase.project_id)
+        token = local_firebase.mint_token()
+
+        # a separate app, so the default app's verifier is left untouched
+        app = firebase_admin.initialize_app(
+            credential=firebase.credential,
+            name='bench_verify'
+        )
+        try:
+            # pylint: disable=protected-access
+            firebase_auth._get_client(app)._token_verifier.request = (
+                lambda url, method='GET', **kwargs:
+                CertificateResponse(local_firebase.certificates)
+            )
+            verifier = TokenVerifier(
+                firebase.project_id,
+                store=local_firebase.certificate_store()
+            )
+            results = [
+                ('firebase_admin.auth.verify_id_token', self._run(
+                    lambda: firebase_auth.verify_id_token(token, app=app),
+                    options['seconds']
+                )),
+                ('drf_firebase_auth.verifier.TokenVerifier', self._run(
+                    lambda: verifier.verify(token),
+                    options['seconds']
+                )),
+            ]
+        finally:
+            firebase_admin.delete_app(app)
+
+        for name, rate in results:
+            self.stdout.write(f'{name:<44}{rate:>10.0f} verifications/s')
+        self.stdout.write(f'speedup: {results[1][1] / results[0][1]:.2f}x')
+
+    def _run(self, verify, seconds: float) -> float:
+        verify()
+        count = 0
+        start = time.perf_counter()
+        deadline = start + seconds
+        while time.perf_counter() < deadline:
+            verify()
+            count += 1
+        return count / (time.perf_counter() - start)
@@ -0,0 +1,32 @@
+from unittest import mock
+
+import firebase_admin
+from django.test import SimpleTestCase
+
+from drf_firebase_auth import app as app_module
+from drf_firebase_auth.app import get_firebase_app
+from drf_firebase_auth.settings import api_settings
+
+
+class FirebaseAppTests(SimpleTestCase):
+
+    def test_app_initialized_once(self):
+        """ ensure the app is initialized on first use and then reused """
+        self.assertIs(get_firebase_app(), get_firebase_app())
+        self.assertIs(get_firebase_app(), firebase_admin.get_app())
+
+    def test_named_app(self):
+        """ ensure FIREBASE_APP_NAME reuses an initialized app """
+        app = firebase_admin.initialize_app(
+            credential=firebase_admin.credentials.Certificate(
+                api_settings.FIREBASE_SERVICE_ACCOUNT_KEY
+            ),
+            name='test_named_app'
+        )
+        self.addCleanup(firebase_admin.delete_app, app)
+        self.addCleanup(app_module._apps.pop, 'test_named_app', None)
+        with mock.patch(
+            'drf_firebase_auth.app.api_settings.FIREBASE_APP_NAME',
+            new='test_named_app'
+        ):
+            self.assertIs(get_firebase_app(), app)
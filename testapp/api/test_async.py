@@ -0,0 +1,56 @@
+import asyncio
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import TestCase
+from firebase_admin import auth as firebase_auth
+
+from drf_firebase_auth.authentication import AsyncFirebaseAuthentication
+from drf_firebase_auth.cache import clear_caches
+
+
+def slow_verify_id_token(token, **kwargs):
+    time.sleep(0.05)
+    return {'uid': 'abc', 'exp': int(time.time()) + 3600}
+
+
+class AsyncAuthenticationTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        MOCK_FIREBASE_CHECK_JWT_REVOKED = mock.patch(
+            'drf_firebase_auth.authentication.api_settings'
+            '.FIREBASE_CHECK_JWT_REVOKED',
+            new=False
+        )
+        MOCK_FIREBASE_CHECK_JWT_REVOKED.start()
+        self.addCleanup(MOCK_FIREBASE_CHECK_JWT_REVOKED.stop)
+        self._MOCK_VERIFY_ID_TOKEN = mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth.verify_id_token',
+            side_effect=slow_verify_id_token
+        )
+        self._MOCK_GET_USER = mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth.get_user',
+            return_value=firebase_auth.UserRecord({
+                'localId': 'abc',
+                'email': 'user@example.com'
+            })
+        )
+
+    def test_concurrent_authentication(self):
+        """ ensure concurrent requests share verification and lookup """
+        async def authenticate_concurrently():
+            auth = AsyncFirebaseAuthentication()
+            return await asyncio.gather(
+                auth.authenticate_credentials('token'),
+                auth.authenticate_credentials('token')
+            )
+
+        with self._MOCK_VERIFY_ID_TOKEN as verify_id_token:
+            with self._MOCK_GET_USER as get_user:
+                first, second = async_to_sync(authenticate_concurrently)()
+                self.assertEqual(verify_id_token.call_count, 1)
+                self.assertEqual(get_user.call_count, 1)
+        self.assertEqual(first[0].pk, second[0].pk)
+        self.assertEqual(first[1]['uid'], 'abc')
@@ -0,0 +1,212 @@
+import time
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+from firebase_admin import auth as firebase_auth
+from firebase_admin import exceptions as firebase_exceptions
+
+from drf_firebase_auth.authentication import FirebaseAuthentication
+from drf_firebase_auth.breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    reset_breakers
+)
+from drf_firebase_auth.cache import clear_caches
+from drf_firebase_auth.certificates import CertificateStore
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def setUp(self):
+        reset_breakers()
+        self.addCleanup(reset_breakers)
+        for name, value in [('THRESHOLD', 2), ('RESET_TIMEOUT', 30)]:
+            patcher = mock.patch(
+                'drf_firebase_auth.breaker.api_settings'
+                f'.FIREBASE_CIRCUIT_BREAKER_{name}',
+                new=value
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self._unavailable = mock.Mock(
+            side_effect=requests.exceptions.ConnectTimeout
+        )
+
+    def test_opens_and_closes(self):
+        """ ensure the breaker fails fast once open and closes on success """
+        breaker = CircuitBreaker('test')
+        for _ in range(2):
+            with self.assertRaises(requests.exceptions.ConnectTimeout):
+                breaker.call(self._unavailable)
+        with self.assertRaises(CircuitOpenError):
+            breaker.call(self._unavailable)
+        self.assertEqual(self._unavailable.call_count, 2)
+
+        with mock.patch('time.monotonic', return_value=time.monotonic() + 31):
+            self.assertEqual(breaker.call(lambda: 'ok'), 'ok')
+        self.assertFalse(breaker.is_open)
+
+    def test_interrupted_trial(self):
+        """ ensure a trial call ended by a BaseException allows another """
+        breaker = CircuitBreaker('test')
+        for _ in range(2):
+            with self.assertRaises(requests.exceptions.ConnectTimeout):
+                breaker.call(self._unavailable)
+        with mock.patch('time.monotonic', return_value=time.monotonic() + 31):
+            with self.assertRaises(KeyboardInterrupt):
+                breaker.call(mock.Mock(side_effect=KeyboardInterrupt))
+            self.assertEqual(breaker.call(lambda: 'ok'), 'ok')
+        self.assertFalse(breaker.is_open)
+
+    def test_answered_calls_not_failures(self):
+        """ ensure errors answered by firebase do not open the breaker """
+        breaker = CircuitBreaker('test')
+        for error in (
+            firebase_auth.UserNotFoundError('not found'),
+            firebase_exceptions.InternalError('internal error'),
+        ):
+            answered = mock.Mock(side_effect=error)
+            for _ in range(3):
+                with self.assertRaises(type(error)):
+                    breaker.call(answered)
+        self.assertFalse(breaker.is_open)
+
+    def test_stale_certificates_while_open(self):
+        """ ensure the store serves stale certificates without fetching """
+        response = mock.Mock(
+            headers={'Cache-Control': 'public, max-age=600'},
+            json=mock.Mock(return_value={'kid': 'certificate'})
+        )
+        session = mock.Mock(get=mock.Mock(return_value=response))
+        store = CertificateStore(session=session)
+        self.addCleanup(store.cancel)
+        store.get_certificates()
+        session.get.side_effect = requests.exceptions.ConnectionError
+        now = time.time()
+        for i in range(4):
+            # past the retry interval of the previous failed refresh
+            with mock.patch('time.time', return_value=now + 601 + 31 * i):
+                self.assertEqual(
+                    store.get_certificates(),
+                    {'kid': 'certificate'}
+                )
+        # the third and fourth refreshes failed fast
+        self.assertEqual(session.get.call_count, 3)
+
+    def test_fallback_to_claims(self):
+        """ ensure the user is built from claims while firebase is down """
+        clear_caches()
+        decoded_token = {
+            'uid': 'abc',
+            'email': 'user@example.com',
+            'email_verified': True,
+            'firebase': {'sign_in_provider': 'password'}
+        }
+        with mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth.get_user',
+            side_effect=firebase_exceptions.UnavailableError('down')
+        ) as get_user:
+            with self.assertRaises(Exception):
+                FirebaseAuthentication()._authenticate_token(decoded_token)
+            with mock.patch(
+                'drf_firebase_auth.authentication.api_settings'
+                '.FIREBASE_CIRCUIT_BREAKER_FALLBACK_TO_CLAIMS',
+                new=True
+            ):
+                firebase_user = FirebaseAuthentication()._authenticate_token(
+                    decoded_token
+                )
+                self.assertEqual(firebase_user.email, 'user@example.com')
+                # open now, so firebase is no longer called
+                FirebaseAuthentication()._authenticate_token(decoded_token)
+            self.assertEqual(get_user.call_count, 2)
+
+    def test_stale_user_while_open(self):
+        """ ensure the last known user is served once its entry expires """
+        clear_caches()
+        decoded_token = {'uid': 'abc'}
+        firebase_user = firebase_auth.UserRecord({
+            'localId': 'abc',
+            'email': 'cached@example.com'
+        })
+        with mock.patch(
+            'drf_firebase_auth.authentication.api_settings'
+            '.FIREBASE_USER_CACHE_BACKEND',
+            new='memory'
+        ):
+            with mock.patch(
+                'drf_firebase_auth.authentication.firebase_auth.get_user',
+                return_value=firebase_user
+            ):
+                FirebaseAuthentication()._authenticate_token(decoded_token)
+            with mock.patch(
+                'drf_firebase_auth.authentication.firebase_auth.get_user',
+                side_effect=firebase_exceptions.UnavailableError('down')
+            ) as get_user, mock.patch(
+                'time.time',
+                return_value=time.time() + 301
+            ):
+                for _ in range(3):
+                    self.assertEqual(
+                        FirebaseAuthentication()._authenticate_token(
+                            decoded_token
+                        ).email,
+                        'cached@example.com'
+                    )
+                # a user never fetched has no last known record to serve
+                with self.assertRaises(Exception):
+                    FirebaseAuthentication()._authenticate_token(
+                        {'uid': 'def'}
+                    )
+            # open after two failures, so firebase is no longer called
+            self.assertEqual(get_user.call_count, 2)
+
+    def test_revocation_while_open(self):
+        """ ensure revocation is checked against the last known time """
+        clear_caches()
+        now = int(time.time())
+        decoded_token = {'uid': 'abc', 'auth_time': now - 60}
+        firebase_user = firebase_auth.UserRecord({
+            'localId': 'abc',
+            'validSince': str(now - 120)
+        })
+        auth = FirebaseAuthentication()
+        with mock.patch(
+            'drf_firebase_auth.authentication.api_settings'
+            '.FIREBASE_REVOCATION_CACHE_BACKEND',
+            new='memory'
+        ), mock.patch(
+            'drf_firebase_auth.authentication.api_settings'
+            '.FIREBASE_CHECK_JWT_REVOKED',
+            new=True
+        ):
+            with mock.patch(
+                'drf_firebase_auth.authentication.firebase_auth.get_user',
+                return_value=firebase_user
+            ):
+                auth._check_token_revoked(decoded_token)
+            with mock.patch(
+                'drf_firebase_auth.authentication.firebase_auth.get_user',
+                side_effect=firebase_exceptions.UnavailableError('down')
+            ) as get_user, mock.patch(
+                'time.time',
+                return_value=time.time() + 61
+            ):
+                for _ in range(3):
+                    auth._check_token_revoked(decoded_token)
+                with self.assertRaises(firebase_auth.RevokedIdTokenError):
+                    auth._check_token_revoked(
+                        {'uid': 'abc', 'auth_time': now - 180}
+                    )
+                # a user never fetched has no last known time to check
+                with self.assertRaises(firebase_exceptions.UnavailableError):
+                    auth._check_token_revoked({'uid': 'def', 'iat': now})
+                with mock.patch(
+                    'drf_firebase_auth.authentication.api_settings'
+                    '.FIREBASE_CIRCUIT_BREAKER_FALLBACK_TO_CLAIMS',
+                    new=True
+                ):
+                    auth._check_token_revoked({'uid': 'def', 'iat': now})
+            # open after two failures, so firebase is no longer called
+            self.assertEqual(get_user.call_count, 2)
@@ -0,0 +1,118 @@
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+from firebase_admin import auth as firebase_auth
+
+from drf_firebase_auth.authentication import FirebaseAuthentication
+from drf_firebase_auth.cache import MemoryCache, clear_caches
+
+
+class MemoryCacheTests(SimpleTestCase):
+
+    def test_lru_eviction(self):
+        """ ensure the least recently used entry is evicted first """
+        cache = MemoryCache(max_size=2)
+        cache.set('a', 1, 60)
+        cache.set('b', 2, 60)
+        cache.get('a')
+        cache.set('c', 3, 60)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_expiry(self):
+        """ ensure entries are not returned past their timeout """
+        cache = MemoryCache()
+        cache.set('a', 1, 60)
+        cache.set('b', 2, 0)
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.assertIsNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+
+
+class TokenCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        clear_caches()
+        MOCK_FIREBASE_CHECK_JWT_REVOKED = mock.patch(
+            'drf_firebase_auth.authentication.api_settings'
+            '.FIREBASE_CHECK_JWT_REVOKED',
+            new=False
+        )
+        MOCK_FIREBASE_CHECK_JWT_REVOKED.start()
+        self.addCleanup(MOCK_FIREBASE_CHECK_JWT_REVOKED.stop)
+        self._decoded_token = {
+            'uid': 'abc',
+            'exp': int(time.time()) + 3600
+        }
+        self._MOCK_VERIFY_ID_TOKEN = mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth.verify_id_token',
+            return_value=self._decoded_token
+        )
+        self._MOCK_TOKEN_CACHE_MEMORY = mock.patch(
+            'drf_firebase_auth.authentication.api_settings'
+            '.FIREBASE_TOKEN_CACHE_BACKEND',
+            new='memory'
+        )
+
+    def test_token_cache_disabled(self):
+        """ ensure every call verifies when no backend is set """
+        with self._MOCK_VERIFY_ID_TOKEN as verify_id_token:
+            FirebaseAuthentication()._decode_token('token')
+            FirebaseAuthentication()._decode_token('token')
+            self.assertEqual(verify_id_token.call_count, 2)
+
+    def test_token_cache_hit(self):
+        """ ensure a repeated token is only verified once """
+        with self._MOCK_TOKEN_CACHE_MEMORY:
+            with self._MOCK_VERIFY_ID_TOKEN as verify_id_token:
+                first = FirebaseAuthentication()._decode_token('token')
+                second = FirebaseAuthentication()._decode_token('token')
+                FirebaseAuthentication()._decode_token('other')
+                self.assertEqual(first, second)
+                self.assertEqual(verify_id_token.call_count, 2)
+
+    def test_token_cache_isolated(self):
+        """ ensure changes to returned claims never reach the cache """
+        with self._MOCK_TOKEN_CACHE_MEMORY:
+            with self._MOCK_VERIFY_ID_TOKEN:
+                first = FirebaseAuthentication()._decode_token('token')
+                first['uid'] = 'changed'
+                second = FirebaseAuthentication()._decode_token('token')
+                second['exp'] = 0
+                third = FirebaseAuthentication()._decode_token('token')
+        self.assertEqual(third['uid'], 'abc')
+        self.assertNotEqual(third['exp'], 0)
+
+    def test_token_cache_expired_token(self):
+        """ ensure tokens past their exp claim are not cached """
+        self._decoded_token['exp'] = int(time.time()) - 1
+        with self._MOCK_TOKEN_CACHE_MEMORY:
+            with self._MOCK_VERIFY_ID_TOKEN as verify_id_token:
+                FirebaseAuthentication()._decode_token('token')
+                FirebaseAuthentication()._decode_token('token')
+                self.assertEqual(verify_id_token.call_count, 2)
+
+    def test_token_cache_revoked_token(self):
+        """ ensure a cached token is refused once its user is revoked """
+        now = int(time.time())
+        self._decoded_token['auth_time'] = now - 60
+        firebase_user = firebase_auth.UserRecord({
+            'localId': 'abc',
+            'validSince': str(now - 120)
+        })
+        with self._MOCK_TOKEN_CACHE_MEMORY, mock.patch(
+            'drf_firebase_auth.authentication.api_settings'
+            '.FIREBASE_CHECK_JWT_REVOKED',
+            new=True
+        ), mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth.get_user',
+            return_value=firebase_user
+        ):
+            with self._MOCK_VERIFY_ID_TOKEN as verify_id_token:
+                FirebaseAuthentication()._decode_token('token')
+                firebase_user._data['validSince'] = str(now)
+                with self.assertRaisesMessage(Exception, 'revoked'):
+                    FirebaseAuthentication()._decode_token('token')
+                verify_id_token.assert_called_once()
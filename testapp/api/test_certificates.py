@@ -0,0 +1,81 @@
+import json
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from drf_firebase_auth import certificates
+from drf_firebase_auth.certificates import (
+    CertificateRequest,
+    CertificateStore,
+    get_certificate_store
+)
+
+
+class CertificateStoreTests(SimpleTestCase):
+
+    def setUp(self):
+        self._response = mock.Mock(
+            headers={'Cache-Control': 'public, max-age=600'},
+            json=mock.Mock(return_value={'kid': 'certificate'})
+        )
+        self._session = mock.Mock(get=mock.Mock(return_value=self._response))
+        self._store = CertificateStore(session=self._session)
+
+    def tearDown(self):
+        self._store.cancel()
+
+    def test_certificates_cached_until_max_age(self):
+        """ ensure certificates are fetched once per max-age """
+        self.assertEqual(
+            self._store.get_certificates(),
+            {'kid': 'certificate'}
+        )
+        self._store.get_certificates()
+        self.assertEqual(self._session.get.call_count, 1)
+        self.assertTrue(self._store._is_scheduled())
+
+        with mock.patch('time.time', return_value=time.time() + 601):
+            self._store.get_certificates()
+        self.assertEqual(self._session.get.call_count, 2)
+
+    def test_stale_certificates_on_failure(self):
+        """ ensure the last good certificates are served when fetch fails """
+        self._store.get_certificates()
+        self._session.get.side_effect = Exception('unavailable')
+        with mock.patch('time.time', return_value=time.time() + 601):
+            self.assertEqual(
+                self._store.get_certificates(),
+                {'kid': 'certificate'}
+            )
+
+    def test_failed_refresh_backs_off(self):
+        """ ensure failed refreshes are not retried by every request """
+        self._store.get_certificates()
+        self._session.get.side_effect = Exception('unavailable')
+        with mock.patch('time.time', return_value=time.time() + 601):
+            self._store.get_certificates()
+            self._store.get_certificates()
+        self.assertEqual(self._session.get.call_count, 2)
+
+    def test_certificate_request(self):
+        """ ensure certificate urls are answered from the store """
+        self.addCleanup(
+            certificates._stores.pop,
+            'https://example.com/certs',
+            None
+        )
+        store = get_certificate_store('https://example.com/certs')
+        self.addCleanup(store.cancel)
+        request = mock.Mock()
+        with mock.patch.object(
+            store,
+            'get_certificates',
+            return_value={'kid': 'certificate'}
+        ):
+            response = CertificateRequest(request)('https://example.com/certs')
+        self.assertEqual(json.loads(response.data), {'kid': 'certificate'})
+        request.assert_not_called()
+
+        CertificateRequest(request)('https://example.com/other')
+        request.assert_called_once()
@@ -0,0 +1,70 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.test import SimpleTestCase
+from firebase_admin import auth as firebase_auth
+
+from drf_firebase_auth.authentication import FirebaseAuthentication
+from drf_firebase_auth.cache import clear_caches
+
+
+class CoalescingTests(SimpleTestCase):
+
+    def setUp(self):
+        clear_caches()
+        now = int(time.time())
+        self._decoded_token = {
+            'uid': 'abc',
+            'auth_time': now - 60,
+            'exp': now + 3600
+        }
+        self._calls = []
+        self._release = threading.Event()
+
+    def _slow(self, result):
+        def call(*args, **kwargs):
+            self._calls.append(args)
+            self._release.wait(5)
+            return result
+        return call
+
+    def _run_concurrently(self, fn, count=4):
+        with ThreadPoolExecutor(count) as executor:
+            futures = [executor.submit(fn) for _ in range(count)]
+            # let every thread join the flight before releasing it
+            time.sleep(0.1)
+            self._release.set()
+            return [x.result(5) for x in futures]
+
+    def test_verifications_coalesced(self):
+        """ ensure concurrent requests with one token verify it once """
+        with mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth.verify_id_token',
+            side_effect=self._slow(self._decoded_token)
+        ), mock.patch(
+            'drf_firebase_auth.authentication.api_settings'
+            '.FIREBASE_CHECK_JWT_REVOKED',
+            new=False
+        ):
+            results = self._run_concurrently(
+                lambda: FirebaseAuthentication()._decode_token('token')
+            )
+        self.assertEqual(len(self._calls), 1)
+        self.assertEqual(results, [self._decoded_token] * 4)
+        # every request gets its own copy of the claims
+        self.assertEqual(len({id(x) for x in results}), 4)
+
+    def test_user_fetches_coalesced(self):
+        """ ensure concurrent requests for one uid fetch the user once """
+        firebase_user = firebase_auth.UserRecord({'localId': 'abc'})
+        with mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth.get_user',
+            side_effect=self._slow(firebase_user)
+        ):
+            results = self._run_concurrently(
+                lambda: FirebaseAuthentication()._get_firebase_user('abc')
+            )
+        self.assertEqual(len(self._calls), 1)
+        self.assertEqual({x.uid for x in results}, {'abc'})
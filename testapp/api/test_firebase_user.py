@@ -0,0 +1,96 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+from firebase_admin import auth as firebase_auth
+
+from drf_firebase_auth.authentication import FirebaseAuthentication
+from drf_firebase_auth.cache import clear_caches
+from drf_firebase_auth.utils import get_firebase_user_from_claims
+
+
+class FirebaseUserTests(SimpleTestCase):
+
+    def setUp(self):
+        clear_caches()
+        self._decoded_token = {
+            'uid': 'abc',
+            'email': 'user@example.com',
+            'email_verified': True,
+            'name': 'Test User',
+            'firebase': {
+                'sign_in_provider': 'google.com',
+                'identities': {
+                    'google.com': ['1234'],
+                    'email': ['user@example.com']
+                }
+            }
+        }
+        self._MOCK_GET_USER = mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth.get_user',
+            return_value=firebase_auth.UserRecord({
+                'localId': 'abc',
+                'email': 'user@example.com',
+                'emailVerified': True
+            })
+        )
+        self._MOCK_USER_CACHE_MEMORY = mock.patch(
+            'drf_firebase_auth.authentication.api_settings'
+            '.FIREBASE_USER_CACHE_BACKEND',
+            new='memory'
+        )
+        self._MOCK_FIREBASE_AUTH_FROM_CLAIMS = mock.patch(
+            'drf_firebase_auth.authentication.api_settings'
+            '.FIREBASE_AUTH_FROM_CLAIMS',
+            new=True
+        )
+
+    def test_user_cache_hit(self):
+        """ ensure the firebase user is only fetched once per uid """
+        with self._MOCK_USER_CACHE_MEMORY:
+            with self._MOCK_GET_USER as get_user:
+                auth = FirebaseAuthentication()
+                first = auth._authenticate_token(self._decoded_token)
+                second = auth._authenticate_token(self._decoded_token)
+                self.assertEqual(get_user.call_count, 1)
+                self.assertEqual(first.uid, second.uid)
+                self.assertTrue(second.email_verified)
+
+    def test_authenticate_from_claims(self):
+        """ ensure no firebase lookup is made when using claims """
+        with self._MOCK_FIREBASE_AUTH_FROM_CLAIMS:
+            with self._MOCK_GET_USER as get_user:
+                firebase_user = FirebaseAuthentication()._authenticate_token(
+                    self._decoded_token
+                )
+                get_user.assert_not_called()
+                self.assertEqual(firebase_user.uid, 'abc')
+
+    def test_user_from_claims(self):
+        """ ensure claims map onto the UserRecord fields in use """
+        firebase_user = get_firebase_user_from_claims(self._decoded_token)
+        self.assertEqual(firebase_user.email, 'user@example.com')
+        self.assertTrue(firebase_user.email_verified)
+        self.assertEqual(firebase_user.display_name, 'Test User')
+        self.assertEqual(
+            [(x.provider_id, x.uid) for x in firebase_user.provider_data],
+            [('google.com', '1234')]
+        )
+
+        # providers must not depend on the sign in method of the token
+        identities = {
+            'email': ['user@example.com'],
+            'google.com': ['1234']
+        }
+        providers = set()
+        for sign_in_provider in ('password', 'google.com'):
+            self._decoded_token['firebase'] = {
+                'sign_in_provider': sign_in_provider,
+                'identities': identities
+            }
+            firebase_user = get_firebase_user_from_claims(
+                self._decoded_token
+            )
+            providers.add(tuple(
+                (x.provider_id, x.uid) for x in firebase_user.provider_data
+            ))
+        self.assertEqual(providers, {(('google.com', '1234'),)})
@@ -0,0 +1,117 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from drf_firebase_auth.app import get_firebase_app
+from drf_firebase_auth.models import FirebaseUser, FirebaseUserProvider
+
+from .local_firebase import LocalFirebase
+
+User = get_user_model()
+
+
+class ImportFirebaseUsersTests(TestCase):
+
+    def setUp(self):
+        app = get_firebase_app()
+        self._local_firebase = LocalFirebase(app.project_id)
+        for uid in ['a', 'b', 'c']:
+            self._local_firebase.users[uid] = \
+                self._local_firebase.user_record(uid)
+        patcher = self._local_firebase.patch(app)
+        patcher.__enter__()
+        self.addCleanup(patcher.__exit__, None, None, None)
+
+    def _import(self, *args):
+        out = StringIO()
+        call_command('import_firebase_users', *args, stdout=out)
+        return out.getvalue()
+
+    def test_import_by_page(self):
+        """ ensure every user is provisioned, a page at a time """
+        existing = User.objects.create_user(
+            username='existing',
+            email='b@example.com'
+        )
+        out = self._import('--page-size', '2')
+        self.assertIn('next page token: b', out)
+        self.assertEqual(len(out.splitlines()), 2)
+        self.assertEqual(
+            set(FirebaseUser.objects.values_list('uid', flat=True)),
+            {'a', 'b', 'c'}
+        )
+        self.assertEqual(FirebaseUser.objects.get(uid='b').user, existing)
+        self.assertEqual(User.objects.get(username='a').email, 'a@example.com')
+        self.assertEqual(FirebaseUserProvider.objects.count(), 3)
+
+    def test_shared_emails_not_linked(self):
+        """ ensure a local user is never linked to two firebase users """
+        shared = User.objects.create_user(
+            username='shared',
+            email='shared@example.com'
+        )
+        for uid in ['d', 'e']:
+            self._local_firebase.users[uid] = \
+                self._local_firebase.user_record(
+                    uid,
+                    email='shared@example.com'
+                )
+        linked = User.objects.create_user(
+            username='linked',
+            email='b@example.com'
+        )
+        FirebaseUser.objects.create(uid='old', user=linked)
+        err = StringIO()
+        call_command('import_firebase_users', stdout=StringIO(), stderr=err)
+        self.assertIn('d: email shared@example.com is shared', err.getvalue())
+        self.assertIn('e: email shared@example.com is shared', err.getvalue())
+        self.assertIn(f'b: user {linked.pk} with email', err.getvalue())
+        self.assertFalse(FirebaseUser.objects.filter(user=shared).exists())
+        self.assertEqual(
+            list(FirebaseUser.objects.filter(user=linked).values_list(
+                'uid',
+                flat=True
+            )),
+            ['old']
+        )
+        self.assertFalse(
+            FirebaseUser.objects.filter(uid__in=['b', 'd', 'e']).exists()
+        )
+
+    def test_import_idempotent(self):
+        """ ensure a repeated import only updates changed providers """
+        self._import()
+        self._local_firebase.users['a']['providerUserInfo'] = [
+            {'providerId': 'google.com', 'rawId': '1234'}
+        ]
+        # savepoint, lookup, then delete, insert and update of the changed
+        # user, and release
+        with self.assertNumQueries(6):
+            out = self._import()
+        self.assertIn('0 created, 0 linked, 1 updated, 0 skipped', out)
+        self.assertEqual(User.objects.count(), 3)
+        self.assertEqual(
+            FirebaseUserProvider.objects.get(firebase_user__uid='a')
+            .provider_id,
+            'google.com'
+        )
+
+    def test_resume_from_page_token(self):
+        """ ensure an import resumes after the given page token """
+        self._import('--page-token', 'a')
+        self.assertEqual(
+            set(FirebaseUser.objects.values_list('uid', flat=True)),
+            {'b', 'c'}
+        )
+
+    def test_email_username_field(self):
+        """ ensure usernames are not written to an email USERNAME_FIELD """
+        with mock.patch.object(User, 'USERNAME_FIELD', 'email'):
+            self._import()
+        self.assertEqual(
+            set(User.objects.values_list('username', 'email')),
+            {(x, f'{x}@example.com') for x in ['a', 'b', 'c']}
+        )
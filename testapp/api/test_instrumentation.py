@@ -0,0 +1,68 @@
+import time
+from unittest import mock
+
+from django.test import TestCase
+from firebase_admin import auth as firebase_auth
+
+from drf_firebase_auth.authentication import FirebaseAuthentication
+from drf_firebase_auth.cache import clear_caches
+from drf_firebase_auth.instrumentation import (
+    SignalHook,
+    cache_accessed,
+    stage_measured
+)
+
+
+class InstrumentationTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self._stages = []
+        self._caches = []
+        stage_measured.connect(self._on_stage)
+        cache_accessed.connect(self._on_cache)
+        self.addCleanup(stage_measured.disconnect, self._on_stage)
+        self.addCleanup(cache_accessed.disconnect, self._on_cache)
+
+        for setting, value in [
+            ('FIREBASE_AUTH_METRICS_HOOK', SignalHook),
+            ('FIREBASE_CHECK_JWT_REVOKED', False),
+            ('FIREBASE_TOKEN_CACHE_BACKEND', 'memory'),
+        ]:
+            patcher = mock.patch(
+                f'drf_firebase_auth.authentication.api_settings.{setting}',
+                new=value
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self._MOCK_VERIFY_ID_TOKEN = mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth.verify_id_token',
+            return_value={'uid': 'abc', 'exp': int(time.time()) + 3600}
+        )
+        self._MOCK_GET_USER = mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth.get_user',
+            return_value=firebase_auth.UserRecord({
+                'localId': 'abc',
+                'email': 'user@example.com'
+            })
+        )
+
+    def _on_stage(self, sender, stage, duration, queries, **kwargs):
+        self._stages.append((stage, queries))
+
+    def _on_cache(self, sender, cache, hit, **kwargs):
+        self._caches.append((cache, hit))
+
+    def test_stages_reported(self):
+        """ ensure every stage and cache access is reported """
+        with self._MOCK_VERIFY_ID_TOKEN, self._MOCK_GET_USER:
+            FirebaseAuthentication().authenticate_credentials('token')
+            FirebaseAuthentication().authenticate_credentials('token')
+
+        self.assertEqual(
+            [stage for stage, _ in self._stages],
+            ['decode', 'firebase_user', 'local_user', 'provider_sync'] * 2
+        )
+        self.assertEqual(self._stages[0][1], 0)
+        self.assertGreater(self._stages[2][1], 0)
+        self.assertEqual(self._caches, [('token', False), ('token', True)])
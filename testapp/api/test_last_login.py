@@ -0,0 +1,61 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from drf_firebase_auth.last_login import flush_last_login, update_last_login
+
+User = get_user_model()
+
+
+class LastLoginTests(TestCase):
+
+    def setUp(self):
+        self._user = User.objects.create_user(
+            username='abc',
+            email='user@example.com'
+        )
+        self._MOCK_LAST_LOGIN_UPDATE_INTERVAL = mock.patch(
+            'drf_firebase_auth.last_login.api_settings'
+            '.FIREBASE_LAST_LOGIN_UPDATE_INTERVAL',
+            new=300
+        )
+        self._MOCK_LAST_LOGIN_DEFERRED = mock.patch(
+            'drf_firebase_auth.last_login.api_settings'
+            '.FIREBASE_LAST_LOGIN_DEFERRED',
+            new=True
+        )
+
+    def test_last_login_throttled(self):
+        """ ensure last_login is written at most once per interval """
+        with self._MOCK_LAST_LOGIN_UPDATE_INTERVAL:
+            with self.assertNumQueries(1):
+                update_last_login(self._user)
+            with self.assertNumQueries(0):
+                update_last_login(self._user)
+
+            self._user.last_login = timezone.now() - timedelta(seconds=301)
+            with self.assertNumQueries(1):
+                update_last_login(self._user)
+
+    def test_last_login_deferred(self):
+        """ ensure deferred updates are written in one batch """
+        other_user = User.objects.create_user(
+            username='def',
+            email='other@example.com'
+        )
+        with self._MOCK_LAST_LOGIN_DEFERRED:
+            with self.assertNumQueries(0):
+                update_last_login(self._user)
+                update_last_login(other_user)
+            with self.assertNumQueries(1):
+                flush_last_login()
+            with self.assertNumQueries(0):
+                flush_last_login()
+
+        self.assertEqual(
+            User.objects.filter(last_login__isnull=False).count(),
+            2
+        )
@@ -0,0 +1,129 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from firebase_admin import auth as firebase_auth
+from rest_framework import exceptions
+
+from drf_firebase_auth.authentication import FirebaseAuthentication
+from drf_firebase_auth.cache import clear_caches
+from drf_firebase_auth.models import FirebaseUser
+
+User = get_user_model()
+
+
+class LocalUserTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        MOCK_FIREBASE_CHECK_JWT_REVOKED = mock.patch(
+            'drf_firebase_auth.authentication.api_settings'
+            '.FIREBASE_CHECK_JWT_REVOKED',
+            new=False
+        )
+        MOCK_FIREBASE_CHECK_JWT_REVOKED.start()
+        self.addCleanup(MOCK_FIREBASE_CHECK_JWT_REVOKED.stop)
+        self._MOCK_VERIFY_ID_TOKEN = mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth.verify_id_token',
+            return_value={'uid': 'abc', 'exp': int(time.time()) + 3600}
+        )
+        self._MOCK_GET_USER = mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth.get_user',
+            return_value=firebase_auth.UserRecord({
+                'localId': 'abc',
+                'email': 'user@example.com',
+                'providerUserInfo': [
+                    {'providerId': 'google.com', 'rawId': '1234'}
+                ]
+            })
+        )
+        self._MOCK_LAST_LOGIN_UPDATE_INTERVAL = mock.patch(
+            'drf_firebase_auth.last_login.api_settings'
+            '.FIREBASE_LAST_LOGIN_UPDATE_INTERVAL',
+            new=300
+        )
+
+    def test_existing_user_matched_by_email(self):
+        """ ensure a first sign in links an existing user by email """
+        user = User.objects.create_user(
+            username='existing',
+            email='user@example.com'
+        )
+        with self._MOCK_VERIFY_ID_TOKEN, self._MOCK_GET_USER:
+            local_user, _ = \
+                FirebaseAuthentication().authenticate_credentials('token')
+        self.assertEqual(local_user.pk, user.pk)
+        self.assertEqual(FirebaseUser.objects.get(uid='abc').user_id, user.pk)
+
+    def test_returning_user_single_query(self):
+        """ ensure a returning user is resolved by uid in one query """
+        with self._MOCK_VERIFY_ID_TOKEN, self._MOCK_GET_USER:
+            with self._MOCK_LAST_LOGIN_UPDATE_INTERVAL:
+                first, _ = \
+                    FirebaseAuthentication().authenticate_credentials('token')
+                with self.assertNumQueries(1):
+                    second, _ = FirebaseAuthentication() \
+                        .authenticate_credentials('token')
+        self.assertEqual(first.pk, second.pk)
+
+    def test_lazy_user(self):
+        """ ensure known users are returned without any lookups """
+        MOCK_FIREBASE_AUTH_LAZY_USER = mock.patch(
+            'drf_firebase_auth.authentication.api_settings'
+            '.FIREBASE_AUTH_LAZY_USER',
+            new=True
+        )
+        with self._MOCK_VERIFY_ID_TOKEN, MOCK_FIREBASE_AUTH_LAZY_USER:
+            with self._MOCK_GET_USER as get_user:
+                first, _ = \
+                    FirebaseAuthentication().authenticate_credentials('token')
+                with self.assertNumQueries(0):
+                    second, _ = FirebaseAuthentication() \
+                        .authenticate_credentials('token')
+                    self.assertEqual(second.pk, first.pk)
+                    self.assertEqual(second.uid, 'abc')
+                    self.assertTrue(second.is_authenticated)
+                self.assertEqual(get_user.call_count, 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(second.email, 'user@example.com')
+
+    def test_lazy_user_inactive(self):
+        """ ensure inactive users are refused without any lookups """
+        user = User.objects.create_user(username='abc', is_active=False)
+        FirebaseUser.objects.create(uid='abc', user=user)
+        MOCK_FIREBASE_AUTH_LAZY_USER = mock.patch(
+            'drf_firebase_auth.authentication.api_settings'
+            '.FIREBASE_AUTH_LAZY_USER',
+            new=True
+        )
+        with self._MOCK_VERIFY_ID_TOKEN, MOCK_FIREBASE_AUTH_LAZY_USER:
+            with self._MOCK_GET_USER as get_user:
+                with self.assertRaisesMessage(
+                    exceptions.AuthenticationFailed,
+                    'not currently active'
+                ):
+                    FirebaseAuthentication().authenticate_credentials('token')
+                with self.assertNumQueries(0):
+                    with self.assertRaisesMessage(
+                        exceptions.AuthenticationFailed,
+                        'not currently active'
+                    ):
+                        FirebaseAuthentication() \
+                            .authenticate_credentials('token')
+                self.assertEqual(get_user.call_count, 1)
+
+    def test_lazy_user_deleted(self):
+        """ ensure a lazy user deleted before it is loaded fails auth """
+        with self._MOCK_VERIFY_ID_TOKEN, mock.patch(
+            'drf_firebase_auth.authentication.api_settings'
+            '.FIREBASE_AUTH_LAZY_USER',
+            new=True
+        ):
+            with self._MOCK_GET_USER:
+                FirebaseAuthentication().authenticate_credentials('token')
+                lazy_user, _ = \
+                    FirebaseAuthentication().authenticate_credentials('token')
+        User.objects.filter(pk=lazy_user.pk).delete()
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            lazy_user.email
@@ -0,0 +1,81 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+from firebase_admin import auth as firebase_auth
+
+from drf_firebase_auth.logs import (
+    LoggedClaims,
+    LoggedUserRecord,
+    log_auth,
+    redact_email
+)
+
+
+class LogTests(SimpleTestCase):
+
+    def setUp(self):
+        self._decoded_token = {
+            'uid': 'abc',
+            'email': 'jane@example.com',
+            'exp': 1,
+            'email_verified': True,
+            'firebase': {'sign_in_provider': 'password'}
+        }
+        self._firebase_user = firebase_auth.UserRecord({
+            'localId': 'abc',
+            'email': 'jane@example.com',
+            'emailVerified': True,
+            'providerUserInfo': [{'providerId': 'password', 'rawId': 'x'}]
+        })
+
+    def _mock_log_claims(self, mode):
+        return mock.patch(
+            'drf_firebase_auth.logs.api_settings.FIREBASE_AUTH_LOG_CLAIMS',
+            new=mode
+        )
+
+    def test_summary_redacts(self):
+        """ ensure the default summary leaves out emails and other claims """
+        with self._mock_log_claims('summary'):
+            claims = str(LoggedClaims(self._decoded_token))
+            user = str(LoggedUserRecord(self._firebase_user))
+            self.assertNotIn('jane', claims + user)
+            self.assertIn('password', claims)
+            self.assertIn("'email_verified': True", claims)
+            self.assertIn('password', user)
+            self.assertEqual(
+                redact_email('jane@example.com'),
+                'j***@example.com'
+            )
+
+    def test_none_and_full(self):
+        """ ensure 'none' only logs the uid and 'full' logs everything """
+        with self._mock_log_claims('none'):
+            self.assertEqual(
+                str(LoggedClaims(self._decoded_token)),
+                "{'uid': 'abc'}"
+            )
+        with self._mock_log_claims('full'):
+            self.assertIn('jane', str(LoggedClaims(self._decoded_token)))
+            self.assertIn('jane', str(LoggedUserRecord(self._firebase_user)))
+
+    def test_not_formatted_when_disabled(self):
+        """ ensure arguments are not formatted below the logger level """
+        arg = mock.MagicMock()
+        with mock.patch(
+            'drf_firebase_auth.logs.api_settings.FIREBASE_AUTH_LOG_LEVEL',
+            new='DEBUG'
+        ):
+            with mock.patch(
+                'drf_firebase_auth.logs.log.isEnabledFor',
+                return_value=False
+            ):
+                log_auth('%s', arg)
+        arg.__str__.assert_not_called()
+        with mock.patch(
+            'drf_firebase_auth.logs.api_settings.FIREBASE_AUTH_LOG_LEVEL',
+            new='info'
+        ):
+            with self.assertLogs('drf-firebase-auth', level='INFO') as cm:
+                log_auth('%s', 'hello')
+            self.assertEqual(cm.records[0].getMessage(), 'hello')
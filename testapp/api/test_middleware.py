@@ -0,0 +1,251 @@
+import json
+import time
+import unittest
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.test import TestCase
+from django.urls import re_path
+from firebase_admin import auth as firebase_auth
+
+from drf_firebase_auth.cache import clear_caches
+from drf_firebase_auth.middleware import CLOSE_CODE, FirebaseAuthMiddleware
+
+try:
+    from channels.routing import URLRouter
+except ImportError:
+    URLRouter = None
+
+
+async def echo_user(scope, receive, send):
+    """ websocket app answering each message with the scope's uid """
+    await receive()
+    await send({'type': 'websocket.accept'})
+    while True:
+        message = await receive()
+        if message['type'] == 'websocket.disconnect':
+            return
+        await send({
+            'type': 'websocket.send',
+            'text': str(scope['auth'].get('uid'))
+        })
+
+
+class FirebaseAuthMiddlewareTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self._lifetimes = {'first': 3600, 'second': 3600}
+        for target, kwargs in (
+            (
+                'drf_firebase_auth.authentication.api_settings'
+                '.FIREBASE_CHECK_JWT_REVOKED',
+                {'new': False}
+            ),
+            (
+                'drf_firebase_auth.authentication.firebase_auth'
+                '.verify_id_token',
+                {'side_effect': self._verify_id_token}
+            ),
+            (
+                'drf_firebase_auth.authentication.firebase_auth.get_user',
+                {'side_effect': lambda uid, **kwargs: (
+                    firebase_auth.UserRecord({
+                        'localId': uid,
+                        'email': f'{uid}@example.com'
+                    })
+                )}
+            ),
+        ):
+            patcher = mock.patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _verify_id_token(self, token, **kwargs):
+        if token not in self._lifetimes:
+            raise firebase_auth.InvalidIdTokenError('Invalid token.')
+        return {'uid': token, 'exp': time.time() + self._lifetimes[token]}
+
+    def _connect(self, query_string=b'', headers=(), app=echo_user):
+        communicator = ApplicationCommunicator(
+            FirebaseAuthMiddleware(app),
+            {
+                'type': 'websocket',
+                'path': '/ws/',
+                'query_string': query_string,
+                'headers': list(headers)
+            }
+        )
+        return communicator
+
+    async def _exchange(self, communicator, text='ping'):
+        await communicator.send_input({
+            'type': 'websocket.receive',
+            'text': text
+        })
+        return await communicator.receive_output(1)
+
+    def test_authenticated_once(self):
+        """ ensure the token is verified at connect time only """
+        async def run():
+            communicator = self._connect(b'token=first')
+            await communicator.send_input({'type': 'websocket.connect'})
+            await communicator.receive_output(1)
+            replies = [await self._exchange(communicator) for _ in range(3)]
+            await communicator.send_input({'type': 'websocket.disconnect'})
+            await communicator.wait(1)
+            return replies
+
+        replies = async_to_sync(run)()
+        self.assertEqual([x['text'] for x in replies], ['first'] * 3)
+        firebase_auth.verify_id_token.assert_called_once()
+
+    def test_authorization_header(self):
+        """ ensure the token can be sent in an Authorization header """
+        async def run():
+            communicator = self._connect(
+                headers=[(b'authorization', b'JWT first')]
+            )
+            await communicator.send_input({'type': 'websocket.connect'})
+            await communicator.receive_output(1)
+            return await self._exchange(communicator)
+
+        self.assertEqual(async_to_sync(run)()['text'], 'first')
+
+    def test_authorization_header_case(self):
+        """ ensure the header keyword is matched case insensitively """
+        async def run():
+            communicator = self._connect(
+                headers=[(b'authorization', b'jwt first')]
+            )
+            await communicator.send_input({'type': 'websocket.connect'})
+            await communicator.receive_output(1)
+            return await self._exchange(communicator)
+
+        self.assertEqual(async_to_sync(run)()['text'], 'first')
+
+    def test_refresh_in_band(self):
+        """ ensure refreshed tokens are consumed and replace the user """
+        async def run():
+            communicator = self._connect()
+            await communicator.send_input({'type': 'websocket.connect'})
+            await communicator.receive_output(1)
+            anonymous = await self._exchange(communicator)
+            await communicator.send_input({
+                'type': 'websocket.receive',
+                'text': json.dumps({
+                    'type': 'firebase.token',
+                    'token': 'second'
+                })
+            })
+            refreshed = await self._exchange(communicator)
+            await communicator.send_input({
+                'type': 'websocket.receive',
+                'text': '{"type": "firebase.token", "token": "bad"}'
+            })
+            closed = await communicator.receive_output(1)
+            return anonymous, refreshed, closed
+
+        anonymous, refreshed, closed = async_to_sync(run)()
+        self.assertEqual(anonymous['text'], 'None')
+        self.assertEqual(refreshed['text'], 'second')
+        self.assertEqual(
+            closed,
+            {'type': 'websocket.close', 'code': CLOSE_CODE}
+        )
+
+    def test_refresh_other_uid(self):
+        """ ensure a connection cannot be switched to another user """
+        async def run():
+            communicator = self._connect(b'token=first')
+            await communicator.send_input({'type': 'websocket.connect'})
+            await communicator.receive_output(1)
+            await communicator.send_input({
+                'type': 'websocket.receive',
+                'text': json.dumps({
+                    'type': 'firebase.token',
+                    'token': 'second'
+                })
+            })
+            closed = await communicator.receive_output(1)
+            return closed, await self._exchange(communicator)
+
+        closed, reply = async_to_sync(run)()
+        self.assertEqual(
+            closed,
+            {'type': 'websocket.close', 'code': CLOSE_CODE}
+        )
+        self.assertEqual(reply['text'], 'None')
+
+    def test_expiry(self):
+        """ ensure the connection is closed when its token expires """
+        self._lifetimes['first'] = 0.2
+
+        async def run():
+            communicator = self._connect(b'token=first')
+            await communicator.send_input({'type': 'websocket.connect'})
+            await communicator.receive_output(1)
+            return await communicator.receive_output(1)
+
+        self.assertEqual(
+            async_to_sync(run)(),
+            {'type': 'websocket.close', 'code': CLOSE_CODE}
+        )
+
+    @unittest.skipUnless(URLRouter, 'requires channels')
+    def test_url_router(self):
+        """ ensure refreshes reach applications given a copy of the scope """
+        scopes = []
+
+        async def app(scope, receive, send):
+            scopes.append(scope)
+            await echo_user(scope, receive, send)
+
+        async def run():
+            communicator = self._connect(
+                app=URLRouter([re_path(r'ws/', app)])
+            )
+            await communicator.send_input({'type': 'websocket.connect'})
+            await communicator.receive_output(1)
+            anonymous = await self._exchange(communicator)
+            await communicator.send_input({
+                'type': 'websocket.receive',
+                'text': json.dumps({
+                    'type': 'firebase.token',
+                    'token': 'second'
+                })
+            })
+            return anonymous, await self._exchange(communicator)
+
+        anonymous, refreshed = async_to_sync(run)()
+        self.assertIn('url_route', scopes[0])
+        self.assertEqual(anonymous['text'], 'None')
+        self.assertEqual(refreshed['text'], 'second')
+        self.assertTrue(scopes[0]['user'].is_authenticated)
+
+    @unittest.skipUnless(URLRouter, 'requires channels')
+    def test_url_router_expiry(self):
+        """ ensure expiry resets the user of a copy of the scope """
+        self._lifetimes['first'] = 0.2
+        scopes = []
+
+        async def app(scope, receive, send):
+            scopes.append(scope)
+            await echo_user(scope, receive, send)
+
+        async def run():
+            communicator = self._connect(
+                b'token=first',
+                app=URLRouter([re_path(r'ws/', app)])
+            )
+            await communicator.send_input({'type': 'websocket.connect'})
+            await communicator.receive_output(1)
+            return await communicator.receive_output(1)
+
+        self.assertEqual(
+            async_to_sync(run)(),
+            {'type': 'websocket.close', 'code': CLOSE_CODE}
+        )
+        self.assertFalse(scopes[0]['user'].is_authenticated)
+        self.assertEqual(scopes[0]['auth'], {})
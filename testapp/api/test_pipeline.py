@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from drf_firebase_auth.app import get_firebase_app
+from drf_firebase_auth.cache import clear_caches
+
+from .local_firebase import LocalFirebase
+
+User = get_user_model()
+
+
+class LocalFirebasePipelineTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        app = get_firebase_app()
+        self._local_firebase = LocalFirebase(app.project_id)
+        patcher = self._local_firebase.patch(app)
+        patcher.__enter__()
+        self.addCleanup(patcher.__exit__, None, None, None)
+        self._client = APIClient()
+
+    def _whoami(self, token):
+        return self._client.get(
+            reverse('whoami'),
+            HTTP_AUTHORIZATION=f'JWT {token}'
+        )
+
+    def test_authenticate_offline(self):
+        """ ensure tokens minted locally authenticate end to end """
+        token = self._local_firebase.mint_token('abc')
+        response = self._whoami(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            User.objects.get(firebase_user__uid='abc').email,
+            'abc@example.com'
+        )
+
+    def test_unknown_user(self):
+        """ ensure a token for a user firebase does not know is rejected """
+        token = self._local_firebase.mint_token('abc')
+        del self._local_firebase.users['abc']
+        self.assertEqual(self._whoami(token).status_code, 403)
@@ -0,0 +1,80 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError
+from django.test import TestCase
+from firebase_admin import auth as firebase_auth
+
+from drf_firebase_auth.authentication import FirebaseAuthentication
+from drf_firebase_auth.models import FirebaseUser, FirebaseUserProvider
+
+User = get_user_model()
+
+
+class ProviderSyncTests(TestCase):
+
+    def setUp(self):
+        self._user = User.objects.create_user(
+            username='abc',
+            email='user@example.com'
+        )
+
+    def _get_firebase_user(self, providers) -> firebase_auth.UserRecord:
+        return firebase_auth.UserRecord({
+            'localId': 'abc',
+            'email': 'user@example.com',
+            'providerUserInfo': [
+                {'providerId': provider_id, 'rawId': uid}
+                for provider_id, uid in providers
+            ]
+        })
+
+    def _get_local_providers(self):
+        return set(
+            FirebaseUserProvider.objects.values_list('provider_id', 'uid')
+        )
+
+    def test_provider_sync(self):
+        """ ensure providers are added, removed and skipped if unchanged """
+        auth = FirebaseAuthentication()
+        providers = [('google.com', '1234'), ('password', 'user@example.com')]
+        auth._create_local_firebase_user(
+            self._user,
+            self._get_firebase_user(providers)
+        )
+        self.assertEqual(self._get_local_providers(), set(providers))
+
+        with self.assertNumQueries(1):
+            auth._create_local_firebase_user(
+                self._user,
+                self._get_firebase_user(providers)
+            )
+
+        providers = [('google.com', '1234'), ('phone', '+61400000000')]
+        auth._create_local_firebase_user(
+            self._user,
+            self._get_firebase_user(providers)
+        )
+        self.assertEqual(self._get_local_providers(), set(providers))
+
+    def test_failed_sync_keeps_fingerprint(self):
+        """ ensure the fingerprint is not saved when the sync fails """
+        auth = FirebaseAuthentication()
+        providers = [('google.com', '1234')]
+        with mock.patch.object(
+            FirebaseUserProvider.objects,
+            'bulk_create',
+            side_effect=DatabaseError('sync failed')
+        ):
+            with self.assertRaises(DatabaseError):
+                auth._create_local_firebase_user(
+                    self._user,
+                    self._get_firebase_user(providers)
+                )
+        local_firebase_user = FirebaseUser.objects.get(user=self._user)
+        self.assertEqual(local_firebase_user.provider_fingerprint, '')
+        auth._create_local_firebase_user(
+            self._user,
+            self._get_firebase_user(providers)
+        )
+        self.assertEqual(self._get_local_providers(), set(providers))
@@ -0,0 +1,153 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError
+from django.test import SimpleTestCase, TestCase
+from firebase_admin import auth as firebase_auth
+
+from drf_firebase_auth.authentication import FirebaseAuthentication
+from drf_firebase_auth.cache import clear_caches
+from drf_firebase_auth.models import FirebaseUser
+from drf_firebase_auth.singleflight import SingleFlight
+
+User = get_user_model()
+
+
+class SingleFlightTests(SimpleTestCase):
+
+    def test_concurrent_calls_shared(self):
+        """ ensure concurrent calls for a key run once and share results """
+        single_flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'result'
+
+        results = []
+
+        def call():
+            results.append(single_flight.do('key', fn))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=call) for _ in range(3)]
+        for follower in followers:
+            follower.start()
+        # give the followers time to join the flight
+        time.sleep(0.05)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(
+            sorted(results),
+            [('result', False)] + [('result', True)] * 3
+        )
+        self.assertEqual(
+            single_flight.do('key', lambda: 'next'),
+            ('next', False)
+        )
+
+    def test_exception_shared(self):
+        """ ensure the leader's exception is raised and the key released """
+        single_flight = SingleFlight()
+        with self.assertRaises(ValueError):
+            single_flight.do('key', mock.Mock(side_effect=ValueError))
+        self.assertEqual(single_flight.do('key', lambda: 1), (1, False))
+
+
+class ProvisioningTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        MOCK_FIREBASE_CHECK_JWT_REVOKED = mock.patch(
+            'drf_firebase_auth.authentication.api_settings'
+            '.FIREBASE_CHECK_JWT_REVOKED',
+            new=False
+        )
+        MOCK_FIREBASE_CHECK_JWT_REVOKED.start()
+        self.addCleanup(MOCK_FIREBASE_CHECK_JWT_REVOKED.stop)
+        self._firebase_user = firebase_auth.UserRecord({
+            'localId': 'abc',
+            'email': 'user@example.com',
+            'displayName': 'Jane Doe',
+            'providerUserInfo': [
+                {'providerId': 'google.com', 'rawId': '1234'}
+            ]
+        })
+
+    def test_new_user_single_insert(self):
+        """ ensure a new user is created with a single insert """
+        # the email lookup and the insert
+        with self.assertNumQueries(2):
+            user = FirebaseAuthentication()._get_or_create_local_user(
+                self._firebase_user
+            )
+        self.assertEqual(user.first_name, 'Jane')
+        self.assertIsNotNone(user.last_login)
+
+    def test_provisioned_by_another_process(self):
+        """ ensure losing a provisioning race resolves to the winner """
+        winner = User.objects.create_user(username='winner')
+        FirebaseUser.objects.create(uid='abc', user=winner)
+        auth = FirebaseAuthentication()
+        # the winner's rows are not yet visible on the first lookup
+        with mock.patch.object(
+            auth,
+            '_get_local_firebase_user',
+            side_effect=[
+                None,
+                auth._get_local_firebase_user(self._firebase_user)
+            ]
+        ):
+            local_user = auth._get_local_user(self._firebase_user)
+        self.assertEqual(local_user.pk, winner.pk)
+        self.assertEqual(FirebaseUser.objects.filter(uid='abc').count(), 1)
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_shared_provisioning_not_visible(self):
+        """ ensure a request sharing an unseen provisioning adds no user """
+        winner = User.objects.create_user(username='winner')
+        winner_firebase_user = FirebaseUser.objects.create(
+            uid='abc',
+            user=winner
+        )
+        auth = FirebaseAuthentication()
+        with mock.patch(
+            'drf_firebase_auth.authentication._provisioning.do',
+            return_value=((winner, winner_firebase_user), True)
+        ), mock.patch.object(
+            auth,
+            '_get_local_firebase_user',
+            side_effect=[None, None, winner_firebase_user]
+        ):
+            local_user = auth._get_local_user(self._firebase_user)
+        self.assertEqual(local_user.pk, winner.pk)
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_shared_provisioning_missing(self):
+        """ ensure a shared provisioning that cannot be found fails """
+        auth = FirebaseAuthentication()
+        with mock.patch(
+            'drf_firebase_auth.authentication._provisioning.do',
+            return_value=((None, None), True)
+        ), mock.patch.object(
+            auth,
+            '_get_local_firebase_user',
+            return_value=None
+        ), mock.patch.object(
+            auth,
+            '_create_local_user',
+            side_effect=IntegrityError
+        ):
+            with self.assertRaises(Exception):
+                auth._get_local_user(self._firebase_user)
+        self.assertEqual(User.objects.count(), 0)
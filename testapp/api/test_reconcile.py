@@ -0,0 +1,109 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from drf_firebase_auth.app import get_firebase_app
+from drf_firebase_auth.cache import (
+    clear_caches,
+    local_user_cache,
+    uid_key,
+    user_cache
+)
+from drf_firebase_auth.models import FirebaseUser, FirebaseUserProvider
+
+from .local_firebase import LocalFirebase
+
+User = get_user_model()
+
+
+class ReconcileFirebaseUsersTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        app = get_firebase_app()
+        self._local_firebase = LocalFirebase(app.project_id)
+        for uid in ['active', 'disabled', 'deleted']:
+            self._local_firebase.users[uid] = \
+                self._local_firebase.user_record(uid)
+            FirebaseUser.objects.create(
+                uid=uid,
+                user=User.objects.create_user(username=uid)
+            )
+        self._local_firebase.users['disabled']['disabled'] = True
+        del self._local_firebase.users['deleted']
+        patcher = self._local_firebase.patch(app)
+        patcher.__enter__()
+        self.addCleanup(patcher.__exit__, None, None, None)
+        MOCK_USER_CACHE_MEMORY = mock.patch(
+            'drf_firebase_auth.cache.api_settings'
+            '.FIREBASE_USER_CACHE_BACKEND',
+            new='memory'
+        )
+        MOCK_USER_CACHE_MEMORY.start()
+        self.addCleanup(MOCK_USER_CACHE_MEMORY.stop)
+
+    def _reconcile(self, *args):
+        out = StringIO()
+        call_command(
+            'reconcile_firebase_users',
+            '--batch-size', '2',
+            *args,
+            stdout=out
+        )
+        return out.getvalue()
+
+    def test_deactivate(self):
+        """ ensure disabled and deleted users are deactivated """
+        user_cache().set(uid_key('disabled'), {'localId': 'disabled'}, 60)
+        out = self._reconcile()
+        self.assertIn('3 users checked: 2 deactivated, 0 deleted', out)
+        self.assertEqual(
+            set(User.objects.filter(is_active=True)
+                .values_list('username', flat=True)),
+            {'active'}
+        )
+        self.assertIsNone(user_cache().get(uid_key('disabled')))
+        self.assertEqual(
+            user_cache().get(uid_key('active'))['localId'],
+            'active'
+        )
+        self.assertEqual(
+            FirebaseUserProvider.objects.get().firebase_user.uid,
+            'active'
+        )
+
+    def test_delete(self):
+        """ ensure users deleted at firebase are deleted with --delete """
+        out = self._reconcile('--delete')
+        self.assertIn('1 deactivated, 1 deleted', out)
+        self.assertFalse(User.objects.filter(username='deleted').exists())
+        self.assertFalse(FirebaseUser.objects.filter(uid='deleted').exists())
+
+    def test_reactivate(self):
+        """ ensure users enabled again are reactivated with --reactivate """
+        self._reconcile()
+        self._local_firebase.users['disabled']['disabled'] = False
+        self.assertIn('0 reactivated', self._reconcile())
+        self.assertFalse(User.objects.get(username='disabled').is_active)
+
+        out = self._reconcile('--reactivate')
+        self.assertIn('0 deactivated', out)
+        self.assertIn('1 reactivated', out)
+        self.assertTrue(User.objects.get(username='disabled').is_active)
+        self.assertFalse(User.objects.get(username='deleted').is_active)
+
+    def test_reactivate_evicts_lazy_user(self):
+        """ ensure reactivated users are no longer cached as inactive """
+        self._reconcile()
+        self._local_firebase.users['disabled']['disabled'] = False
+        with mock.patch(
+            'drf_firebase_auth.cache.api_settings.FIREBASE_AUTH_LAZY_USER',
+            new=True
+        ):
+            user = User.objects.get(username='disabled')
+            local_user_cache().set(uid_key('disabled'), (user.pk, False), 60)
+            self._reconcile('--reactivate')
+            self.assertIsNone(local_user_cache().get(uid_key('disabled')))
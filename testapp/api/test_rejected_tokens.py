@@ -0,0 +1,162 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+from firebase_admin import auth as firebase_auth
+
+from drf_firebase_auth.authentication import (
+    FirebaseAuthentication,
+    FirebaseSessionCookieAuthentication
+)
+from drf_firebase_auth import verifier
+from drf_firebase_auth.cache import clear_caches
+
+
+class RejectedTokenCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.addCleanup(clear_caches)
+        for name, value in (
+            ('FIREBASE_CHECK_JWT_REVOKED', False),
+            ('FIREBASE_REJECTED_TOKEN_CACHE_BACKEND', 'memory'),
+        ):
+            patcher = mock.patch(
+                f'drf_firebase_auth.authentication.api_settings.{name}',
+                new=value
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _decode(self, token: str):
+        with self.assertRaisesMessage(
+            firebase_auth.ExpiredIdTokenError,
+            'Token expired.'
+        ):
+            FirebaseAuthentication()._decode_token(token)
+
+    def test_rejected_token_remembered(self):
+        """ ensure a rejected token is not verified again """
+        with mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth.verify_id_token',
+            side_effect=firebase_auth.ExpiredIdTokenError(
+                'Token expired.',
+                None
+            )
+        ) as verify_id_token:
+            self._decode('token')
+            self._decode('token')
+        verify_id_token.assert_called_once()
+
+    def test_unavailable_not_remembered(self):
+        """ ensure failures to reach firebase are retried """
+        with mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth.verify_id_token',
+            side_effect=firebase_auth.CertificateFetchError('down', None)
+        ) as verify_id_token:
+            for _ in range(2):
+                with self.assertRaises(Exception):
+                    FirebaseAuthentication()._decode_token('token')
+        self.assertEqual(verify_id_token.call_count, 2)
+
+    def test_other_errors_not_remembered(self):
+        """ ensure only explicit rejections of the token are remembered """
+        with mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth.verify_id_token',
+            side_effect=ValueError('A project ID is required.')
+        ) as verify_id_token:
+            for _ in range(2):
+                with self.assertRaises(Exception):
+                    FirebaseAuthentication()._decode_token('token')
+        self.assertEqual(verify_id_token.call_count, 2)
+
+    def test_precheck(self):
+        """ ensure prechecked tokens never reach firebase_admin """
+        self.addCleanup(verifier._verifiers.clear)
+        with mock.patch(
+            'drf_firebase_auth.authentication.api_settings'
+            '.FIREBASE_TOKEN_PRECHECK',
+            new=True
+        ), mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth.verify_id_token'
+        ) as verify_id_token, mock.patch(
+            'drf_firebase_auth.routing.get_firebase_app',
+            **{'return_value.project_id': 'test-project'}
+        ):
+            with self.assertRaisesMessage(
+                Exception,
+                'Token is not a well formed JWT.'
+            ):
+                FirebaseAuthentication()._decode_token('not.a.token')
+        verify_id_token.assert_not_called()
+
+    def test_transient_rejections_not_remembered(self):
+        """ ensure tokens used too early or with an unknown kid are retried """
+        too_early = firebase_auth.InvalidIdTokenError('Token used too early.')
+        too_early.reason = verifier.REASON_TOO_EARLY
+        unknown_kid = firebase_auth.InvalidIdTokenError(
+            'Token has an unknown "kid".'
+        )
+        unknown_kid.reason = verifier.REASON_UNKNOWN_KID
+        # passed on by firebase_admin from google-auth
+        stale = firebase_auth.InvalidIdTokenError(
+            'Certificate for key id abc not found.',
+            cause=ValueError('Certificate for key id abc not found.')
+        )
+        for error in (too_early, unknown_kid, stale):
+            with mock.patch(
+                'drf_firebase_auth.authentication.firebase_auth'
+                '.verify_id_token',
+                side_effect=error
+            ) as verify_id_token:
+                for _ in range(2):
+                    with self.assertRaisesMessage(Exception, str(error)):
+                        FirebaseAuthentication()._decode_token('token')
+            self.assertEqual(verify_id_token.call_count, 2)
+
+    def test_missing_kid_remembered(self):
+        """ ensure a token without any kid is not verified again """
+        with mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth.verify_id_token',
+            side_effect=firebase_auth.InvalidIdTokenError(
+                'Firebase ID token has no "kid" claim.'
+            )
+        ) as verify_id_token:
+            for _ in range(2):
+                with self.assertRaises(firebase_auth.InvalidIdTokenError):
+                    FirebaseAuthentication()._decode_token('token')
+        verify_id_token.assert_called_once()
+
+    def test_session_cookie_type_kept(self):
+        """ ensure remembered session cookies are rejected as cookies """
+        with mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth'
+            '.verify_session_cookie',
+            side_effect=firebase_auth.ExpiredSessionCookieError(
+                'Token expired.',
+                None
+            )
+        ) as verify_session_cookie, mock.patch(
+            'drf_firebase_auth.routing.get_firebase_app',
+            **{'return_value.project_id': 'test-project'}
+        ):
+            for _ in range(2):
+                with self.assertRaises(
+                    firebase_auth.ExpiredSessionCookieError
+                ):
+                    FirebaseSessionCookieAuthentication()._decode_token(
+                        'cookie'
+                    )
+        verify_session_cookie.assert_called_once()
+
+    def test_rejections_not_logged_as_errors(self):
+        """ ensure rejected tokens are raised as they are, not as errors """
+        with mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth.verify_id_token',
+            side_effect=firebase_auth.InvalidIdTokenError('Invalid token.')
+        ), mock.patch(
+            'drf_firebase_auth.authentication.log.error'
+        ) as log_error:
+            for _ in range(2):
+                with self.assertRaises(firebase_auth.InvalidIdTokenError):
+                    FirebaseAuthentication()._decode_token('token')
+        log_error.assert_not_called()
@@ -0,0 +1,81 @@
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from firebase_admin import auth as firebase_auth
+
+from drf_firebase_auth.authentication import FirebaseAuthentication
+from drf_firebase_auth.cache import clear_caches
+
+
+class RevocationCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        clear_caches()
+        now = int(time.time())
+        self._decoded_token = {
+            'uid': 'abc',
+            'auth_time': now - 60,
+            'iat': now - 60,
+            'exp': now + 3600
+        }
+        self._firebase_user = firebase_auth.UserRecord({
+            'localId': 'abc',
+            'validSince': str(now - 120)
+        })
+        self._MOCK_VERIFY_ID_TOKEN = mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth.verify_id_token',
+            return_value=self._decoded_token
+        )
+        self._MOCK_GET_USER = mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth.get_user',
+            return_value=self._firebase_user
+        )
+        self._MOCK_REVOCATION_CACHE_MEMORY = mock.patch(
+            'drf_firebase_auth.authentication.api_settings'
+            '.FIREBASE_REVOCATION_CACHE_BACKEND',
+            new='memory'
+        )
+        self._MOCK_TOKEN_CACHE_MEMORY = mock.patch(
+            'drf_firebase_auth.authentication.api_settings'
+            '.FIREBASE_TOKEN_CACHE_BACKEND',
+            new='memory'
+        )
+
+    def test_revocation_checked_locally(self):
+        """ ensure revocation is fetched once and checked locally """
+        with self._MOCK_REVOCATION_CACHE_MEMORY:
+            with self._MOCK_VERIFY_ID_TOKEN as verify_id_token:
+                with self._MOCK_GET_USER as get_user:
+                    auth = FirebaseAuthentication()
+                    auth._decode_token('token')
+                    auth._decode_token('token')
+                    self.assertEqual(get_user.call_count, 1)
+                    verify_id_token.assert_called_with(
+                        'token',
+                        app=mock.ANY,
+                        check_revoked=False
+                    )
+
+    def test_revoked_token_in_token_cache(self):
+        """ ensure a cached token is rejected once its user is evicted """
+        with self._MOCK_REVOCATION_CACHE_MEMORY:
+            with self._MOCK_TOKEN_CACHE_MEMORY:
+                with self._MOCK_VERIFY_ID_TOKEN:
+                    with self._MOCK_GET_USER:
+                        auth = FirebaseAuthentication()
+                        auth._decode_token('token')
+                        self._firebase_user._data['validSince'] = \
+                            str(int(time.time()))
+                        # still within the revocation cache timeout
+                        auth._decode_token('token')
+
+                        call_command(
+                            'evict_firebase_users',
+                            'abc',
+                            stdout=StringIO()
+                        )
+                        with self.assertRaises(Exception):
+                            auth._decode_token('token')
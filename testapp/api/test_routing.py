@@ -0,0 +1,161 @@
+from unittest import mock
+
+import firebase_admin
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from firebase_admin import tenant_mgt
+from rest_framework.test import APIClient
+
+from drf_firebase_auth import app as app_module
+from drf_firebase_auth.app import (
+    get_firebase_app,
+    get_project_apps,
+    get_tenant_client
+)
+from drf_firebase_auth.cache import clear_caches
+from drf_firebase_auth.models import FirebaseUser
+from drf_firebase_auth.settings import api_settings
+from drf_firebase_auth.utils import map_uuid_to_username
+
+from .local_firebase import LocalFirebase, LocalUserSession
+
+User = get_user_model()
+
+
+class RoutingTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self._client = APIClient()
+        default_app = get_firebase_app()
+        other_app = firebase_admin.initialize_app(
+            credential=firebase_admin.credentials.Certificate(
+                api_settings.FIREBASE_SERVICE_ACCOUNT_KEY
+            ),
+            options={'projectId': 'other-project'},
+            name='test_other_project'
+        )
+        self.addCleanup(firebase_admin.delete_app, other_app)
+        self.addCleanup(app_module._apps.pop, 'test_other_project', None)
+        self.addCleanup(setattr, app_module, '_project_apps', None)
+        self._default = LocalFirebase(default_app.project_id)
+        self._other = LocalFirebase('other-project')
+        for patcher in (
+            self._default.patch(default_app),
+            self._other.patch(other_app),
+        ):
+            patcher.__enter__()
+            self.addCleanup(patcher.__exit__, None, None, None)
+        self._tenant_client = tenant_mgt.auth_for_tenant(
+            'tenant-a',
+            app=default_app
+        )
+        for name, value in (
+            ('FIREBASE_PROJECTS', ['test_other_project']),
+            ('FIREBASE_TENANTS', ['tenant-a']),
+        ):
+            patcher = mock.patch(
+                f'drf_firebase_auth.routing.api_settings.{name}',
+                new=value
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _whoami(self, token):
+        return self._client.get(
+            reverse('whoami'),
+            HTTP_AUTHORIZATION=f'JWT {token}'
+        )
+
+    def test_projects(self):
+        """ ensure tokens of every configured project authenticate """
+        for local_firebase, uid in ((self._default, 'a'), (self._other, 'b')):
+            token = local_firebase.mint_token(uid)
+            self.assertEqual(self._whoami(token).status_code, 200)
+        self.assertEqual(
+            set(User.objects.values_list('firebase_user__uid', flat=True)),
+            {'a', 'b'}
+        )
+
+    def test_same_uid_in_projects(self):
+        """ ensure a uid of two projects is two users, cached apart """
+        self._other.users['same'] = self._other.user_record(
+            'same',
+            email='other@example.com'
+        )
+        with mock.patch(
+            'drf_firebase_auth.cache.api_settings.FIREBASE_USER_CACHE_BACKEND',
+            new='memory'
+        ), mock.patch(
+            'drf_firebase_auth.authentication.api_settings'
+            '.FIREBASE_USERNAME_MAPPING_FUNC',
+            new=map_uuid_to_username
+        ):
+            for local_firebase in (self._default, self._other):
+                token = local_firebase.mint_token('same')
+                self.assertEqual(self._whoami(token).status_code, 200)
+        self.assertEqual(
+            set(FirebaseUser.objects.filter(uid='same').values_list(
+                'project_id',
+                'user__email'
+            )),
+            {('', 'same@example.com'), ('other-project', 'other@example.com')}
+        )
+
+    def test_unknown_project(self):
+        """ ensure tokens of other projects are never verified """
+        token = LocalFirebase('unknown-project').mint_token('c')
+        with mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth.verify_id_token'
+        ) as verify_id_token:
+            self.assertEqual(self._whoami(token).status_code, 403)
+        verify_id_token.assert_not_called()
+
+    def test_tenants(self):
+        """ ensure tenant users are fetched from their tenant """
+        tenant_users = LocalFirebase(self._default.project_id)
+        tenant_users.users['t'] = self._default.user_record('t')
+        with mock.patch.object(
+            self._tenant_client._user_manager.http_client,
+            '_session',
+            LocalUserSession(tenant_users)
+        ):
+            token = self._default.mint_token(
+                't',
+                firebase={'sign_in_provider': 'password', 'tenant': 'tenant-a'}
+            )
+            del self._default.users['t']
+            self.assertEqual(self._whoami(token).status_code, 200)
+            token = self._default.mint_token(
+                'u',
+                firebase={'sign_in_provider': 'password', 'tenant': 'tenant-b'}
+            )
+            self.assertEqual(self._whoami(token).status_code, 403)
+
+    def test_tenant_clients_pooled(self):
+        """ ensure tenant clients are set up once per app and tenant """
+        app = get_firebase_app()
+        with mock.patch(
+            'drf_firebase_auth.app.configure_session'
+        ) as configure_session:
+            client = get_tenant_client(app, 'tenant-pooled')
+            self.assertIs(get_tenant_client(app, 'tenant-pooled'), client)
+        configure_session.assert_called_once()
+
+    def test_project_apps_built_once(self):
+        """ ensure the project table is only rebuilt on a setting change """
+        apps = get_project_apps()
+        self.assertIs(get_project_apps(), apps)
+        self.assertEqual(
+            set(apps),
+            {self._default.project_id, 'other-project'}
+        )
+        with mock.patch(
+            'drf_firebase_auth.app.api_settings.FIREBASE_PROJECTS',
+            new=[]
+        ):
+            self.assertEqual(
+                set(get_project_apps()),
+                {self._default.project_id}
+            )
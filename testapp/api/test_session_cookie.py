@@ -0,0 +1,95 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from drf_firebase_auth.app import get_firebase_app
+from drf_firebase_auth.authentication import (
+    FirebaseAuthentication,
+    FirebaseSessionCookieAuthentication
+)
+from drf_firebase_auth.cache import clear_caches
+
+from .local_firebase import LocalFirebase
+
+User = get_user_model()
+
+
+class SessionCookieTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.addCleanup(clear_caches)
+        app = get_firebase_app()
+        self._local_firebase = LocalFirebase(app.project_id)
+        patcher = self._local_firebase.patch(app)
+        patcher.__enter__()
+        self.addCleanup(patcher.__exit__, None, None, None)
+        patcher = mock.patch(
+            'drf_firebase_auth.authentication.api_settings'
+            '.FIREBASE_TOKEN_CACHE_BACKEND',
+            new='memory'
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _mint_cookie(self, uid: str) -> str:
+        return self._local_firebase.mint_token(
+            uid,
+            iss='https://session.firebase.google.com/'
+            f'{self._local_firebase.project_id}'
+        )
+
+    def _request(self, cookie: str, method='get', enforce_csrf=False):
+        factory = APIRequestFactory(enforce_csrf_checks=enforce_csrf)
+        factory.cookies['session'] = cookie
+        return Request(getattr(factory, method)('/'))
+
+    def test_authenticate(self):
+        """ ensure a session cookie authenticates and is cached """
+        cookie = self._mint_cookie('abc')
+        user, decoded_token = FirebaseSessionCookieAuthentication() \
+            .authenticate(self._request(cookie))
+        self.assertEqual(user, User.objects.get(firebase_user__uid='abc'))
+        self.assertEqual(decoded_token['uid'], 'abc')
+        with mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth'
+            '.verify_session_cookie'
+        ) as verify_session_cookie:
+            FirebaseSessionCookieAuthentication().authenticate(
+                self._request(cookie)
+            )
+        verify_session_cookie.assert_not_called()
+
+    def test_no_cookie(self):
+        """ ensure requests without the cookie are left to other classes """
+        request = Request(APIRequestFactory().get('/'))
+        self.assertIsNone(
+            FirebaseSessionCookieAuthentication().authenticate(request)
+        )
+
+    def test_id_token_is_not_a_cookie(self):
+        """ ensure ID tokens are not accepted as cookies, cached or not """
+        token = self._local_firebase.mint_token('abc')
+        FirebaseAuthentication().authenticate_credentials(token)
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            FirebaseSessionCookieAuthentication().authenticate(
+                self._request(token)
+            )
+
+    def test_csrf(self):
+        """ ensure unsafe requests need a CSRF token """
+        cookie = self._mint_cookie('abc')
+        with mock.patch.object(
+            FirebaseSessionCookieAuthentication,
+            'authenticate_credentials'
+        ) as authenticate_credentials:
+            with self.assertRaises(exceptions.PermissionDenied):
+                FirebaseSessionCookieAuthentication().authenticate(
+                    self._request(cookie, method='post', enforce_csrf=True)
+                )
+        # refused before the cookie is verified
+        authenticate_credentials.assert_not_called()
@@ -0,0 +1,108 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from firebase_admin import auth as firebase_auth
+from rest_framework import exceptions
+from rest_framework.test import APIClient
+
+from drf_firebase_auth.authentication import SessionTokenAuthentication
+from drf_firebase_auth.cache import clear_caches
+from drf_firebase_auth.lazy_user import LazyUser
+from drf_firebase_auth.session_token import create_session_token
+
+User = get_user_model()
+
+
+class SessionTokenTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        for target, kwargs in (
+            (
+                'drf_firebase_auth.authentication.api_settings'
+                '.FIREBASE_CHECK_JWT_REVOKED',
+                {'new': False}
+            ),
+            (
+                'drf_firebase_auth.authentication.firebase_auth'
+                '.verify_id_token',
+                {'return_value': {
+                    'uid': 'abc',
+                    'exp': int(time.time()) + 3600
+                }}
+            ),
+            (
+                'drf_firebase_auth.authentication.firebase_auth.get_user',
+                {'return_value': firebase_auth.UserRecord({
+                    'localId': 'abc',
+                    'email': 'user@example.com'
+                })}
+            ),
+        ):
+            patcher = mock.patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _exchange(self) -> str:
+        self.client.credentials(HTTP_AUTHORIZATION='JWT id-token')
+        response = self.client.post(reverse('session_token'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['expires_in'], 900)
+        self.client.credentials()
+        return response.data['token']
+
+    def test_exchange(self):
+        """ ensure a session token authenticates without firebase """
+        token = self._exchange()
+        user = User.objects.get(email='user@example.com')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Session {token}')
+        with mock.patch(
+            'drf_firebase_auth.authentication.firebase_auth.get_user'
+        ) as get_user, self.assertNumQueries(0):
+            request_user, payload = self._authenticate(token)
+        get_user.assert_not_called()
+        self.assertIsInstance(request_user, LazyUser)
+        self.assertEqual(request_user.pk, user.pk)
+        self.assertEqual(payload, {'pk': user.pk, 'uid': 'abc'})
+        response = self.client.get(reverse('whoami'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['request.user']['id'], user.pk)
+
+    def test_exchange_requires_firebase_token(self):
+        """ ensure a session token cannot be exchanged for another """
+        token = self._exchange()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Session {token}')
+        response = self.client.post(reverse('session_token'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_expired(self):
+        """ ensure session tokens are refused once expired """
+        token = self._exchange()
+        with mock.patch('time.time', return_value=time.time() + 901):
+            with self.assertRaisesMessage(
+                exceptions.AuthenticationFailed,
+                'Session token expired.'
+            ):
+                self._authenticate(token)
+
+    def test_tampered(self):
+        """ ensure session tokens signed with another key are refused """
+        user = User.objects.create_user(username='other')
+        with mock.patch(
+            'drf_firebase_auth.session_token.api_settings'
+            '.FIREBASE_SESSION_TOKEN_KEY',
+            new='another key'
+        ):
+            token = create_session_token(user, 'other')
+        with self.assertRaisesMessage(
+            exceptions.AuthenticationFailed,
+            'Invalid session token.'
+        ):
+            self._authenticate(token)
+
+    def _authenticate(self, token: str):
+        return SessionTokenAuthentication().authenticate_credentials(token)
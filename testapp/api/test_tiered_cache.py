@@ -0,0 +1,106 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache as django_cache
+from django.test import SimpleTestCase
+
+from drf_firebase_auth.cache import TieredCache, clear_caches, get_cache
+
+
+class TieredCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        clear_caches()
+        django_cache.clear()
+        self.addCleanup(clear_caches)
+        for name, value in (
+            ('FIREBASE_CACHE_INVALIDATION_INTERVAL', 0),
+            ('FIREBASE_CACHE_TTL_JITTER', 0),
+        ):
+            patcher = mock.patch(
+                f'drf_firebase_auth.cache.api_settings.{name}',
+                new=value
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _process(self) -> TieredCache:
+        """ a tiered cache with an invalidation log of its own """
+        clear_caches()
+        return TieredCache(prefix='test')
+
+    def test_get_backend(self):
+        """ ensure 'tiered' is a cache backend """
+        self.assertIsInstance(
+            get_cache('user', 'tiered', 'default', 10),
+            TieredCache
+        )
+
+    def test_shared_tier(self):
+        """ ensure entries are shared as JSON and held in process """
+        first, second = self._process(), self._process()
+        first.set('uid', {'a': 1}, 60)
+        self.assertEqual(
+            django_cache.get('test:tiered1:uid')[-9:],
+            ',{"a":1}]'
+        )
+        self.assertEqual(second.get('uid'), {'a': 1})
+        django_cache.delete('test:tiered1:uid')
+        self.assertEqual(second.get('uid'), {'a': 1})
+
+    def test_local_tier_timeout(self):
+        """ ensure the in-process tier expires with the shared one """
+        cache = self._process()
+        cache.set('uid', 1, 5)
+        django_cache.delete('test:tiered1:uid')
+        with mock.patch('time.time', return_value=time.time() + 6):
+            self.assertIsNone(cache.get('uid'))
+
+    def test_invalidation(self):
+        """ ensure deleting a key drops it from every process """
+        first, second = self._process(), self._process()
+        first.set('uid', 1, 60)
+        first.set('other', 2, 60)
+        self.assertEqual(second.get('uid'), 1)
+        self.assertEqual(second.get('other'), 2)
+        first.delete('uid')
+        self.assertIsNone(first.get('uid'))
+        self.assertIsNone(second.get('uid'))
+        self.assertEqual(second.l1.get('other'), 2)
+
+    def test_invalidation_log_lost(self):
+        """ ensure a process clears its tier when the log is incomplete """
+        first, second = self._process(), self._process()
+        first.set('other', 2, 60)
+        self.assertEqual(second.get('other'), 2)
+        first.delete('uid')
+        django_cache.delete('drf_firebase_auth:invalidation:1')
+        second.get('uid')
+        self.assertIsNone(second.l1.get('other'))
+
+    def test_jitter(self):
+        """ ensure timeouts are only ever shortened """
+        cache = self._process()
+        with mock.patch(
+            'drf_firebase_auth.cache.api_settings.FIREBASE_CACHE_TTL_JITTER',
+            new=0.5
+        ), mock.patch('random.uniform', return_value=0.5) as uniform:
+            cache.set('uid', 1, 60)
+        uniform.assert_called_once_with(0, 0.5)
+        with mock.patch('time.time', return_value=time.time() + 31):
+            cache.l1.delete('uid')
+            self.assertIsNone(cache.get('uid'))
+
+    def test_other_formats_missed(self):
+        """ ensure entries of the 'django' backend are never read """
+        django_cache.set('drf_firebase_auth:revocation:uid', 1000)
+        cache = get_cache('revocation', 'tiered', 'default', 10)
+        self.assertIsNone(cache.get('uid'))
+        cache.set('uid', 2000, 60)
+        self.assertEqual(
+            get_cache('revocation', 'django', 'default', 10).get('uid'),
+            1000
+        )
+        for payload in (1000, '{"a":1}', '[1]', '["a",1]'):
+            django_cache.set('test:tiered1:uid', payload)
+            self.assertIsNone(self._process().get('uid'))
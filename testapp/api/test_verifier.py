@@ -0,0 +1,66 @@
+import time
+
+from django.test import SimpleTestCase
+from firebase_admin import auth as firebase_auth
+
+from drf_firebase_auth.verifier import TokenVerifier
+
+from .local_firebase import LocalFirebase
+
+
+class TokenVerifierTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._local_firebase = LocalFirebase('test-project')
+
+    def setUp(self):
+        self._store = self._local_firebase.certificate_store()
+        self._verifier = TokenVerifier('test-project', store=self._store)
+
+    def tearDown(self):
+        self._store.cancel()
+
+    def test_valid_token(self):
+        """ ensure a valid token is verified and gains a uid claim """
+        token = self._local_firebase.mint_token('abc')
+        decoded_token = self._verifier.verify(token)
+        self.assertEqual(decoded_token['uid'], 'abc')
+
+    def test_invalid_tokens(self):
+        """ ensure tampered and foreign tokens are rejected """
+        invalid_tokens = [
+            'not.a.token',
+            self._local_firebase.mint_token(aud='other-project'),
+            self._local_firebase.mint_token(
+                iss='https://securetoken.google.com/other-project'
+            ),
+            self._local_firebase.mint_token(header={'kid': 'unknown'}),
+            self._local_firebase.mint_token(header={'alg': 'HS256'}),
+            self._local_firebase.mint_token(iat=int(time.time()) + 600),
+            self._local_firebase.mint_token()[:-4] + 'AAAA',
+            LocalFirebase('test-project').mint_token(),
+        ]
+        for token in invalid_tokens:
+            with self.assertRaises(firebase_auth.InvalidIdTokenError):
+                self._verifier.verify(token)
+
+    def test_precheck(self):
+        """ ensure precheck rejects bad claims but not bad signatures """
+        self._verifier.precheck(
+            self._local_firebase.mint_token()[:-4] + 'AAAA'
+        )
+        for token in (
+            'not.a.token',
+            self._local_firebase.mint_token(aud='other-project'),
+            self._local_firebase.mint_token(header={'kid': 'unknown'}),
+        ):
+            with self.assertRaises(firebase_auth.InvalidIdTokenError):
+                self._verifier.precheck(token)
+
+    def test_expired_token(self):
+        """ ensure expired tokens raise ExpiredIdTokenError """
+        token = self._local_firebase.mint_token(exp=int(time.time()) - 1)
+        with self.assertRaises(firebase_auth.ExpiredIdTokenError):
+            self._verifier.verify(token)
@@ -8,6 +8,7 @@ from rest_framework.test import APITestCase
 import requests
 import firebase_admin
 from firebase_admin import auth as firebase_auth
+from drf_firebase_auth.app import get_firebase_app
 from drf_firebase_auth.settings import api_settings
 from drf_firebase_auth.utils import (
     get_firebase_user_email,
@@ -56,14 +57,21 @@ class WhoAmITests(APITestCase):
 
     def _get_test_user(self) -> firebase_admin.auth.UserRecord:
         try:
-            return firebase_auth.get_user_by_email(self._test_user_email)
+            # the default app is only initialized on first use
+            return firebase_auth.get_user_by_email(
+                self._test_user_email,
+                app=get_firebase_app()
+            )
         except Exception as e:
             raise Exception(e)
 
     def _create_custom_token(self) -> str:
         try:
             user = self._get_test_user()
-            return firebase_admin.auth.create_custom_token(user.uid)
+            return firebase_admin.auth.create_custom_token(
+                user.uid,
+                app=get_firebase_app()
+            )
         except Exception as e:
             raise Exception(e)
 
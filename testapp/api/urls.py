@@ -2,8 +2,15 @@
 from django.contrib import admin
 from django.urls import path
 
+from drf_firebase_auth.views import SessionTokenExchangeView
+
 from . import views
 
 urlpatterns = [
     path('whoami/', views.WhoAmIView.as_view(), name='whoami'),
+    path(
+        'session/',
+        SessionTokenExchangeView.as_view(),
+        name='session_token'
+    ),
 ]
@@ -40,7 +40,9 @@ INSTALLED_APPS = [
 
     'rest_framework',
 
-    'drf_firebase_auth'
+    'drf_firebase_auth',
+
+    'api',
 ]
 
 MIDDLEWARE = [
@@ -127,6 +129,7 @@ REST_FRAMEWORK = {
   'DEFAULT_AUTHENTICATION_CLASSES': [
     'rest_framework.authentication.SessionAuthentication',
     'drf_firebase_auth.authentication.FirebaseAuthentication',
+    'drf_firebase_auth.authentication.SessionTokenAuthentication',
   ]
 }
 